@@ -0,0 +1,31 @@
+"""Бенчмарки продуктивності (запускаються вручну проти тестової БД).
+
+Приклад:
+    python -m benchmarks.bench_category_counts
+"""
+
+from config import (
+    TEST_DB_HOST,
+    TEST_DB_PORT,
+    TEST_DB_USER,
+    TEST_DB_PASSWORD,
+    TEST_DB_NAME,
+)
+from database import Database
+
+
+def get_bench_db() -> Database:
+    """Повертає екземпляр Database, налаштований на тестову БД.
+
+    Бенчмарки створюють та видаляють власні дані, тому ніколи
+    не запускаються проти робочої бази.
+    """
+    bench_db = Database()
+    bench_db.config = {
+        "host": TEST_DB_HOST,
+        "port": TEST_DB_PORT,
+        "user": TEST_DB_USER,
+        "password": TEST_DB_PASSWORD,
+        "database": TEST_DB_NAME,
+    }
+    return bench_db
@@ -0,0 +1,103 @@
+"""Бенчмарк: список категорій з кількістю товарів.
+
+Порівнює старий N+1 підхід (get_categories + get_products_by_category
+для кожної категорії) з одним GROUP BY запитом get_category_counts()
+на 10/100/1000 категоріях, а також читання з прогрітого знімка каталогу.
+
+Запуск:
+    python -m benchmarks.bench_category_counts
+"""
+
+import asyncio
+import time
+
+from benchmarks import get_bench_db
+
+CATEGORY_PREFIX = "bench_category:"
+PRODUCTS_PER_CATEGORY = 3
+CATEGORY_SIZES = (10, 100, 1000)
+REPEATS = 5
+
+
+async def n_plus_one_counts(db):
+    """Старий підхід з обробників каталогу."""
+    categories = await db.get_categories()
+    categories_with_counts = []
+    for category in categories:
+        products_count = len(await db.get_products_by_category(category))
+        categories_with_counts.append((category, products_count))
+    categories_with_counts.sort(key=lambda x: x[1], reverse=True)
+    return categories_with_counts
+
+
+async def seed(db, categories_count: int):
+    rows = [
+        (f"Bench product {i}-{j}", "Bench", 100.0, f"{CATEGORY_PREFIX}{i:04d}", None, 5)
+        for i in range(categories_count)
+        for j in range(PRODUCTS_PER_CATEGORY)
+    ]
+    async with db.pool.acquire() as conn:
+        await conn.executemany(
+            "INSERT INTO products (name, description, price, category, image_url, stock) "
+            "VALUES ($1, $2, $3, $4, $5, $6)",
+            rows
+        )
+
+
+async def cleanup(db):
+    async with db.pool.acquire() as conn:
+        await conn.execute("DELETE FROM products WHERE category LIKE $1", f"{CATEGORY_PREFIX}%")
+
+
+async def snapshot_counts(db):
+    db.catalog.enabled = True
+    try:
+        return await db.get_category_counts()
+    finally:
+        db.catalog.enabled = False
+
+
+async def measure(func, db) -> float:
+    """Повертає найкращий час виконання в мілісекундах."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await func(db)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def main() -> None:
+    db = get_bench_db()
+    await db.connect()
+    await db.init_db()
+    # SQL-підходи вимірюються напряму, без знімка каталогу
+    db.catalog.enabled = False
+    try:
+        print(
+            f"{'categories':>10} | {'N+1 loop, ms':>12} | {'GROUP BY, ms':>12} | "
+            f"{'speedup':>7} | {'snapshot, ms':>12}"
+        )
+        for categories_count in CATEGORY_SIZES:
+            await cleanup(db)
+            await seed(db, categories_count)
+            db.catalog.invalidate()
+
+            # Обидва підходи мають повертати однаковий результат
+            assert dict(await n_plus_one_counts(db)) == dict(await db.get_category_counts())
+
+            loop_ms = await measure(n_plus_one_counts, db)
+            grouped_ms = await measure(lambda d: d.get_category_counts(), db)
+            await snapshot_counts(db)  # прогріваємо знімок
+            snapshot_ms = await measure(snapshot_counts, db)
+            print(
+                f"{categories_count:>10} | {loop_ms:>12.2f} | {grouped_ms:>12.2f} | "
+                f"{loop_ms / grouped_ms:>6.1f}x | {snapshot_ms:>12.4f}"
+            )
+    finally:
+        await cleanup(db)
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
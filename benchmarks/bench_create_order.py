@@ -0,0 +1,54 @@
+"""Бенчмарк: одночасні замовлення одного товару.
+
+Запускає N одночасних create_order на товар із залишком STOCK і показує
+пропускну здатність та кількість створених замовлень (без перепродажу
+їх рівно STOCK).
+
+Запуск:
+    python -m benchmarks.bench_create_order
+"""
+
+import asyncio
+import time
+
+from benchmarks import get_bench_db
+
+CATEGORY = "bench_create_order"
+STOCK = 50
+ATTEMPTS = (100, 1000)
+
+
+async def cleanup(db):
+    async with db.pool.acquire() as conn:
+        await conn.execute(
+            "DELETE FROM orders WHERE product_id IN (SELECT id FROM products WHERE category = $1)", CATEGORY
+        )
+        await conn.execute("DELETE FROM products WHERE category = $1", CATEGORY)
+
+
+async def main() -> None:
+    db = get_bench_db()
+    await db.connect()
+    await db.init_db()
+    try:
+        print(f"{'attempts':>8} | {'seconds':>8} | {'orders/s':>8} | {'created':>7}")
+        for attempts in ATTEMPTS:
+            await cleanup(db)
+            product_id = await db.add_product("Bench product", "Bench", 100.0, CATEGORY, STOCK)
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(
+                db.create_order(1000 + i, "Bench", product_id) for i in range(attempts)
+            ))
+            elapsed = time.perf_counter() - started
+
+            created = sum(1 for order_id in results if order_id)
+            assert created == STOCK
+            print(f"{attempts:>8} | {elapsed:>8.3f} | {attempts / elapsed:>8.0f} | {created:>7}")
+    finally:
+        await cleanup(db)
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""Бенчмарк: FSM-сховища на повному сценарії замовлення з контактами.
+
+Проганяє обробники order_product_with_contact_start -> process_order_phone ->
+process_order_email -> confirm_order_with_contact для багатьох користувачів
+одночасно з MemoryStorage та PostgresStorage. Після кожного кроку зміни
+зберігаються так само, як це робить FSMFlushMiddleware. Повідомлення
+Telegram замінені заглушками, замовлення створюються в тестовій БД.
+
+Запуск:
+    python -m benchmarks.bench_fsm_storage
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from benchmarks import get_bench_db
+from fsm_storage import PostgresStorage
+from handlers.user.orders import (
+    confirm_order_with_contact,
+    order_product_with_contact_start,
+    process_order_email,
+    process_order_phone,
+)
+
+USER_ID_BASE = 900_000_000
+FLOWS = (50, 200)
+BENCH_USER_NAME = "bench_fsm"
+
+
+def make_user(user_id: int):
+    user = MagicMock()
+    user.id = user_id
+    user.full_name = BENCH_USER_NAME
+    return user
+
+
+def make_message(user_id: int, text: str):
+    message = MagicMock()
+    message.text = text
+    message.from_user = make_user(user_id)
+    message.answer = AsyncMock()
+    return message
+
+
+def make_callback(user_id: int, data: str):
+    callback = MagicMock()
+    callback.data = data
+    callback.from_user = make_user(user_id)
+    callback.message = MagicMock()
+    callback.message.edit_text = AsyncMock()
+    callback.answer = AsyncMock()
+    return callback
+
+
+async def run_flow(storage, user_id: int, product_id: int) -> None:
+    """Один користувач проходить оформлення замовлення від кнопки до підтвердження."""
+    key = StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+    steps = [
+        lambda state: order_product_with_contact_start(
+            make_callback(user_id, f"order_product:{product_id}"), state),
+        lambda state: process_order_phone(make_message(user_id, "+380501234567"), state),
+        lambda state: process_order_email(make_message(user_id, "user@example.com"), state),
+        lambda state: confirm_order_with_contact(make_message(user_id, "так"), state),
+    ]
+    for step in steps:
+        # Кожен крок - окреме оновлення Telegram з новим FSMContext
+        state = FSMContext(storage=storage, key=key)
+        await state.get_state()  # FSM middleware читає стан для фільтрів
+        await step(state)
+        if hasattr(storage, "flush"):
+            await storage.flush(key)
+
+
+async def measure(storage, flows: int, product_id: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_flow(storage, USER_ID_BASE + i, product_id) for i in range(flows)
+    ))
+    return time.perf_counter() - started
+
+
+async def cleanup(db, product_id: int) -> None:
+    async with db.pool.acquire() as conn:
+        await conn.execute("DELETE FROM orders WHERE user_name = $1", BENCH_USER_NAME)
+        await conn.execute("DELETE FROM products WHERE id = $1", product_id)
+        await conn.execute("DELETE FROM fsm_states WHERE key LIKE $1", "fsm:1:%")
+    db.catalog.invalidate()
+
+
+async def main() -> None:
+    db = get_bench_db()
+    await db.connect()
+    await db.init_db()
+    product_id = await db.add_product("Bench FSM product", "Bench", 100.0, "Bench", stock=1_000_000)
+    try:
+        with patch("handlers.user.orders.db", db):
+            print(
+                f"{'flows':>6} | {'memory, ms':>10} | {'postgres, ms':>12} | "
+                f"{'overhead':>8} | {'reads/flow':>10} | {'writes/flow':>11}"
+            )
+            for flows in FLOWS:
+                memory_s = await measure(MemoryStorage(), flows, product_id)
+                postgres = PostgresStorage(db)
+                postgres_s = await measure(postgres, flows, product_id)
+                await postgres.close()
+                print(
+                    f"{flows:>6} | {memory_s * 1000:>10.1f} | {postgres_s * 1000:>12.1f} | "
+                    f"{postgres_s / memory_s:>7.2f}x | {postgres.reads / flows:>10.1f} | "
+                    f"{postgres.writes / flows:>11.1f}"
+                )
+    finally:
+        await cleanup(db, product_id)
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""Бенчмарк: час до аудіо для довгого опису при паралельному синтезі частин.
+
+Порівнює озвучування однієї частини (TTS_CHUNK_CHARS символів) з описом
+у 2000 символів, синтезованим послідовно (пул з одного потоку) та
+паралельно (пул з TTS_MAX_WORKERS потоків). За замовчуванням мережа gTTS
+імітується: gTTS робить один HTTP-запит на кожні ~100 символів, тож
+затримка частини пропорційна її довжині. З --live запити йдуть у Google.
+
+Запуск:
+    python -m benchmarks.bench_tts_chunks [--live]
+"""
+
+import asyncio
+import math
+import sys
+import time
+from unittest.mock import patch
+
+import tts_service
+from config import TTS_CHUNK_CHARS, TTS_MAX_WORKERS
+from tts_service import TTSExecutor, split_text, text_to_speech
+
+SENTENCE = "Детальний опис товару з характеристиками та умовами доставки."
+LONG_TEXT_CHARS = 2000
+REQUEST_LATENCY = 0.15  # секунди на один запит gTTS (~100 символів)
+RUNS = 3
+
+
+class FakeGTTS:
+    """Замінює gTTS: спить REQUEST_LATENCY на кожні 100 символів тексту."""
+
+    def __init__(self, text, lang, slow):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        time.sleep(REQUEST_LATENCY * math.ceil(len(self.text) / 100))
+        fp.write(b"\xff\xfb" + self.text.encode()[:16])
+
+
+def make_text(chars: int) -> str:
+    text = ""
+    while len(text) + len(SENTENCE) + 1 <= chars:
+        text = f"{text} {SENTENCE}" if text else SENTENCE
+    return text
+
+
+async def measure(text: str, workers: int) -> float:
+    """Середній час озвучування тексту з пулом заданого розміру, мс."""
+    executor = TTSExecutor(max_workers=workers, max_queue=len(split_text(text)))
+    total = 0.0
+    with patch.object(tts_service, "tts_executor", executor):
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            result = await text_to_speech(text)
+            total += time.perf_counter() - started
+            if result is None:
+                raise RuntimeError("TTS failed")
+    executor.close()
+    return total / RUNS * 1000
+
+
+async def main(live: bool) -> None:
+    chunk_text = make_text(TTS_CHUNK_CHARS)
+    long_text = make_text(LONG_TEXT_CHARS)
+    chunks = len(split_text(long_text))
+
+    if live:
+        single = await measure(chunk_text, 1)
+        sequential = await measure(long_text, 1)
+        parallel = await measure(long_text, TTS_MAX_WORKERS)
+    else:
+        with patch.object(tts_service, "gTTS", FakeGTTS):
+            single = await measure(chunk_text, 1)
+            sequential = await measure(long_text, 1)
+            parallel = await measure(long_text, TTS_MAX_WORKERS)
+
+    print(f"mode: {'live gTTS' if live else f'simulated, {REQUEST_LATENCY * 1000:.0f} ms per gTTS request'}")
+    print(f"{'case':<34} | {'chars':>5} | {'chunks':>6} | {'ms':>8} | {'x one chunk':>11}")
+    rows = [
+        ("one chunk", len(chunk_text), 1, single),
+        ("long text, sequential (1 thread)", len(long_text), chunks, sequential),
+        (f"long text, parallel ({TTS_MAX_WORKERS} threads)", len(long_text), chunks, parallel),
+    ]
+    for name, chars, count, ms in rows:
+        print(f"{name:<34} | {chars:>5} | {count:>6} | {ms:>8.1f} | {ms / single:>10.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main("--live" in sys.argv))
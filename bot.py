@@ -5,12 +5,26 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiohttp import web
 
-from config import BOT_TOKEN, LIQPAY_PUBLIC_KEY, LIQPAY_PRIVATE_KEY, LIQPAY_CALLBACK_URL
+from config import (
+    BOT_TOKEN, LIQPAY_PUBLIC_KEY, LIQPAY_PRIVATE_KEY, LIQPAY_CALLBACK_URL,
+    BOT_MODE, TELEGRAM_WEBHOOK_URL, TELEGRAM_WEBHOOK_SECRET, WEB_SERVER_HOST, WEB_SERVER_PORT,
+    FSM_STORAGE,
+)
 from database import db
 from handlers import common_router, user_router, admin_router, ai_router, payment_router
-from handlers.webhook import handle_liqpay_webhook
+from handlers.webhook import handle_liqpay_webhook, register_telegram_webhook, set_telegram_webhook
 from openai_service import init_openai
-from middleware import MessageLoggerMiddleware, CallbackLoggerMiddleware
+from tts_service import tts_executor
+from tts_cache import tts_cache
+from tts_prerender import tts_prerenderer
+from image_jobs import image_jobs
+from image_processing import image_processor
+from http_client import http_client
+from payment_events import payment_events
+from payment_reconciliation import payment_reconciler
+from outbound import outbound_queue
+from fsm_storage import create_fsm_storage
+from middleware import MessageLoggerMiddleware, CallbackLoggerMiddleware, FSMFlushMiddleware
 from logger_config import get_logger
 
 logger = get_logger("bot")
@@ -22,10 +36,29 @@ async def main() -> None:
         logger.error("Помилка: BOT_TOKEN не знайдено в .env файлі!")
         return
 
+    if BOT_MODE not in ("polling", "webhook"):
+        logger.error(f"Помилка: невідомий BOT_MODE={BOT_MODE} (polling або webhook)")
+        return
+    if BOT_MODE == "webhook":
+        if not TELEGRAM_WEBHOOK_URL or not TELEGRAM_WEBHOOK_SECRET:
+            logger.error("Помилка: для BOT_MODE=webhook потрібні TELEGRAM_WEBHOOK_URL і TELEGRAM_WEBHOOK_SECRET")
+            return
+        if FSM_STORAGE != "postgres":
+            logger.warning(f"FSM_STORAGE={FSM_STORAGE}: стани FSM не спільні між процесами за балансувальником")
+
     try:
         # Підключення та ініціалізація бази даних
         await db.connect()
         await db.init_db()
+        # Зміна озвучуваних полів товару скидає кешоване аудіо
+        db.add_product_listener(tts_cache.on_product_changed)
+        # ...і ставить товар у фонову чергу озвучування
+        db.add_product_listener(tts_prerenderer.on_product_changed)
+        await http_client.start()
+        tts_prerenderer.start()
+        image_jobs.start()
+        payment_events.start()
+        payment_reconciler.start()
         logger.info("База даних ініціалізована успішно!")
     except Exception as e:
         logger.error(f"Помилка при ініціалізації БД: {e}")
@@ -48,7 +81,12 @@ async def main() -> None:
 
     # Ініціалізація бота та диспетчера
     bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher()
+    dp = Dispatcher(storage=create_fsm_storage(db))
+    # Фонові сповіщення (результат оплати) відправляє черга з власним Bot
+    outbound_queue.start()
+
+    # Зміни FSM зберігаються одним записом наприкінці обробки оновлення
+    dp.update.outer_middleware(FSMFlushMiddleware())
 
     # Реєстрація middleware для логирования запросів
     dp.message.middleware(MessageLoggerMiddleware())
@@ -63,21 +101,44 @@ async def main() -> None:
 
     # Запуск бота
     logger.info("Бот запущено!")
+    runner = None
     try:
         # Create aiohttp app for webhook
         app = web.Application()
         app.router.add_post('/webhook/liqpay', handle_liqpay_webhook)
-        
+        if BOT_MODE == "webhook":
+            register_telegram_webhook(app, dp, bot)
+
         # Create runner for the app
         runner = web.AppRunner(app)
         await runner.setup()
-        site = web.TCPSite(runner, '0.0.0.0', 8080)
+        site = web.TCPSite(runner, WEB_SERVER_HOST, WEB_SERVER_PORT)
         await site.start()
-        logger.info("Webhook сервер запущено на порту 8080")
-        
-        # Start polling
-        await dp.start_polling(bot)
+        logger.info(f"Webhook сервер запущено на порту {WEB_SERVER_PORT}")
+
+        if BOT_MODE == "webhook":
+            # Оновлення приходять на HTTP-сервер, процес працює до зупинки
+            if not await set_telegram_webhook(bot, dp, TELEGRAM_WEBHOOK_URL):
+                logger.error("Помилка: не вдалося встановити Telegram webhook, бот зупиняється")
+                return
+            await asyncio.Event().wait()
+        else:
+            # Webhook, що лишився після запуску з BOT_MODE=webhook, блокує getUpdates (409 Conflict)
+            await bot.delete_webhook()
+            # Start polling
+            await dp.start_polling(bot)
     finally:
+        if runner is not None:
+            await runner.cleanup()
+        await tts_prerenderer.close()
+        await image_jobs.close()
+        await payment_events.close()
+        await payment_reconciler.close()
+        await outbound_queue.close()
+        await http_client.close()
+        await dp.storage.close()
+        tts_executor.close()
+        image_processor.close()
         await db.close()
         await bot.session.close()
 
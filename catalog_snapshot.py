@@ -0,0 +1,202 @@
+"""Незмінний знімок каталогу товарів у пам'яті процесу.
+
+Каталог змінюється лише через методи Database (add_product, update_product,
+delete_product, create_order), тому читання каталогу можна обслуговувати
+з пам'яті. Кожна зміна створює новий знімок з більшою версією, а старий
+залишається незмінним для тих, хто його вже отримав.
+"""
+
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from logger_config import get_logger
+
+logger = get_logger("aiogram.database")
+
+Product = Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Незмінний знімок каталогу з індексами для обробників каталогу."""
+
+    version: int
+    loaded_at: float
+    products: Tuple[Product, ...]
+    by_id: Mapping[int, Product]
+    by_category: Mapping[str, Tuple[Product, ...]]
+    category_counts: Tuple[Tuple[str, int], ...]
+
+    @classmethod
+    def build(cls, version: int, rows: Iterable[Mapping[str, Any]],
+              loaded_at: Optional[float] = None) -> "CatalogSnapshot":
+        """Створює знімок з рядків таблиці products.
+
+        Args:
+            version: Версія знімка
+            rows: Рядки таблиці products (будь-які mapping-и)
+            loaded_at: Час завантаження з БД (time.monotonic())
+        """
+        products = tuple(sorted(
+            (MappingProxyType(dict(row)) for row in rows),
+            key=lambda p: p['id']
+        ))
+
+        by_category: Dict[str, List[Product]] = {}
+        for product in products:
+            if product['stock'] > 0:
+                by_category.setdefault(product['category'], []).append(product)
+
+        category_counts = tuple(sorted(
+            ((category, len(items)) for category, items in by_category.items()),
+            key=lambda item: (-item[1], item[0])
+        ))
+
+        return cls(
+            version=version,
+            loaded_at=time.monotonic() if loaded_at is None else loaded_at,
+            products=products,
+            by_id=MappingProxyType({p['id']: p for p in products}),
+            by_category=MappingProxyType({k: tuple(v) for k, v in sorted(by_category.items())}),
+            category_counts=category_counts,
+        )
+
+    def with_product(self, version: int, row: Mapping[str, Any]) -> "CatalogSnapshot":
+        """Повертає новий знімок з доданим або оновленим товаром."""
+        rows = [p for p in self.products if p['id'] != row['id']]
+        rows.append(row)
+        return replace(CatalogSnapshot.build(version, rows), loaded_at=self.loaded_at)
+
+    def without_product(self, version: int, product_id: int) -> "CatalogSnapshot":
+        """Повертає новий знімок без вказаного товару."""
+        rows = [p for p in self.products if p['id'] != product_id]
+        return replace(CatalogSnapshot.build(version, rows), loaded_at=self.loaded_at)
+
+    # Методи з тією ж семантикою, що й відповідні SQL-запити Database.
+    # Повертають копії, щоб знімок не можна було змінити ззовні.
+
+    def get_all_products(self) -> List[Dict]:
+        """Всі товари в наявності, впорядковані за ID."""
+        return [dict(p) for p in self.products if p['stock'] > 0]
+
+    def get_product_by_id(self, product_id: int) -> Optional[Dict]:
+        """Товар за ID (незалежно від наявності)."""
+        product = self.by_id.get(product_id)
+        return dict(product) if product else None
+
+    def get_products_from(self, product_id: Optional[int], count: int,
+                          backward: bool = False) -> List[Dict]:
+        """До count товарів у наявності після product_id (або перед ним, якщо backward).
+
+        Товари повертаються в порядку обходу: за зростанням ID, а для backward -
+        за спаданням. product_id=None означає початок списку.
+        """
+        if product_id is None:
+            start = 0
+        elif backward:
+            start = bisect.bisect_left(self.products, product_id, key=lambda p: p['id']) - 1
+        else:
+            start = bisect.bisect_right(self.products, product_id, key=lambda p: p['id'])
+
+        step = -1 if backward else 1
+        result = []
+        index = start
+        while 0 <= index < len(self.products) and len(result) < count:
+            product = self.products[index]
+            if product['stock'] > 0:
+                result.append(dict(product))
+            index += step
+        return result
+
+    def get_products_by_category(self, category: str) -> List[Dict]:
+        """Товари категорії в наявності, впорядковані за ID."""
+        return [dict(p) for p in self.by_category.get(category, ())]
+
+    def get_categories(self) -> List[str]:
+        """Категорії, в яких є товари в наявності, за абеткою."""
+        return list(self.by_category.keys())
+
+    def get_category_counts(self) -> List[Tuple[str, int]]:
+        """Категорії з кількістю товарів (спадаючи за кількістю)."""
+        return list(self.category_counts)
+
+
+class CatalogCache:
+    """Тримає поточний знімок каталогу та його версію.
+
+    Знімок завантажується ліниво при першому читанні. Записи через Database
+    збільшують версію та латають знімок на місці (apply_product/remove_product)
+    або скидають його (invalidate). TTL обмежує час життя знімка на випадок
+    змін каталогу поза цим процесом; ttl=0 вимикає перезавантаження за часом.
+    """
+
+    def __init__(self, enabled: bool = True, ttl: float = 0):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.version = 0
+        self.loads = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        """Поточний знімок без перевірки свіжості (None якщо не завантажений)."""
+        return self._snapshot
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        if snapshot is None or snapshot.version != self.version:
+            return False
+        return not self.ttl or time.monotonic() - snapshot.loaded_at < self.ttl
+
+    async def get(self, loader: Callable[[], Awaitable[Iterable[Mapping[str, Any]]]]) -> CatalogSnapshot:
+        """Повертає свіжий знімок, за потреби завантажуючи його через loader."""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            version = self.version
+            rows = await loader()
+            snapshot = CatalogSnapshot.build(version, rows)
+            self.loads += 1
+
+            # Якщо під час завантаження був запис, знімок може не містити
+            # його результату - віддаємо його лише поточному читачу
+            if self.version == version:
+                self._snapshot = snapshot
+                logger.debug(f"Catalog snapshot v{version} loaded: {len(snapshot.products)} products")
+            return snapshot
+
+    def apply_product(self, row: Mapping[str, Any]) -> None:
+        """Фіксує додавання або зміну товару (зокрема списання залишку замовленням).
+
+        Відповіді паралельних записів (замовлень, поповнення залишку адміном)
+        можуть прийти не в порядку комміту, тому рядок з row_version, не
+        новішою за версію товару в знімку, ігнорується.
+        """
+        if self._snapshot is not None and 'row_version' in row:
+            current = self._snapshot.by_id.get(row['id'])
+            if current is not None and current.get('row_version', -1) >= row['row_version']:
+                return
+        self.version += 1
+        if self._snapshot is not None:
+            self._snapshot = self._snapshot.with_product(self.version, row)
+
+    def remove_product(self, product_id: int) -> None:
+        """Фіксує видалення товару."""
+        self.version += 1
+        if self._snapshot is not None:
+            self._snapshot = self._snapshot.without_product(self.version, product_id)
+
+    def invalidate(self) -> None:
+        """Скидає знімок; наступне читання завантажить каталог з БД."""
+        self.version += 1
+        self._snapshot = None
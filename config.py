@@ -31,6 +31,41 @@ TEST_DB_NAME = getenv("TEST_DB_NAME", "test_shop_bot")
 # ID адміністраторів (додайте свій Telegram ID)
 ADMIN_IDS = [int(id) for id in getenv("ADMIN_IDS", "").split(",") if id]
 
+# ============ TELEGRAM UPDATES ============
+# polling - getUpdates; webhook - оновлення приходять на HTTP-сервер бота
+BOT_MODE = getenv("BOT_MODE", "polling").lower()
+# Публічна адреса сервера бота (без шляху), на яку Telegram надсилає оновлення
+TELEGRAM_WEBHOOK_URL = getenv("TELEGRAM_WEBHOOK_URL", "")
+TELEGRAM_WEBHOOK_PATH = getenv("TELEGRAM_WEBHOOK_PATH", "/webhook/telegram")
+# Секрет у заголовку X-Telegram-Bot-Api-Secret-Token (символи A-Z, a-z, 0-9, _ та -)
+TELEGRAM_WEBHOOK_SECRET = getenv("TELEGRAM_WEBHOOK_SECRET", "")
+# Адреса HTTP-сервера (LiqPay callback та Telegram webhook)
+WEB_SERVER_HOST = getenv("WEB_SERVER_HOST", "0.0.0.0")
+WEB_SERVER_PORT = int(getenv("WEB_SERVER_PORT", "8080"))
+
+# ============ OUTBOUND MESSAGES ============
+# Черга фонових сповіщень: максимум повідомлень за секунду та запас після паузи
+# (ліміт Telegram ~30/с на бота: за будь-яку секунду не більше RATE + BURST)
+OUTBOUND_RATE = float(getenv("OUTBOUND_RATE", "25"))
+OUTBOUND_BURST = float(getenv("OUTBOUND_BURST", "5"))
+# Ліміт одного чату (Telegram ~1 повідомлення за секунду)
+OUTBOUND_CHAT_RATE = float(getenv("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = float(getenv("OUTBOUND_CHAT_BURST", "1"))
+# Скільки повідомлень відправляється одночасно та спроб при flood control
+OUTBOUND_BATCH_SIZE = int(getenv("OUTBOUND_BATCH_SIZE", "10"))
+OUTBOUND_MAX_ATTEMPTS = int(getenv("OUTBOUND_MAX_ATTEMPTS", "3"))
+
+# ============ HTTP CLIENT ============
+# Спільний пул з'єднань для вихідних запитів (LiqPay, завантаження зображень)
+HTTP_POOL_LIMIT = int(getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+# Скільки тримати невикористане з'єднання та кешувати DNS, секунди
+HTTP_KEEPALIVE_TIMEOUT = float(getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_DNS_CACHE_TTL = int(getenv("HTTP_DNS_CACHE_TTL", "300"))
+# Таймаути за замовчуванням: весь запит та встановлення з'єднання, секунди
+HTTP_TIMEOUT = float(getenv("HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(getenv("HTTP_CONNECT_TIMEOUT", "10"))
+
 # ============ LIQPAY CONFIGURATION ============
 LIQPAY_PUBLIC_KEY = getenv("LIQPAY_PUBLIC_KEY", "")
 LIQPAY_PRIVATE_KEY = getenv("LIQPAY_PRIVATE_KEY", "")
@@ -38,6 +73,30 @@ LIQPAY_CURRENCY = getenv("LIQPAY_CURRENCY", "UAH")
 LIQPAY_API_URL = getenv("LIQPAY_API_URL", "https://www.liqpay.ua/api/")
 LIQPAY_CALLBACK_URL = getenv("LIQPAY_CALLBACK_URL", "")
 
+# ============ PAYMENT EVENTS ============
+# Webhook LiqPay записує подію в payment_events, фоновий обробник застосовує її
+PAYMENT_EVENTS_BATCH_SIZE = int(getenv("PAYMENT_EVENTS_BATCH_SIZE", "50"))
+# Як часто перевіряти таблицю без нових подій у цьому процесі, секунди
+PAYMENT_EVENTS_POLL_INTERVAL = float(getenv("PAYMENT_EVENTS_POLL_INTERVAL", "5"))
+# Скільки подія зарезервована за обробником (після збою процесу її забере інший), секунди
+PAYMENT_EVENTS_LEASE = int(getenv("PAYMENT_EVENTS_LEASE", "60"))
+# Після стількох невдалих спроб подія лишається в таблиці для ручного розбору
+PAYMENT_EVENTS_MAX_ATTEMPTS = int(getenv("PAYMENT_EVENTS_MAX_ATTEMPTS", "10"))
+# Скільки останніх (payment_id, status) пам'ятати для відповіді на повторні callback без БД
+PAYMENT_EVENTS_DEDUPE_SIZE = int(getenv("PAYMENT_EVENTS_DEDUPE_SIZE", "10000"))
+
+# ============ PAYMENT RECONCILIATION ============
+# Платежі LiqPay без фінального статусу (втрачений callback) перевіряються через API
+PAYMENT_RECONCILE_INTERVAL = float(getenv("PAYMENT_RECONCILE_INTERVAL", "300"))
+# Вік платежу, після якого його статус запитується в LiqPay, хвилини
+PAYMENT_RECONCILE_STALE_MINUTES = int(getenv("PAYMENT_RECONCILE_STALE_MINUTES", "15"))
+# Вік, після якого платіж без фінального статусу (покинута оплата) стає expired
+# і більше не запитується, хвилини
+PAYMENT_RECONCILE_MAX_AGE_MINUTES = int(getenv("PAYMENT_RECONCILE_MAX_AGE_MINUTES", "1440"))
+PAYMENT_RECONCILE_BATCH_SIZE = int(getenv("PAYMENT_RECONCILE_BATCH_SIZE", "100"))
+# Скільки запитів статусу до LiqPay виконується одночасно
+PAYMENT_RECONCILE_CONCURRENCY = int(getenv("PAYMENT_RECONCILE_CONCURRENCY", "5"))
+
 # ============ TELEGRAM PAYMENTS CONFIGURATION ============
 TELEGRAM_PAYMENTS_ENABLED = getenv("TELEGRAM_PAYMENTS_ENABLED", "false").lower() == "true"
 TELEGRAM_PAYMENT_PROVIDER = getenv("TELEGRAM_PAYMENT_PROVIDER", "stripe")
@@ -46,6 +105,66 @@ TELEGRAM_PAYMENT_PROVIDER = getenv("TELEGRAM_PAYMENT_PROVIDER", "stripe")
 PRIMARY_PAYMENT_METHOD = getenv("PRIMARY_PAYMENT_METHOD", "liqpay")
 SHOW_PAYMENT_METHOD_CHOICE = getenv("SHOW_PAYMENT_METHOD_CHOICE", "true").lower() == "true"
 
+# ============ CATALOG SNAPSHOT ============
+# Читання каталогу обслуговується зі знімка в пам'яті процесу
+CATALOG_SNAPSHOT_ENABLED = getenv("CATALOG_SNAPSHOT_ENABLED", "true").lower() == "true"
+# Максимальний вік знімка в секундах (захист від змін поза процесом, 0 - без обмеження)
+CATALOG_SNAPSHOT_TTL = int(getenv("CATALOG_SNAPSHOT_TTL", "300"))
+
+# ============ TEXT-TO-SPEECH ============
+# Синтез gTTS виконується в окремому пулі потоків
+TTS_MAX_WORKERS = int(getenv("TTS_MAX_WORKERS", "4"))
+# Скільки запитів може чекати вільного потоку (решта отримує відмову)
+TTS_MAX_QUEUE = int(getenv("TTS_MAX_QUEUE", "20"))
+# Максимальний час очікування синтезу, секунди
+TTS_TIMEOUT = float(getenv("TTS_TIMEOUT", "15"))
+# Довгий текст ділиться на частини до N символів, які синтезуються паралельно
+TTS_CHUNK_CHARS = int(getenv("TTS_CHUNK_CHARS", "500"))
+# Кеш озвучених описів: каталог на диску та його максимальний розмір, байти
+TTS_CACHE_DIR = getenv("TTS_CACHE_DIR", "cache/tts")
+TTS_CACHE_MAX_BYTES = int(getenv("TTS_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+# Кількість одночасних фонових озвучувань після змін каталогу
+TTS_PRERENDER_CONCURRENCY = int(getenv("TTS_PRERENDER_CONCURRENCY", "1"))
+
+# ============ IMAGE GENERATION ============
+# Скільки зображень DALL-E генерується одночасно (на весь бот)
+IMAGE_JOBS_CONCURRENCY = int(getenv("IMAGE_JOBS_CONCURRENCY", "2"))
+# Спроби при RateLimitError та експоненційна затримка між ними, секунди
+IMAGE_JOBS_MAX_ATTEMPTS = int(getenv("IMAGE_JOBS_MAX_ATTEMPTS", "5"))
+IMAGE_JOBS_BACKOFF = float(getenv("IMAGE_JOBS_BACKOFF", "2"))
+IMAGE_JOBS_BACKOFF_MAX = float(getenv("IMAGE_JOBS_BACKOFF_MAX", "60"))
+# Як часто оновлювати повідомлення про хід генерації, секунди
+IMAGE_JOBS_PROGRESS_INTERVAL = float(getenv("IMAGE_JOBS_PROGRESS_INTERVAL", "5"))
+# Одночасні запити до OpenAI (варіанти однієї задачі генеруються паралельно)
+IMAGE_JOBS_MAX_REQUESTS = int(getenv("IMAGE_JOBS_MAX_REQUESTS", "4"))
+# Скільки варіантів генерується в режимі вибору зображення
+IMAGE_JOBS_VARIANTS = int(getenv("IMAGE_JOBS_VARIANTS", "4"))
+# Каталог зображень товарів (ключ файлу - хеш вмісту)
+MEDIA_DIR = getenv("MEDIA_DIR", "media")
+# Максимальний розмір завантажуваного зображення, байти (ліміт Telegram для фото - 10 МБ)
+MEDIA_MAX_BYTES = int(getenv("MEDIA_MAX_BYTES", str(10 * 1024 * 1024)))
+# Таймаут завантаження зображення за URL, секунди
+MEDIA_DOWNLOAD_TIMEOUT = float(getenv("MEDIA_DOWNLOAD_TIMEOUT", "30"))
+# Зменшені копії зображень: максимальна сторона мініатюри та середньої копії, px
+MEDIA_THUMB_SIZE = int(getenv("MEDIA_THUMB_SIZE", "320"))
+MEDIA_MEDIUM_SIZE = int(getenv("MEDIA_MEDIUM_SIZE", "800"))
+# Формат (JPEG або WEBP) та якість копій
+MEDIA_VARIANT_FORMAT = getenv("MEDIA_VARIANT_FORMAT", "JPEG")
+MEDIA_VARIANT_QUALITY = int(getenv("MEDIA_VARIANT_QUALITY", "85"))
+# Кількість процесів для масштабування зображень
+MEDIA_PROCESS_WORKERS = int(getenv("MEDIA_PROCESS_WORKERS", "2"))
+
+# ============ FSM STORAGE ============
+# FSM storage: "postgres" (стани переживають перезапуск), "bounded" (пам'ять з TTL
+# і межею кількості, для одного процесу) або "memory" (MemoryStorage aiogram)
+FSM_STORAGE = getenv("FSM_STORAGE", "postgres").lower()
+# Затримка збереження змін FSM, зроблених поза обробкою оновлення (секунди)
+FSM_FLUSH_DELAY = float(getenv("FSM_FLUSH_DELAY", "1.0"))
+# Налаштування FSM_STORAGE=bounded: TTL неактивної сесії (секунди), межа сесій, шарди
+FSM_TTL = int(getenv("FSM_TTL", "21600"))
+FSM_MAX_ENTRIES = int(getenv("FSM_MAX_ENTRIES", "10000"))
+FSM_SHARDS = int(getenv("FSM_SHARDS", "16"))
+
 # Перевірка, чи запускаються тести
 IS_TESTING = "pytest" in sys.modules or "test" in sys.argv[0] or "conftest" in sys.argv[0]
 
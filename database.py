@@ -1,7 +1,11 @@
 import asyncpg
+import json
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from config import get_db_config
+from typing import Callable, Iterable, List, Optional, Dict, Any, Tuple
+from config import get_db_config, CATALOG_SNAPSHOT_ENABLED, CATALOG_SNAPSHOT_TTL
+from catalog_snapshot import CatalogCache, CatalogSnapshot
+from migrations import run_migrations
+from pagination import Page, build_page, parse_cursor
 from logger_config import get_logger
 
 logger = get_logger("aiogram.database")
@@ -13,6 +17,23 @@ class Database:
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
         self.config = get_db_config()
+        self.catalog = CatalogCache(enabled=CATALOG_SNAPSHOT_ENABLED, ttl=CATALOG_SNAPSHOT_TTL)
+        self._product_listeners: List[Callable[[int, Optional[Iterable[str]]], None]] = []
+    
+    def add_product_listener(self, listener: Callable[[int, Optional[Iterable[str]]], None]) -> None:
+        """Реєструє слухача змін товарів (add_product, update_product, delete_product).
+        
+        Слухач викликається як listener(product_id, fields), де fields - змінені
+        поля товару або None, якщо товар видалено.
+        """
+        self._product_listeners.append(listener)
+    
+    def _notify_product_changed(self, product_id: int, fields: Optional[Iterable[str]]) -> None:
+        for listener in self._product_listeners:
+            try:
+                listener(product_id, fields)
+            except Exception as e:
+                logger.error(f"Error in product listener for product {product_id}: {e}", exc_info=True)
     
     async def connect(self):
         """Створення пулу підключень до PostgreSQL."""
@@ -32,7 +53,7 @@ class Database:
             await self.pool.close()
     
     async def init_db(self):
-        """Ініціалізація бази даних та створення таблиць."""
+        """Ініціалізація бази даних: застосування нових міграцій схеми."""
         # Переконуємось, що є підключення до БД
         if not self.pool:
             await self.connect()
@@ -41,216 +62,72 @@ class Database:
             raise RuntimeError("Не вдалося створити пул підключень до БД")
         
         async with self.pool.acquire() as conn:
-            # Таблиця товарів
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS products (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    price NUMERIC(10, 2) NOT NULL,
-                    category TEXT NOT NULL,
-                    image_url TEXT,
-                    stock INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Таблиця замовлень
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS orders (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT NOT NULL,
-                    user_name TEXT,
-                    product_id INTEGER NOT NULL,
-                    quantity INTEGER DEFAULT 1,
-                    total_price NUMERIC(10, 2) NOT NULL,
-                    phone TEXT,
-                    email TEXT,
-                    status TEXT DEFAULT 'pending',
-                    payment_status TEXT DEFAULT 'unpaid',
-                    payment_method TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (product_id) REFERENCES products (id)
-                )
-            """)
-            
-            # Таблиця платежів
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS payments (
-                    id SERIAL PRIMARY KEY,
-                    order_id INTEGER NOT NULL UNIQUE,
-                    user_id BIGINT NOT NULL,
-                    amount NUMERIC(10, 2) NOT NULL,
-                    currency TEXT DEFAULT 'UAH',
-                    payment_method TEXT NOT NULL,
-                    status TEXT DEFAULT 'pending',
-                    liqpay_payment_id TEXT,
-                    liqpay_order_id TEXT,
-                    telegram_payment_id TEXT,
-                    telegram_provider_payment_id TEXT,
-                    error_message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Таблиця логів редагування замовлень
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS order_edit_logs (
-                    id SERIAL PRIMARY KEY,
-                    order_id INTEGER NOT NULL,
-                    admin_id BIGINT NOT NULL,
-                    field_name TEXT NOT NULL,
-                    old_value TEXT,
-                    new_value TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Таблиця логів редагування товарів
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS product_edit_logs (
-                    id SERIAL PRIMARY KEY,
-                    product_id INTEGER NOT NULL,
-                    admin_id BIGINT NOT NULL,
-                    field_name TEXT NOT NULL,
-                    old_value TEXT,
-                    new_value TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Таблиця користувачів
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id BIGINT PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    last_name TEXT,
-                    phone TEXT,
-                    email TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Міграція: Додаємо колонки телефону та email якщо вони не існують
-            try:
-                # Перевіряємо чи існує колона phone в таблиці orders
-                has_phone = await conn.fetchval(
-                    """SELECT EXISTS(
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name='orders' AND column_name='phone'
-                    )"""
-                )
-                
-                if not has_phone:
-                    await conn.execute("ALTER TABLE orders ADD COLUMN phone TEXT")
-                    logger.info("Added phone column to orders table")
-                
-                # Перевіряємо чи існує колона email в таблиці orders
-                has_email = await conn.fetchval(
-                    """SELECT EXISTS(
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name='orders' AND column_name='email'
-                    )"""
-                )
-                
-                if not has_email:
-                    await conn.execute("ALTER TABLE orders ADD COLUMN email TEXT")
-                    logger.info("Added email column to orders table")
-                
-                # Перевіряємо чи існує колона payment_status в таблиці orders
-                has_payment_status = await conn.fetchval(
-                    """SELECT EXISTS(
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name='orders' AND column_name='payment_status'
-                    )"""
-                )
-                
-                if not has_payment_status:
-                    await conn.execute("ALTER TABLE orders ADD COLUMN payment_status TEXT DEFAULT 'unpaid'")
-                    logger.info("Added payment_status column to orders table")
-                
-                # Перевіряємо чи існує колона payment_method в таблиці orders
-                has_payment_method = await conn.fetchval(
-                    """SELECT EXISTS(
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name='orders' AND column_name='payment_method'
-                    )"""
-                )
-                
-                if not has_payment_method:
-                    await conn.execute("ALTER TABLE orders ADD COLUMN payment_method TEXT")
-                    logger.info("Added payment_method column to orders table")
-                
-                # Перевіряємо колонки в таблиці users
-                has_user_phone = await conn.fetchval(
-                    """SELECT EXISTS(
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name='users' AND column_name='phone'
-                    )"""
-                )
-                
-                if not has_user_phone:
-                    await conn.execute("ALTER TABLE users ADD COLUMN phone TEXT")
-                    logger.info("Added phone column to users table")
-                
-                has_user_email = await conn.fetchval(
-                    """SELECT EXISTS(
-                        SELECT 1 FROM information_schema.columns 
-                        WHERE table_name='users' AND column_name='email'
-                    )"""
-                )
-                
-                if not has_user_email:
-                    await conn.execute("ALTER TABLE users ADD COLUMN email TEXT")
-                    logger.info("Added email column to users table")
-            
-            except Exception as e:
-                logger.warning(f"Migration error (may be normal for new DB): {e}")
-            
-            # Додаємо початкові товари, якщо база порожня
-            await self._add_initial_products(conn)
-    
-    async def _add_initial_products(self, conn: asyncpg.Connection):
-        """Додає початкові товари в базу даних."""
-        count = await conn.fetchval("SELECT COUNT(*) FROM products")
-        
-        if count == 0:
-            products = [
-                ("Зимова куртка 'Арктика'", "Тепла зимова куртка з хутряним коміром", 3500.00, "Куртки", None, 15),
-                ("Пальто класичне", "Елегантне вовняне пальто для офісу", 4200.00, "Пальта", None, 10),
-                ("Плащ 'Осінній'", "Водонепроникний плащ для дощової погоди", 2800.00, "Плащі", None, 20),
-                ("Вітрівка спортивна", "Легка вітрівка для активного відпочинку", 1500.00, "Вітрівки", None, 25),
-                ("Пуховик 'Норд'", "Ультралегкий пуховик з мембраною", 5500.00, "Пуховики", None, 12),
-                ("Куртка шкіряна", "Стильна шкіряна куртка", 6000.00, "Куртки", None, 8),
-                ("Пальто вовняне довге", "Довге пальто з вовни для холодної погоди", 4800.00, "Пальта", None, 7),
-                ("Плащ тренч", "Класичний тренч бежевого кольору", 3200.00, "Плащі", None, 14),
-            ]
-            
-            await conn.executemany(
-                "INSERT INTO products (name, description, price, category, image_url, stock) VALUES ($1, $2, $3, $4, $5, $6)",
-                products
-            )
+            await run_migrations(conn)
+        
+        self.catalog.invalidate()
+    
+    async def get_catalog_snapshot(self) -> CatalogSnapshot:
+        """Отримати поточний знімок каталогу (завантажується з БД лише за потреби)."""
+        return await self.catalog.get(self._fetch_catalog_rows)
+    
+    async def _fetch_catalog_rows(self) -> List[asyncpg.Record]:
+        """Завантажити всі товари для знімка каталогу."""
+        async with self.pool.acquire() as conn:
+            return await conn.fetch("SELECT * FROM products ORDER BY id")
     
     async def get_all_products(self) -> List[Dict]:
         """Отримати всі товари."""
+        if self.catalog.enabled:
+            return (await self.get_catalog_snapshot()).get_all_products()
+        
         async with self.pool.acquire() as conn:
             rows = await conn.fetch("SELECT * FROM products WHERE stock > 0 ORDER BY id")
             return [dict(row) for row in rows]
     
+    async def get_products_page(self, cursor: Optional[str] = None, limit: int = 15) -> Page:
+        """Отримати сторінку товарів у наявності (впорядковано за ID).
+        
+        Args:
+            cursor: Курсор з попередньої сторінки (None - перша сторінка)
+            limit: Кількість товарів на сторінці
+        """
+        position = parse_cursor(cursor)
+        key = lambda product: (None, product['id'])
+        
+        if self.catalog.enabled:
+            snapshot = await self.get_catalog_snapshot()
+            rows = snapshot.get_products_from(position.id if position else None, limit + 1,
+                                              backward=bool(position and position.backward))
+            return build_page(rows, limit, position, key)
+        
+        if position is None:
+            condition, order, args = "", "ASC", [limit + 1]
+        elif position.backward:
+            condition, order, args = "AND id < $2", "DESC", [limit + 1, position.id]
+        else:
+            condition, order, args = "AND id > $2", "ASC", [limit + 1, position.id]
+        
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"SELECT * FROM products WHERE stock > 0 {condition} ORDER BY id {order} LIMIT $1",
+                *args
+            )
+        return build_page(rows, limit, position, key)
+    
     async def get_product_by_id(self, product_id: int) -> Optional[Dict]:
         """Отримати товар за ID."""
+        if self.catalog.enabled:
+            return (await self.get_catalog_snapshot()).get_product_by_id(product_id)
+        
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow("SELECT * FROM products WHERE id = $1", product_id)
             return dict(row) if row else None
     
     async def get_products_by_category(self, category: str) -> List[Dict]:
         """Отримати товари за категорією."""
+        if self.catalog.enabled:
+            return (await self.get_catalog_snapshot()).get_products_by_category(category)
+        
         async with self.pool.acquire() as conn:
             rows = await conn.fetch(
                 "SELECT * FROM products WHERE category = $1 AND stock > 0 ORDER BY id", 
@@ -275,29 +152,32 @@ class Database:
             ID замовлення або None якщо помилка
         """
         async with self.pool.acquire() as conn:
-            # Перевіряємо наявність товару
-            product = await self.get_product_by_id(product_id)
-            if not product or product['stock'] < quantity:
-                return None
-            
-            total_price = float(product['price']) * quantity
-            
-            # Використовуємо транзакцію для атомарності операцій
-            async with conn.transaction():
-                # Створюємо замовлення з контактною інформацією
-                order_id = await conn.fetchval(
-                    """INSERT INTO orders (user_id, user_name, product_id, quantity, total_price, phone, email, status) 
-                       VALUES ($1, $2, $3, $4, $5, $6, $7, 'pending') RETURNING id""",
-                    user_id, user_name, product_id, quantity, total_price, phone, email
-                )
-                
-                # Зменшуємо кількість товару на складі
-                await conn.execute(
-                    "UPDATE products SET stock = stock - $1 WHERE id = $2",
-                    quantity, product_id
-                )
-                
-                return order_id
+            # Один атомарний запит: списуємо залишок лише якщо його достатньо
+            # і в тому ж запиті створюємо замовлення за поточною ціною товару.
+            # Конкуруючі замовлення чекають на блокування рядка товару та
+            # перевіряють умову stock >= quantity вже після попереднього списання.
+            row = await conn.fetchrow(
+                """WITH reserved AS (
+                       UPDATE products SET stock = stock - $4, row_version = row_version + 1
+                       WHERE id = $3 AND stock >= $4
+                       RETURNING *
+                   ), new_order AS (
+                       INSERT INTO orders (user_id, user_name, product_id, quantity, total_price, phone, email, status)
+                       SELECT $1, $2, id, $4, price * $4, $5, $6, 'pending' FROM reserved
+                       RETURNING id
+                   )
+                   SELECT new_order.id AS order_id, reserved.*
+                   FROM new_order, reserved""",
+                user_id, user_name, product_id, quantity, phone, email
+            )
+        
+        if not row:
+            return None
+        
+        product = dict(row)
+        order_id = product.pop('order_id')
+        self.catalog.apply_product(product)
+        return order_id
     
     async def get_user_orders(self, user_id: int) -> List[Dict]:
         """Отримати всі замовлення користувача."""
@@ -312,6 +192,65 @@ class Database:
             )
             return [dict(row) for row in rows]
     
+    async def get_user_orders_page(self, user_id: int, cursor: Optional[str] = None,
+                                   limit: int = 10) -> Page:
+        """Отримати сторінку замовлень користувача (новіші першими)."""
+        return await self._fetch_keyset_page(
+            """SELECT o.*, p.name as product_name
+               FROM orders o
+               JOIN products p ON o.product_id = p.id""",
+            ["o.user_id = $1"], [user_id], ("o.created_at", "o.id"), cursor, limit
+        )
+    
+    async def get_orders_by_status(self, status: str, cursor: Optional[str] = None,
+                                   limit: int = 10) -> Page:
+        """Отримати сторінку замовлень зі статусом з назвою товару та даними користувача."""
+        return await self._fetch_keyset_page(
+            """SELECT o.*, p.name as product_name, u.username, u.first_name
+               FROM orders o
+               JOIN products p ON o.product_id = p.id
+               LEFT JOIN users u ON o.user_id = u.id""",
+            ["o.status = $1"], [status], ("o.created_at", "o.id"), cursor, limit
+        )
+    
+    async def _fetch_keyset_page(self, select: str, conditions: List[str], args: List[Any],
+                                 keys: Tuple[str, str], cursor: Optional[str], limit: int) -> Page:
+        """Вибрати сторінку списку "новіші першими" за ключем (created_at, id).
+        
+        Замість OFFSET сторінка починається з умови на ключ курсора, тому
+        вартість запиту однакова для першої і для тисячної сторінки.
+        
+        Args:
+            select: SELECT ... FROM ... без WHERE та ORDER BY
+            conditions: Умови фільтра, що використовують параметри args
+            args: Значення параметрів $1..$n для conditions
+            keys: Назви колонок (created_at, id) у запиті
+            cursor: Курсор з попередньої сторінки (None - перша сторінка)
+            limit: Кількість рядків на сторінці
+        """
+        position = parse_cursor(cursor)
+        created_col, id_col = keys
+        conditions, args = list(conditions), list(args)
+        order = "DESC"
+        
+        if position is not None:
+            # Назад - це "новіші за курсор": вибираємо за зростанням і розвертаємо
+            operator, order = (">", "ASC") if position.backward else ("<", "DESC")
+            conditions.append(
+                f"({created_col}, {id_col}) {operator} (${len(args) + 1}, ${len(args) + 2})"
+            )
+            args += [position.created_at, position.id]
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = (
+            f"{select} {where} "
+            f"ORDER BY {created_col} {order}, {id_col} {order} LIMIT ${len(args) + 1}"
+        )
+        
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, *args, limit + 1)
+        return build_page(rows, limit, position, lambda row: (row['created_at'], row['id']))
+    
     async def update_order_status(self, order_id: int, status: str) -> bool:
         """Оновити статус замовлення."""
         async with self.pool.acquire() as conn:
@@ -445,12 +384,41 @@ class Database:
             row = await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
             return dict(row) if row else None
     
+    async def get_users_page(self, cursor: Optional[str] = None, limit: int = 20) -> Page:
+        """Отримати сторінку користувачів (нові реєстрації першими)."""
+        return await self._fetch_keyset_page(
+            "SELECT * FROM users", [], [], ("created_at", "id"), cursor, limit
+        )
+    
     async def get_categories(self) -> List[str]:
         """Отримати список всіх категорій."""
+        if self.catalog.enabled:
+            return (await self.get_catalog_snapshot()).get_categories()
+        
         async with self.pool.acquire() as conn:
             rows = await conn.fetch("SELECT DISTINCT category FROM products WHERE stock > 0 ORDER BY category")
             return [row['category'] for row in rows]
-    
+
+    async def get_category_counts(self) -> List[Tuple[str, int]]:
+        """Отримати категорії з кількістю товарів в наявності одним запитом.
+
+        Returns:
+            Список кортежів (категорія, кількість товарів), відсортований
+            за кількістю товарів (спадаючи), а потім за назвою категорії
+        """
+        if self.catalog.enabled:
+            return (await self.get_catalog_snapshot()).get_category_counts()
+
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT category, COUNT(*) AS products_count
+                   FROM products
+                   WHERE stock > 0
+                   GROUP BY category
+                   ORDER BY products_count DESC, category"""
+            )
+            return [(row['category'], row['products_count']) for row in rows]
+
     async def add_product(
         self, 
         name: str, 
@@ -458,7 +426,9 @@ class Database:
         price: float, 
         category: str, 
         stock: int,
-        image_url: Optional[str] = None
+        image_url: Optional[str] = None,
+        image_key: Optional[str] = None,
+        image_file_id: Optional[str] = None
     ) -> Optional[int]:
         """Додає новий товар в каталог.
         
@@ -469,19 +439,26 @@ class Database:
             category: Категорія товару
             stock: Кількість на складі
             image_url: URL зображення товару (опціонально)
+            image_key: Ключ зображення в локальному сховищі (media_store)
+            image_file_id: file_id зображення в Telegram
         
         Returns:
             ID нового товару або None при помилці
         """
         try:
             query = """
-                INSERT INTO products (name, description, price, category, stock, image_url)
-                VALUES ($1, $2, $3, $4, $5, $6)
-                RETURNING id
+                INSERT INTO products (name, description, price, category, stock,
+                                      image_url, image_key, image_file_id)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                RETURNING *
             """
             async with self.pool.acquire() as conn:
-                product_id = await conn.fetchval(query, name, description, price, category, stock, image_url)
+                product = await conn.fetchrow(query, name, description, price, category, stock,
+                                              image_url, image_key, image_file_id)
             
+            product_id = product['id']
+            self.catalog.apply_product(product)
+            self._notify_product_changed(product_id, tuple(product.keys()))
             logger.info(f"Product added: {name} (ID: {product_id})")
             return product_id
         except Exception as e:
@@ -493,17 +470,20 @@ class Database:
         product_id: int, 
         **kwargs: Any
     ) -> bool:
-        """Оновлює товар (name, description, price, category, stock, image_url).
+        """Оновлює товар (name, description, price, category, stock, image_url,
+        image_key, image_file_id).
         
         Args:
             product_id: ID товару для оновлення
-            **kwargs: Поля для оновлення (name, description, price, category, stock, image_url)
+            **kwargs: Поля для оновлення (name, description, price, category, stock, image_url,
+                image_key, image_file_id)
         
         Returns:
             True якщо успішно оновлено, False інакше
         """
         try:
-            allowed_fields = {'name', 'description', 'price', 'category', 'stock', 'image_url'}
+            allowed_fields = {'name', 'description', 'price', 'category', 'stock',
+                              'image_url', 'image_key', 'image_file_id'}
             update_fields = {k: v for k, v in kwargs.items() if k in allowed_fields}
             
             if not update_fields:
@@ -511,12 +491,15 @@ class Database:
                 return False
             
             set_clause = ", ".join(f"{k} = ${i+1}" for i, k in enumerate(update_fields.keys()))
-            query = f"UPDATE products SET {set_clause} WHERE id = ${len(update_fields)+1}"
+            query = (f"UPDATE products SET {set_clause}, row_version = row_version + 1 "
+                     f"WHERE id = ${len(update_fields)+1} RETURNING *")
             
             async with self.pool.acquire() as conn:
-                result = await conn.execute(query, *update_fields.values(), product_id)
+                product = await conn.fetchrow(query, *update_fields.values(), product_id)
             
-            if result == "UPDATE 1":
+            if product:
+                self.catalog.apply_product(product)
+                self._notify_product_changed(product_id, tuple(update_fields))
                 logger.info(f"Product {product_id} updated: {update_fields}")
                 return True
             return False
@@ -545,6 +528,8 @@ class Database:
                 result = await conn.execute("DELETE FROM products WHERE id = $1", product_id)
             
             if result == "DELETE 1":
+                self.catalog.remove_product(product_id)
+                self._notify_product_changed(product_id, None)
                 logger.info(f"Product deleted: {product['name']} (ID: {product_id})")
                 return True
             return False
@@ -552,6 +537,46 @@ class Database:
             logger.exception(f"Error deleting product: {e}")
             return False
     
+    async def get_image_prompt(self, prompt_hash: str) -> Optional[Dict]:
+        """Отримати збережене зображення для промпту та відмітити його використання.
+        
+        Args:
+            prompt_hash: Ключ (промпт, розмір, стиль) з image_prompt_cache.prompt_key
+        
+        Returns:
+            Запис кешу або None, якщо такого промпту ще не генерували
+        """
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """UPDATE image_prompt_cache
+                   SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP
+                   WHERE prompt_hash = $1
+                   RETURNING *""",
+                prompt_hash
+            )
+            return dict(row) if row else None
+    
+    async def save_image_prompt(self, prompt_hash: str, prompt: str, size: str, style: str,
+                                image_key: str, generation_seconds: float) -> None:
+        """Зберегти результат генерації (нова варіація замінює попередню)."""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """INSERT INTO image_prompt_cache
+                       (prompt_hash, prompt, size, style, image_key, generation_seconds)
+                   VALUES ($1, $2, $3, $4, $5, $6)
+                   ON CONFLICT (prompt_hash) DO UPDATE
+                   SET image_key = EXCLUDED.image_key,
+                       generation_seconds = EXCLUDED.generation_seconds,
+                       created_at = CURRENT_TIMESTAMP,
+                       last_used_at = CURRENT_TIMESTAMP""",
+                prompt_hash, prompt, size, style, image_key, generation_seconds
+            )
+    
+    async def delete_image_prompt(self, prompt_hash: str) -> None:
+        """Видалити запис кешу (наприклад, якщо файл зображення зник)."""
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM image_prompt_cache WHERE prompt_hash = $1", prompt_hash)
+    
     # ═══════════════════════════════════════════════════════════════════════════
     # CLEANUP METHODS FOR TESTING (Rails-style)
     # ═══════════════════════════════════════════════════════════════════════════
@@ -571,6 +596,15 @@ class Database:
                     # Видаляємо користувачів
                     await conn.execute("DELETE FROM users")
                     
+                    # Видаляємо стани FSM
+                    await conn.execute("DELETE FROM fsm_states")
+                    
+                    # Видаляємо кеш згенерованих зображень
+                    await conn.execute("DELETE FROM image_prompt_cache")
+                    
+                    # Видаляємо вхідні події платежів
+                    await conn.execute("DELETE FROM payment_events")
+                    
                     # Видаляємо тестові товари, але зберігаємо початкові (id 1-8)
                     await conn.execute("DELETE FROM products WHERE id > 8")
                     
@@ -578,6 +612,7 @@ class Database:
                     await conn.execute("ALTER SEQUENCE orders_id_seq RESTART WITH 1")
                     await conn.execute("ALTER SEQUENCE products_id_seq RESTART WITH 9")
             
+            self.catalog.invalidate()
             logger.debug("Test tables truncated successfully")
         except Exception as e:
             logger.error(f"Error truncating test tables: {e}", exc_info=True)
@@ -600,6 +635,7 @@ class Database:
                 else:
                     await conn.execute(f"DELETE FROM {table_name}")
             
+            self.catalog.invalidate()
             logger.debug(f"Table {table_name} cleared" + (f" with condition: {condition}" if condition else ""))
         except Exception as e:
             logger.error(f"Error clearing {table_name}: {e}", exc_info=True)
@@ -626,7 +662,8 @@ class Database:
     # ═════════════════════════════════════════════════════════════════════════════
     
     async def create_payment_record(self, order_id: int, user_id: int, amount: float,
-                                   payment_method: str, currency: str = "UAH") -> Optional[int]:
+                                   payment_method: str, currency: str = "UAH",
+                                   status: str = "pending") -> Optional[int]:
         """
         Create a payment record in the database.
         
@@ -636,6 +673,7 @@ class Database:
             amount: Payment amount
             payment_method: Payment method ('liqpay' or 'telegram')
             currency: Currency code (default 'UAH')
+            status: Initial status (default 'pending')
         
         Returns:
             Payment ID or None if error
@@ -644,8 +682,8 @@ class Database:
             async with self.pool.acquire() as conn:
                 payment_id = await conn.fetchval(
                     """INSERT INTO payments (order_id, user_id, amount, currency, payment_method, status)
-                       VALUES ($1, $2, $3, $4, $5, 'pending') RETURNING id""",
-                    order_id, user_id, amount, currency, payment_method
+                       VALUES ($1, $2, $3, $4, $5, $6) RETURNING id""",
+                    order_id, user_id, amount, currency, payment_method, status
                 )
                 return payment_id
         except Exception as e:
@@ -680,6 +718,125 @@ class Database:
             logger.error(f"Error updating payment status: {e}", exc_info=True)
             return False
     
+    async def settle_payment(self, order_id: int, status: str, liqpay_payment_id: Optional[str],
+                             blocking_statuses: List[str],
+                             order_payment_status: Optional[str] = None) -> Optional[Dict]:
+        """
+        Apply a payment callback to the payment and its order in one statement.
+        
+        The payment moves to the new status unless it already has one of
+        blocking_statuses; only then is the order's payment status updated.
+        Both updates are one data-modifying CTE, i.e. one round trip and one
+        transaction, so payments and orders cannot diverge on a crash.
+        
+        Args:
+            order_id: Order ID
+            status: New payment status
+            liqpay_payment_id: LiqPay transaction ID (kept if None)
+            blocking_statuses: Statuses from which the payment must not change
+            order_payment_status: New orders.payment_status ('paid', 'failed') or None to keep it
+        
+        Returns:
+            Dict with payment_id, order_id and the buyer's user_id, or None if the
+            payment was not changed (no payment record or a later status)
+        """
+        settled = await self.settle_payments(
+            [(order_id, status, liqpay_payment_id, blocking_statuses, order_payment_status)]
+        )
+        return settled[0] if settled else None
+    
+    async def settle_payments(self, settlements: List[Tuple[int, str, Optional[str], List[str], Optional[str]]]
+                              ) -> List[Dict]:
+        """
+        Apply several payment statuses in one UPDATE ... FROM (VALUES ...) statement.
+        
+        Args:
+            settlements: (order_id, status, liqpay_payment_id, blocking_statuses,
+                order_payment_status) tuples, as in settle_payment
+        
+        Returns:
+            payment_id, order_id and user_id of every payment that changed
+        """
+        if not settlements:
+            return []
+        values = ", ".join(
+            f"(${i * 5 + 1}::integer, ${i * 5 + 2}::text, ${i * 5 + 3}::text, "
+            f"${i * 5 + 4}::text[], ${i * 5 + 5}::text)"
+            for i in range(len(settlements))
+        )
+        args = [value for settlement in settlements for value in settlement]
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""WITH payment AS (
+                        UPDATE payments p
+                        SET status = v.status, liqpay_payment_id = COALESCE(v.liqpay_payment_id, p.liqpay_payment_id),
+                            updated_at = CURRENT_TIMESTAMP
+                        FROM (VALUES {values}) AS v(order_id, status, liqpay_payment_id,
+                                                    blocking_statuses, order_payment_status)
+                        WHERE p.order_id = v.order_id AND p.status <> ALL(v.blocking_statuses)
+                        RETURNING p.id, p.order_id, v.order_payment_status
+                    ), paid_order AS (
+                        UPDATE orders o
+                        SET payment_status = payment.order_payment_status, payment_method = 'liqpay'
+                        FROM payment
+                        WHERE o.id = payment.order_id AND payment.order_payment_status IS NOT NULL
+                    )
+                    SELECT payment.id AS payment_id, payment.order_id, o.user_id
+                    FROM payment JOIN orders o ON o.id = payment.order_id""",
+                *args
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_stale_payments(self, older_than_minutes: int, final_statuses: List[str],
+                                 after_id: int = 0, limit: int = 100) -> List[Dict]:
+        """
+        Get LiqPay payments that have not reached a final status in time.
+        
+        Pages are selected by id (keyset), so every batch costs the same.
+        
+        Args:
+            older_than_minutes: Minimum payment age
+            final_statuses: Statuses that need no reconciliation
+            after_id: Last payment ID of the previous batch
+            limit: Batch size
+        
+        Returns:
+            Payments (id, order_id, status) ordered by id
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT id, order_id, status FROM payments
+                   WHERE id > $1
+                     AND payment_method = 'liqpay'
+                     AND status <> ALL($2::text[])
+                     AND created_at < CURRENT_TIMESTAMP - make_interval(mins => $3)
+                   ORDER BY id
+                   LIMIT $4""",
+                after_id, final_statuses, older_than_minutes, limit
+            )
+            return [dict(row) for row in rows]
+    
+    async def expire_stale_payments(self, older_than_minutes: int, final_statuses: List[str]) -> int:
+        """
+        Mark LiqPay payments that never reached a final status as expired.
+        
+        Args:
+            older_than_minutes: Payment age after which it is given up on
+            final_statuses: Statuses that are left as they are
+        
+        Returns:
+            Number of expired payments
+        """
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                """UPDATE payments SET status = 'expired', updated_at = CURRENT_TIMESTAMP
+                   WHERE payment_method = 'liqpay'
+                     AND status <> ALL($1::text[])
+                     AND created_at < CURRENT_TIMESTAMP - make_interval(mins => $2)""",
+                final_statuses, older_than_minutes
+            )
+            return int(result.split()[-1])
+    
     async def get_payment_by_order(self, order_id: int) -> Optional[Dict]:
         """
         Get payment record by order ID.
@@ -747,6 +904,94 @@ class Database:
         except Exception as e:
             logger.error(f"Error updating order payment info: {e}", exc_info=True)
             return False
+    
+    async def add_payment_event(self, payload: Dict[str, Any], provider: str = "liqpay") -> Optional[int]:
+        """
+        Store a verified payment callback in the payment_events inbox.
+        
+        A repeated delivery of the same (payment_id, status) is ignored by the
+        unique constraint. Database errors are raised so the webhook can ask
+        the provider to retry.
+        
+        Args:
+            payload: Decoded callback data
+            provider: Payment provider name
+        
+        Returns:
+            Event ID or None if this event was already received
+        """
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(
+                """INSERT INTO payment_events (provider, payload)
+                   VALUES ($1, $2::jsonb)
+                   ON CONFLICT (liqpay_payment_id, status) DO NOTHING
+                   RETURNING id""",
+                provider, json.dumps(payload, ensure_ascii=False)
+            )
+    
+    async def claim_payment_events(self, limit: int, lease_seconds: int,
+                                   max_attempts: int) -> List[Dict]:
+        """
+        Reserve a batch of unprocessed payment events for this worker.
+        
+        Rows locked by a concurrent claim are skipped (FOR UPDATE SKIP LOCKED),
+        so several workers never get the same event. A claimed event is hidden
+        for lease_seconds; if the worker dies before marking it processed, the
+        event becomes available again after the lease expires.
+        
+        Args:
+            limit: Maximum number of events to claim
+            lease_seconds: How long the claim is valid
+            max_attempts: Events with this many attempts are no longer claimed
+        
+        Returns:
+            Claimed events (id, payload as dict, attempts) in arrival order
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """WITH claimed AS (
+                       SELECT id FROM payment_events
+                       WHERE processed_at IS NULL
+                         AND attempts < $3
+                         AND (locked_until IS NULL OR locked_until < CURRENT_TIMESTAMP)
+                       ORDER BY id
+                       LIMIT $1
+                       FOR UPDATE SKIP LOCKED
+                   )
+                   UPDATE payment_events e
+                   SET attempts = e.attempts + 1,
+                       locked_until = CURRENT_TIMESTAMP + make_interval(secs => $2)
+                   FROM claimed
+                   WHERE e.id = claimed.id
+                   RETURNING e.id, e.payload, e.attempts""",
+                limit, lease_seconds, max_attempts
+            )
+        events = [
+            {'id': row['id'], 'payload': json.loads(row['payload']), 'attempts': row['attempts']}
+            for row in rows
+        ]
+        events.sort(key=lambda event: event['id'])
+        return events
+    
+    async def complete_payment_events(self, event_ids: List[int]) -> None:
+        """Mark payment events as processed."""
+        if not event_ids:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """UPDATE payment_events
+                   SET processed_at = CURRENT_TIMESTAMP, locked_until = NULL, last_error = NULL
+                   WHERE id = ANY($1::bigint[])""",
+                event_ids
+            )
+    
+    async def fail_payment_event(self, event_id: int, error: str) -> None:
+        """Record a failed attempt; the event is retried once its lease expires."""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE payment_events SET last_error = $2 WHERE id = $1",
+                event_id, error
+            )
 
 
 # Глобальний екземпляр бази даних
@@ -0,0 +1,307 @@
+"""FSM-сховища aiogram: PostgreSQL з локальним кешем і обмежене сховище в пам'яті.
+
+Стани оформлення замовлення, оплати та редагування в адмінці переживають
+перезапуск і доступні кільком процесам бота. Щоб FSM не коштувала запиту
+на кожен виклик get_data/update_data, записи накопичуються в кеші процесу
+і зберігаються одним upsert-ом наприкінці обробки оновлення
+(FSMFlushMiddleware). Записи, зроблені поза обробкою оновлення, зберігає
+відкладений flush через flush_delay секунд.
+
+Кеш живе лише до flush: наступне оновлення читає стан з БД, тому інший
+процес, що обробив попереднє оновлення користувача, не лишає застарілих даних.
+
+Для розгортання в одному процесі без БД-стану є BoundedMemoryStorage:
+як MemoryStorage, але з TTL для покинутих сесій і жорсткою межею кількості.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import FSM_STORAGE, FSM_FLUSH_DELAY, FSM_TTL, FSM_MAX_ENTRIES, FSM_SHARDS
+from logger_config import get_logger
+
+logger = get_logger("aiogram.database")
+
+
+def _json_default(value: Any) -> Any:
+    """Серіалізує значення з рядків БД (ціни, дати), які не підтримує json."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@dataclass
+class _Entry:
+    """Стан ключа в кеші процесу."""
+
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    dirty: bool = False
+
+
+class PostgresStorage(BaseStorage):
+    """Зберігає стани FSM у таблиці fsm_states через пул підключень Database."""
+
+    def __init__(self, database, key_builder: Optional[KeyBuilder] = None,
+                 flush_delay: float = FSM_FLUSH_DELAY):
+        """
+        Args:
+            database: Екземпляр Database (пул береться з нього при зверненні)
+            key_builder: Побудова рядкового ключа з StorageKey
+            flush_delay: Затримка відкладеного збереження, секунди
+        """
+        self.database = database
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.flush_delay = flush_delay
+        self.reads = 0
+        self.writes = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def _load(self, key: StorageKey) -> _Entry:
+        """Повертає запис ключа з кешу, за потреби читаючи його з БД."""
+        storage_key = self.key_builder.build(key)
+        entry = self._entries.get(storage_key)
+        if entry is not None:
+            return entry
+
+        async with self.database.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT state, data FROM fsm_states WHERE key = $1", storage_key
+            )
+        self.reads += 1
+
+        loaded = _Entry(state=row['state'], data=json.loads(row['data'])) if row else _Entry()
+        # Паралельне звернення могло вже створити (і змінити) запис
+        return self._entries.setdefault(storage_key, loaded)
+
+    def _mark_dirty(self, key: StorageKey, entry: _Entry) -> None:
+        entry.dirty = True
+        storage_key = self.key_builder.build(key)
+        if storage_key not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[storage_key] = loop.call_later(
+                self.flush_delay, self._spawn_flush, storage_key
+            )
+
+    def _spawn_flush(self, storage_key: str) -> None:
+        self._timers.pop(storage_key, None)
+        task = asyncio.ensure_future(self._flush_key(storage_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._load(key)
+        entry.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(key, entry)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._load(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        entry = await self._load(key)
+        entry.data = data.copy()
+        self._mark_dirty(key, entry)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._load(key)).data.copy()
+
+    async def flush(self, key: StorageKey) -> None:
+        """Зберігає накопичені зміни ключа одним запитом і звільняє кеш."""
+        await self._flush_key(self.key_builder.build(key))
+
+    async def _flush_key(self, storage_key: str) -> None:
+        timer = self._timers.pop(storage_key, None)
+        if timer is not None:
+            timer.cancel()
+
+        entry = self._entries.get(storage_key)
+        if entry is None:
+            return
+
+        if entry.dirty:
+            state, data = entry.state, entry.data
+            payload = json.dumps(data, default=_json_default, ensure_ascii=False)
+            entry.dirty = False
+            try:
+                async with self.database.pool.acquire() as conn:
+                    if state is None and not data:
+                        await conn.execute("DELETE FROM fsm_states WHERE key = $1", storage_key)
+                    else:
+                        await conn.execute(
+                            """INSERT INTO fsm_states (key, state, data, updated_at)
+                               VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
+                               ON CONFLICT (key) DO UPDATE
+                               SET state = EXCLUDED.state, data = EXCLUDED.data,
+                                   updated_at = EXCLUDED.updated_at""",
+                            storage_key, state, payload
+                        )
+                self.writes += 1
+            except Exception as e:
+                # Запис лишається в кеші, наступний flush повторить спробу
+                entry.dirty = True
+                logger.error(f"Error saving FSM state for {storage_key}: {e}", exc_info=True)
+                return
+
+        # Якщо під час запису ключ знову змінили, він збережеться наступним flush
+        if not entry.dirty and self._entries.get(storage_key) is entry:
+            del self._entries[storage_key]
+
+    async def close(self) -> None:
+        """Зберігає всі незбережені зміни."""
+        for storage_key in list(self._entries):
+            await self._flush_key(storage_key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+@dataclass
+class _Session:
+    """Сесія FSM у BoundedMemoryStorage."""
+
+    state: Optional[str]
+    data: Dict[str, Any]
+    touched_at: float
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """Сховище в пам'яті з TTL неактивних сесій і межею кількості записів.
+
+    Ключі розподілені по шардах; кожен шард - OrderedDict у порядку останнього
+    звернення, тому найстаріші сесії завжди на початку. Прострочені сесії
+    видаляються при зверненні та під час періодичного прибирання (не частіше
+    ніж раз на sweep_interval, без фонових задач). Якщо шард переповнений,
+    видаляється найдавніше використана сесія (LRU). Порожні сесії (після
+    state.clear()) не зберігаються.
+    """
+
+    def __init__(self, ttl: float = FSM_TTL, max_entries: int = FSM_MAX_ENTRIES,
+                 shards: int = FSM_SHARDS, sweep_interval: float = 60,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Час неактивності, після якого сесія видаляється, секунди (0 - без TTL)
+            max_entries: Максимальна кількість сесій (ділиться між шардами)
+            shards: Кількість шардів
+            sweep_interval: Мінімальний інтервал повного прибирання, секунди
+            clock: Джерело часу (для тестів)
+        """
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.evicted_expired = 0
+        self.evicted_lru = 0
+        self._clock = clock
+        self._shards: List[OrderedDict] = [OrderedDict() for _ in range(max(1, shards))]
+        self._shard_capacity = max(1, max_entries // len(self._shards))
+        self._last_sweep = clock()
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def _shard(self, key: StorageKey) -> OrderedDict:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        return bool(self.ttl) and now - session.touched_at >= self.ttl
+
+    def _evict_expired(self, shard: OrderedDict, now: float) -> None:
+        # Найстаріші сесії на початку шарду - зупиняємось на першій живій
+        while shard:
+            key, session = next(iter(shard.items()))
+            if not self._expired(session, now):
+                break
+            del shard[key]
+            self.evicted_expired += 1
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        before = self.evicted_expired
+        for shard in self._shards:
+            self._evict_expired(shard, now)
+        if self.evicted_expired > before:
+            logger.debug(f"FSM sweep: {self.evicted_expired - before} expired sessions evicted, "
+                         f"{len(self)} active")
+
+    def _get(self, key: StorageKey) -> Optional[_Session]:
+        now = self._clock()
+        self._maybe_sweep(now)
+        shard = self._shard(key)
+        session = shard.get(key)
+        if session is None:
+            return None
+        if self._expired(session, now):
+            del shard[key]
+            self.evicted_expired += 1
+            return None
+        session.touched_at = now
+        shard.move_to_end(key)
+        return session
+
+    def _put(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]) -> None:
+        shard = self._shard(key)
+        if state is None and not data:
+            shard.pop(key, None)
+            return
+
+        now = self._clock()
+        shard[key] = _Session(state=state, data=data, touched_at=now)
+        shard.move_to_end(key)
+        self._evict_expired(shard, now)
+        while len(shard) > self._shard_capacity:
+            shard.popitem(last=False)
+            self.evicted_lru += 1
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        session = self._get(key)
+        data = session.data if session else {}
+        self._put(key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        session = self._get(key)
+        return session.state if session else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        session = self._get(key)
+        self._put(key, session.state if session else None, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        session = self._get(key)
+        return session.data.copy() if session else {}
+
+    def stats(self) -> Dict[str, int]:
+        """Кількість активних сесій та лічильники витіснень."""
+        return {
+            "entries": len(self),
+            "evicted_expired": self.evicted_expired,
+            "evicted_lru": self.evicted_lru,
+        }
+
+    async def close(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+
+
+def create_fsm_storage(database, kind: str = FSM_STORAGE) -> BaseStorage:
+    """Створює FSM-сховище за налаштуванням FSM_STORAGE ("postgres", "bounded" або "memory")."""
+    if kind == "memory":
+        return MemoryStorage()
+    if kind == "bounded":
+        return BoundedMemoryStorage()
+    if kind == "postgres":
+        return PostgresStorage(database)
+    raise ValueError(f"Unknown FSM storage: {kind}")
@@ -5,6 +5,7 @@ from .orders import router as orders_router
 from .orders import (
     admin_orders_callback,
     admin_orders_list_callback,
+    admin_orders_page_callback,
     admin_order_details,
     admin_confirm_order,
     admin_ship_order,
@@ -23,9 +24,9 @@ from .orders import (
     show_order_detail_callback
 )
 from .users import router as users_router
-from .users import admin_users_callback
+from .users import admin_users_callback, admin_users_page_callback
 from .products import menu_router, add_router, image_router, delete_router, edit_router
-from .products.menu import admin_products_callback
+from .products.menu import admin_products_callback, admin_tts_warmup_callback
 from .products.add import (
     AddProductStates,
     admin_add_product_start,
@@ -41,11 +42,13 @@ from .products.add import (
 )
 from .products.delete import (
     admin_delete_products_menu,
+    admin_delete_products_page,
     confirm_delete_product,
     execute_delete_product
 )
 from .products.edit import (
     admin_edit_products_menu,
+    admin_edit_products_page,
     show_product_detail,
     choose_product_field,
     process_product_field_input,
@@ -58,6 +61,10 @@ from .products.image import (
     admin_process_image_size,
     admin_process_image_style,
     admin_confirm_generate_image,
+    admin_regenerate_image,
+    admin_generate_image_variants,
+    admin_pick_image,
+    deliver_generated_image,
     admin_cancel_generate_image
 )
 
@@ -69,6 +76,7 @@ __all__ = [
     "orders_router",
     "admin_orders_callback",
     "admin_orders_list_callback",
+    "admin_orders_page_callback",
     "admin_order_details",
     "admin_confirm_order",
     "admin_ship_order",
@@ -87,12 +95,14 @@ __all__ = [
     "show_order_detail_callback",
     "users_router",
     "admin_users_callback",
+    "admin_users_page_callback",
     "menu_router",
     "add_router",
     "image_router",
     "delete_router",
     "edit_router",
     "admin_products_callback",
+    "admin_tts_warmup_callback",
     "AddProductStates",
     "admin_add_product_start",
     "process_product_name",
@@ -105,9 +115,11 @@ __all__ = [
     "confirm_add_product",
     "cancel_add_product",
     "admin_delete_products_menu",
+    "admin_delete_products_page",
     "confirm_delete_product",
     "execute_delete_product",
     "admin_edit_products_menu",
+    "admin_edit_products_page",
     "show_product_detail",
     "choose_product_field",
     "process_product_field_input",
@@ -118,5 +130,9 @@ __all__ = [
     "admin_process_image_size",
     "admin_process_image_style",
     "admin_confirm_generate_image",
+    "admin_regenerate_image",
+    "admin_generate_image_variants",
+    "admin_pick_image",
+    "deliver_generated_image",
     "admin_cancel_generate_image"
 ]
@@ -5,6 +5,8 @@ from aiogram.types import Message, CallbackQuery
 
 from database import db
 from filters import IsAdminFilter
+from http_client import http_client
+from image_prompt_cache import image_prompt_cache
 from keyboards import get_admin_main_keyboard
 from logger_config import get_logger
 
@@ -58,5 +60,17 @@ async def admin_stats_callback(callback: CallbackQuery) -> None:
         f"💰 Загальний дохід: {float(total_revenue):.2f} грн\n"
     )
     
+    image_cache = image_prompt_cache.stats()
+    if image_cache['hits'] or image_cache['misses']:
+        stats_text += (
+            f"🎨 Кеш зображень: {image_cache['hits']} з {image_cache['hits'] + image_cache['misses']} "
+            f"({image_cache['hit_rate']:.0%}), заощаджено {image_cache['saved_seconds']:.0f} с\n"
+        )
+    for host, counters in http_client.stats().items():
+        stats_text += (
+            f"🌐 {host}: {counters['requests']} запитів, "
+            f"з'єднань нових {counters['new_connections']} / повторних {counters['reused_connections']}\n"
+        )
+    
     await callback.message.edit_text(stats_text, reply_markup=get_admin_main_keyboard())
     await callback.answer()
@@ -46,18 +46,20 @@ async def admin_orders_callback(callback: CallbackQuery) -> None:
 async def admin_orders_list_callback(callback: CallbackQuery) -> None:
     """Перегляд списку замовлень за статусом."""
     status = callback.data.split("_")[-1]
-    
-    async with db.pool.acquire() as conn:
-        orders = await conn.fetch(
-            """SELECT o.*, p.name as product_name, u.username, u.first_name
-               FROM orders o
-               JOIN products p ON o.product_id = p.id
-               LEFT JOIN users u ON o.user_id = u.id
-               WHERE o.status = $1
-               ORDER BY o.created_at DESC
-               LIMIT 10""",
-            status
-        )
+    await _show_orders_page(callback, status)
+
+
+@router.callback_query(F.data.startswith("admin_status_page:"), IsAdminFilter())
+async def admin_orders_page_callback(callback: CallbackQuery) -> None:
+    """Перехід між сторінками списку замовлень за статусом."""
+    _, status, cursor = callback.data.split(":", 2)
+    await _show_orders_page(callback, status, cursor)
+
+
+async def _show_orders_page(callback: CallbackQuery, status: str, cursor: str = None) -> None:
+    """Показує сторінку замовлень зі статусом."""
+    page = await db.get_orders_by_status(status, cursor)
+    orders = page.items
     
     if not orders:
         await callback.answer(f"❌ Немає замовлень зі статусом '{status}'", show_alert=True)
@@ -83,7 +85,10 @@ async def admin_orders_list_callback(callback: CallbackQuery) -> None:
             f"   Дата: {order['created_at']}\n\n"
         )
     
-    await callback.message.edit_text(orders_text, reply_markup=get_orders_list_keyboard(orders))
+    await callback.message.edit_text(
+        orders_text,
+        reply_markup=get_orders_list_keyboard(orders, status=status, page=page)
+    )
     await callback.answer()
 
 
@@ -190,7 +190,9 @@ async def confirm_add_product(query: CallbackQuery, state: FSMContext) -> None:
             price=data['price'],
             category=data['category'],
             stock=data['stock'],
-            image_url=data.get('image_url')
+            image_url=data.get('image_url'),
+            image_key=data.get('image_key'),
+            image_file_id=data.get('image_file_id')
         )
         
         if product_id:
@@ -4,7 +4,7 @@ from aiogram.types import CallbackQuery
 
 from database import db
 from filters import IsAdminFilter
-from keyboards import get_admin_products_keyboard
+from keyboards import get_admin_products_keyboard, get_admin_products_picker_keyboard
 from logger_config import get_logger
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
@@ -17,10 +17,20 @@ router = Router()
 async def admin_delete_products_menu(query: CallbackQuery) -> None:
     """Показує список товарів для видалення."""
     logger.info(f"Admin {query.from_user.id} opened product deletion menu")
+    await _show_delete_products_page(query)
+
+
+@router.callback_query(F.data.startswith("admin_delete_products_page:"), IsAdminFilter())
+async def admin_delete_products_page(query: CallbackQuery) -> None:
+    """Перехід між сторінками списку товарів для видалення."""
+    await _show_delete_products_page(query, query.data.split(":", 1)[1])
+
+
+async def _show_delete_products_page(query: CallbackQuery, cursor: str = None) -> None:
+    """Показує сторінку товарів для видалення."""
+    page = await db.get_products_page(cursor)
     
-    products = await db.get_all_products()
-    
-    if not products:
+    if not page.items:
         await query.message.edit_text(
             "❌ Товарів немає.",
             reply_markup=get_admin_products_keyboard()
@@ -28,20 +38,12 @@ async def admin_delete_products_menu(query: CallbackQuery) -> None:
         await query.answer()
         return
     
-    # Показуємо товари для видалення (максимум 15 товарів у одному повідомленні)
     text = f"❌ {html.bold('Виберіть товар для видалення:')}\n\n"
     
-    builder = InlineKeyboardBuilder()
-    for product in products[:15]:
-        builder.button(
-            text=f"❌ {product['name']} ({product['stock']} шт) - {float(product['price']):.0f} грн",
-            callback_data=f"delete_product:{product['id']}"
-        )
-    
-    builder.button(text="◀️ Назад", callback_data="admin_products")
-    builder.adjust(1)
-    
-    await query.message.edit_text(text, reply_markup=builder.as_markup())
+    await query.message.edit_text(
+        text,
+        reply_markup=get_admin_products_picker_keyboard(page.items, "delete", page)
+    )
     await query.answer()
 
 
@@ -8,12 +8,12 @@ from database import db
 from filters import IsAdminFilter
 from keyboards import (
     get_admin_products_keyboard,
+    get_admin_products_picker_keyboard,
     get_product_edit_fields_keyboard,
     get_product_field_confirmation_keyboard,
     get_product_detail_keyboard
 )
 from logger_config import get_logger
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 logger = get_logger("aiogram.handlers")
 
@@ -30,10 +30,20 @@ class ProductEditState(StatesGroup):
 async def admin_edit_products_menu(query: CallbackQuery) -> None:
     """Показує список товарів для редагування."""
     logger.info(f"Admin {query.from_user.id} opened product edit menu")
+    await _show_edit_products_page(query)
+
+
+@router.callback_query(F.data.startswith("admin_edit_products_page:"), IsAdminFilter())
+async def admin_edit_products_page(query: CallbackQuery) -> None:
+    """Перехід між сторінками списку товарів для редагування."""
+    await _show_edit_products_page(query, query.data.split(":", 1)[1])
+
+
+async def _show_edit_products_page(query: CallbackQuery, cursor: str = None) -> None:
+    """Показує сторінку товарів для редагування."""
+    page = await db.get_products_page(cursor)
     
-    products = await db.get_all_products()
-    
-    if not products:
+    if not page.items:
         await query.message.edit_text(
             "❌ Товарів немає.",
             reply_markup=get_admin_products_keyboard()
@@ -43,17 +53,10 @@ async def admin_edit_products_menu(query: CallbackQuery) -> None:
     
     text = f"✏️ {html.bold('Виберіть товар для редагування:')}\n\n"
     
-    builder = InlineKeyboardBuilder()
-    for product in products[:15]:
-        builder.button(
-            text=f"📦 {product['name']} ({product['stock']} шт) - {float(product['price']):.0f} грн",
-            callback_data=f"admin_edit_product_start:{product['id']}"
-        )
-    
-    builder.button(text="◀️ Назад", callback_data="admin_products")
-    builder.adjust(1)
-    
-    await query.message.edit_text(text, reply_markup=builder.as_markup())
+    await query.message.edit_text(
+        text,
+        reply_markup=get_admin_products_picker_keyboard(page.items, "edit", page)
+    )
     await query.answer()
 
 
@@ -264,7 +267,11 @@ async def confirm_product_edit(query: CallbackQuery, state: FSMContext) -> None:
             return
         
         # Оновлюємо товар
-        success = await db.update_product(product_id, **{field_name: new_value})
+        fields = {field_name: new_value}
+        if field_name == 'image_url':
+            # Нове зображення: локальна копія та file_id старого більше не потрібні
+            fields.update(image_key=None, image_file_id=None)
+        success = await db.update_product(product_id, **fields)
         
         if success:
             # Логуємо редагування
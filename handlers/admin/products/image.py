@@ -1,15 +1,19 @@
 """Handlers для генерації зображень товарів (адміністратор)."""
+from typing import Dict, Optional
+
 from aiogram import Router, html, F
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import BufferedInputFile, CallbackQuery, InputMediaPhoto, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from config import IMAGE_JOBS_VARIANTS
 from database import db
 from filters import IsAdminFilter, IsAdminCallbackFilter
-from openai_service import generate_image
+from image_jobs import ImageJob, image_jobs
 from keyboards import get_admin_main_keyboard
 from logger_config import get_logger
+from media_store import PREVIEW_VARIANT, media_store
 from handlers.admin.products.add import AddProductStates
 
 logger = get_logger("aiogram.handlers")
@@ -24,6 +28,8 @@ class AdminGenerateImageStates(StatesGroup):
     waiting_for_size = State()        # Крок 2: розмір
     waiting_for_style = State()       # Крок 3: стиль
     waiting_for_confirmation = State() # Крок 4: підтвердження перед генерацією
+    waiting_for_generation = State()   # Задача в черзі генерації
+    waiting_for_choice = State()       # Вибір одного з варіантів
 
 
 @router.callback_query(AddProductStates.waiting_for_image_source, F.data == "admin_generate_image", IsAdminCallbackFilter())
@@ -107,91 +113,251 @@ async def admin_process_image_style(query: CallbackQuery, state: FSMContext) ->
     
     builder = InlineKeyboardBuilder()
     builder.button(text="✅ Генерувати", callback_data="admin_confirm_generate_image")
+    builder.button(text=f"🎲 Варіанти ({IMAGE_JOBS_VARIANTS})", callback_data="admin_generate_image_variants")
     builder.button(text="❌ Скасувати", callback_data="admin_cancel_generate_image")
-    builder.adjust(2)
+    builder.adjust(2, 1)
     
     await query.message.edit_text(confirmation_text, reply_markup=builder.as_markup())
     await query.answer()
 
 
+async def submit_image_generation(query: CallbackQuery, state: FSMContext, fresh: bool = False,
+                                  variants: int = 1) -> None:
+    """Віддає збережене зображення для тих самих параметрів або ставить генерацію в чергу."""
+    data = await state.get_data()
+    await state.set_state(AdminGenerateImageStates.waiting_for_generation)
+    
+    job = ImageJob(
+        admin_id=query.from_user.id,
+        prompt=data['product_prompt'],
+        size=data['product_image_size'],
+        style=data['product_image_style'],
+        state=state,
+        message=query.message,
+        deliver=deliver_generated_image,
+        variants=variants,
+        fresh=fresh,
+    )
+    
+    # Такий самий опис, розмір і стиль уже генерували - без нового платного запиту
+    image_key = await image_jobs.lookup(job)
+    if image_key:
+        await query.answer()
+        await deliver_generated_image(job, image_key)
+        logger.info(f"Admin {query.from_user.id} reused cached product image {image_key}")
+        return
+    
+    ahead = image_jobs.submit(job)
+    
+    # Показуємо статус; далі його оновлює черга
+    await query.message.edit_text(
+        f"⏳ Зображення в черзі, перед ним задач: {ahead}" if ahead else job.working_phase
+    )
+    await query.answer()
+    
+    logger.info(f"Admin {query.from_user.id} queued product image generation "
+                f"(job #{job.id}, variants={variants}, fresh={fresh})")
+
+
 @router.callback_query(AdminGenerateImageStates.waiting_for_confirmation, F.data == "admin_confirm_generate_image", IsAdminCallbackFilter())
 async def admin_confirm_generate_image(query: CallbackQuery, state: FSMContext) -> None:
-    """Генерує зображення через OpenAI."""
+    """Ставить генерацію зображення в чергу; результат прийде окремим повідомленням."""
     try:
-        data = await state.get_data()
-        
-        # Показуємо статус "обробка"
-        status_msg = await query.message.edit_text("⏳ Генерую зображення...")
-        await query.answer()
-        
-        logger.info(f"Admin {query.from_user.id} generating product image")
-        
-        # Викликаємо OpenAI API
-        image_url = await generate_image(
-            prompt=data['product_prompt'],
-            size=data['product_image_size'],
-            style=data['product_image_style']
-        )
-        
-        if not image_url:
-            await status_msg.edit_text(
-                "❌ Помилка при генерації зображення.\n"
-                "Можливі причини:\n"
-                "• Перевищено ліміт запитів (спробуйте пізніше)\n"
-                "• Опис порушує політику OpenAI\n"
-                "• Проблема з з'єднанням\n\n"
-                "Спробуйте ще раз або виберіть інший опис."
-            )
-            logger.warning(f"Image generation failed for admin {query.from_user.id}")
-            
-            # Повертаємося до вибору розміру
-            await state.set_state(AdminGenerateImageStates.waiting_for_prompt)
-            await query.message.answer("🎨 Спробуйте з новим описом або виберіть інший спосіб отримання зображення")
+        await submit_image_generation(query, state)
+    except Exception as e:
+        logger.exception(f"Error generating product image: {e}")
+        await query.message.edit_text(f"❌ Помилка: {str(e)}")
+
+
+@router.callback_query(AdminGenerateImageStates.waiting_for_confirmation, F.data == "admin_generate_image_variants", IsAdminCallbackFilter())
+@router.callback_query(AdminGenerateImageStates.waiting_for_choice, F.data == "admin_generate_image_variants", IsAdminCallbackFilter())
+async def admin_generate_image_variants(query: CallbackQuery, state: FSMContext) -> None:
+    """Генерує кілька варіантів одночасно, щоб адмін вибрав один."""
+    try:
+        await submit_image_generation(query, state, fresh=True, variants=IMAGE_JOBS_VARIANTS)
+    except Exception as e:
+        logger.exception(f"Error generating product image variants: {e}")
+        await query.message.edit_text(f"❌ Помилка: {str(e)}")
+
+
+@router.callback_query(AddProductStates.waiting_for_confirmation, F.data == "admin_regenerate_image", IsAdminCallbackFilter())
+async def admin_regenerate_image(query: CallbackQuery, state: FSMContext) -> None:
+    """Генерує нову варіацію зображення з тими самими параметрами (оминаючи кеш)."""
+    try:
+        await submit_image_generation(query, state, fresh=True)
+    except Exception as e:
+        logger.exception(f"Error regenerating product image: {e}")
+        await query.message.edit_text(f"❌ Помилка: {str(e)}")
+
+
+async def deliver_generated_image(job: ImageJob, image_key: Optional[str]) -> None:
+    """Повертає результат генерації в FSM додавання товару."""
+    state = job.state
+    if await state.get_state() != AdminGenerateImageStates.waiting_for_generation.state:
+        # Адмін уже вийшов з процесу додавання товару
+        logger.info(f"Image job #{job.id} result dropped: admin {job.admin_id} left the flow")
+        return
+    
+    if len(job.candidates) > 1:
+        previews = await read_candidate_previews(job)
+        if len(previews) > 1:
+            await deliver_image_candidates(job, previews)
             return
-        
-        # Зберігаємо URL у основному FSM стані
-        await state.update_data(image_url=image_url)
-        
-        # Відправляємо статус успіху та зображення
-        await status_msg.edit_text(
-            f"✅ {html.bold('Зображення готове!')}\n\n"
-            f"📝 Опис: {data['product_prompt'][:100]}{'...' if len(data['product_prompt']) > 100 else ''}"
+        # Вибирати нема з чого: єдиний доступний варіант стає результатом
+        image_key = next(iter(previews), image_key)
+    
+    image_data = await media_store.read_variant(image_key) if image_key else None
+    if image_data is None and not job.image_url:
+        await job.message.edit_text(
+            "❌ Помилка при генерації зображення.\n"
+            "Можливі причини:\n"
+            "• Перевищено ліміт запитів (спробуйте пізніше)\n"
+            "• Опис порушує політику OpenAI\n"
+            "• Проблема з з'єднанням\n\n"
+            "Спробуйте ще раз або виберіть інший опис."
         )
+        logger.warning(f"Image generation failed for admin {job.admin_id}")
         
-        # Відправляємо саме зображення
-        await query.message.answer_photo(
-            photo=image_url,
-            caption="Генеровано через AI для товару"
+        # Повертаємося до введення опису
+        await state.set_state(AdminGenerateImageStates.waiting_for_prompt)
+        await job.message.answer("🎨 Спробуйте з новим описом або виберіть інший спосіб отримання зображення")
+        return
+    
+    # Відправляємо статус успіху та зображення
+    await job.message.edit_text(
+        f"✅ {html.bold('Зображення готове!')}\n\n"
+        f"📝 Опис: {job.prompt[:100]}{'...' if len(job.prompt) > 100 else ''}"
+        + ("\n♻️ Збережене зображення для такого ж опису, розміру та стилю" if job.cached else "")
+    )
+    
+    # Відправляємо саме зображення
+    sent = await job.message.answer_photo(
+        photo=BufferedInputFile(image_data, filename=f"product.{media_store.processor.extension}") if image_data else job.image_url,
+        caption="Генеровано через AI для товару"
+    )
+    
+    # Зберігаємо зображення в основному FSM стані; file_id завантаженого фото
+    # переходить до товару, тож картки відправляються без повторного завантаження
+    if image_data:
+        file_id = sent.photo[-1].file_id if sent and sent.photo else None
+        await state.update_data(image_url=None, image_key=image_key, image_file_id=file_id)
+    else:
+        logger.warning(f"Image job #{job.id}: could not store image locally, keeping OpenAI URL")
+        await state.update_data(image_url=job.image_url, image_key=None, image_file_id=None)
+    
+    logger.info(f"Image delivered to admin {job.admin_id} (job #{job.id}, cached={job.cached})")
+    
+    await show_product_confirmation(job.message, state)
+
+
+async def read_candidate_previews(job: ImageJob) -> Dict[str, bytes]:
+    """Читає мініатюри варіантів; варіанти, файлів яких немає в сховищі, пропускаються."""
+    previews = {}
+    for key in job.candidates:
+        data = await media_store.read_variant(key, PREVIEW_VARIANT)
+        if data is None:
+            logger.warning(f"Image job #{job.id}: variant {key} is missing from the media store")
+            continue
+        previews[key] = data
+    return previews
+
+
+async def deliver_image_candidates(job: ImageJob, previews: Dict[str, bytes]) -> None:
+    """Показує мініатюри варіантів альбомом і кнопки вибору."""
+    candidates = list(previews)
+    extension = media_store.processor.extension
+    media = [
+        InputMediaPhoto(
+            media=BufferedInputFile(data, filename=f"variant_{i}.{extension}"),
+            caption=f"Варіант {i}"
         )
-        
-        logger.info(f"Image generated successfully for admin {query.from_user.id}: {image_url[:50]}...")
-        
-        # Повертаємося до основного FSM для підтвердження товару
-        await state.set_state(AddProductStates.waiting_for_confirmation)
-        
-        # Показуємо підтвердження товару з зображенням
-        data = await state.get_data()
-        confirmation_text = (
-            f"✅ {html.bold('Перевірте дані товару:')}\n\n"
-            f"📝 Назва: {data['name']}\n"
-            f"📄 Опис: {data['description']}\n"
-            f"💰 Ціна: {data['price']:.2f} грн\n"
-            f"📂 Категорія: {data['category']}\n"
-            f"📦 Кількість: {data['stock']} шт\n"
-            f"🖼️ Зображення: Генероване через AI ✅\n\n"
-            f"{html.bold('Додати товар?')}"
+        for i, data in enumerate(previews.values(), start=1)
+    ]
+    
+    await job.message.edit_text(
+        f"✅ {html.bold('Варіанти готові!')} ({len(candidates)} за {job.generation_seconds:.0f} с)\n\n"
+        f"📝 Опис: {job.prompt[:100]}{'...' if len(job.prompt) > 100 else ''}"
+    )
+    await job.message.answer_media_group(media)
+    
+    await job.state.update_data(
+        image_candidates=candidates,
+        image_generation_seconds=job.generation_seconds,
+    )
+    await job.state.set_state(AdminGenerateImageStates.waiting_for_choice)
+    
+    builder = InlineKeyboardBuilder()
+    for i in range(1, len(candidates) + 1):
+        builder.button(text=f"✅ {i}", callback_data=f"admin_pick_image:{i - 1}")
+    builder.button(text="🎲 Інші варіанти", callback_data="admin_generate_image_variants")
+    builder.adjust(len(candidates), 1)
+    
+    await job.message.answer("👆 Виберіть зображення для товару:", reply_markup=builder.as_markup())
+    logger.info(f"Image variants delivered to admin {job.admin_id} (job #{job.id}): {len(candidates)}")
+
+
+@router.callback_query(AdminGenerateImageStates.waiting_for_choice, F.data.startswith("admin_pick_image:"), IsAdminCallbackFilter())
+async def admin_pick_image(query: CallbackQuery, state: FSMContext) -> None:
+    """Зберігає вибраний варіант і повертає до підтвердження товару."""
+    data = await state.get_data()
+    index = int(query.data.split(":")[1])
+    candidates = data.get('image_candidates') or []
+    if index >= len(candidates):
+        await query.answer("❌ Варіант не знайдено", show_alert=True)
+        return
+    
+    image_key = candidates[index]
+    # Вибраний варіант стає збереженим результатом для цього опису, розміру та стилю
+    await image_jobs.cache.put(data['product_prompt'], data['product_image_size'], data['product_image_style'],
+                               image_key, data.get('image_generation_seconds', 0.0))
+    
+    await query.message.edit_text(f"✅ Вибрано варіант {index + 1}")
+    await query.answer()
+    
+    # В альбомі були мініатюри; копія для картки завантажується один раз,
+    # і її file_id переходить до товару
+    file_id = None
+    image_data = await media_store.read_variant(image_key)
+    if image_data:
+        sent = await query.message.answer_photo(
+            photo=BufferedInputFile(image_data, filename=f"product.{media_store.processor.extension}"),
+            caption="Генеровано через AI для товару"
         )
-        
-        builder = InlineKeyboardBuilder()
-        builder.button(text="✅ Так, додати", callback_data="confirm_add_product")
-        builder.button(text="❌ Ні, скасувати", callback_data="cancel_add_product")
-        builder.adjust(2)
-        
-        await query.message.answer(confirmation_text, reply_markup=builder.as_markup())
-        
-    except Exception as e:
-        logger.exception(f"Error generating product image: {e}")
-        await query.message.edit_text(f"❌ Помилка: {str(e)}")
+        file_id = sent.photo[-1].file_id if sent and sent.photo else None
+    await state.update_data(
+        image_url=None,
+        image_key=image_key,
+        image_file_id=file_id,
+        image_candidates=None,
+    )
+    logger.info(f"Admin {query.from_user.id} picked image variant {index + 1}")
+    
+    await show_product_confirmation(query.message, state)
+
+
+async def show_product_confirmation(message: Message, state: FSMContext) -> None:
+    """Повертає до основного FSM і показує підтвердження товару з зображенням."""
+    await state.set_state(AddProductStates.waiting_for_confirmation)
+    
+    data = await state.get_data()
+    confirmation_text = (
+        f"✅ {html.bold('Перевірте дані товару:')}\n\n"
+        f"📝 Назва: {data['name']}\n"
+        f"📄 Опис: {data['description']}\n"
+        f"💰 Ціна: {data['price']:.2f} грн\n"
+        f"📂 Категорія: {data['category']}\n"
+        f"📦 Кількість: {data['stock']} шт\n"
+        f"🖼️ Зображення: Генероване через AI ✅\n\n"
+        f"{html.bold('Додати товар?')}"
+    )
+    
+    builder = InlineKeyboardBuilder()
+    builder.button(text="✅ Так, додати", callback_data="confirm_add_product")
+    builder.button(text="❌ Ні, скасувати", callback_data="cancel_add_product")
+    builder.button(text="🔄 Нова варіація", callback_data="admin_regenerate_image")
+    builder.adjust(2, 1)
+    
+    await message.answer(confirmation_text, reply_markup=builder.as_markup())
 
 
 @router.callback_query(AdminGenerateImageStates.waiting_for_confirmation, F.data == "admin_cancel_generate_image", IsAdminCallbackFilter())
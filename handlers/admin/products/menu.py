@@ -5,6 +5,7 @@ from aiogram.types import CallbackQuery
 from filters import IsAdminFilter
 from keyboards import get_admin_products_keyboard, get_admin_main_keyboard
 from logger_config import get_logger
+from tts_prerender import tts_prerenderer
 
 logger = get_logger("aiogram.handlers")
 
@@ -20,3 +21,15 @@ async def admin_products_callback(callback: CallbackQuery) -> None:
     )
     await callback.message.edit_text(products_text, reply_markup=get_admin_products_keyboard())
     await callback.answer()
+
+
+@router.callback_query(F.data == "admin_tts_warmup", IsAdminFilter())
+async def admin_tts_warmup_callback(callback: CallbackQuery) -> None:
+    """Ставить озвучування всіх товарів каталогу у фонову чергу."""
+    try:
+        scheduled = await tts_prerenderer.warmup()
+        await callback.answer(f"🔊 У черзі на озвучування: {scheduled} товарів", show_alert=True)
+        logger.info(f"Admin {callback.from_user.id} started TTS warmup for {scheduled} products")
+    except Exception as e:
+        logger.error(f"Error in admin_tts_warmup_callback: {e}", exc_info=True)
+        await callback.answer("❌ Помилка при запуску озвучування", show_alert=True)
@@ -4,7 +4,7 @@ from aiogram.types import CallbackQuery
 
 from database import db
 from filters import IsAdminFilter
-from keyboards import get_admin_main_keyboard
+from keyboards import get_admin_users_keyboard
 from logger_config import get_logger
 
 logger = get_logger("aiogram.handlers")
@@ -15,16 +15,25 @@ router = Router()
 @router.callback_query(F.data == "admin_users", IsAdminFilter())
 async def admin_users_callback(callback: CallbackQuery) -> None:
     """Перегляд користувачів."""
-    async with db.pool.acquire() as conn:
-        users = await conn.fetch(
-            "SELECT * FROM users ORDER BY created_at DESC LIMIT 20"
-        )
+    await _show_users_page(callback)
+
+
+@router.callback_query(F.data.startswith("admin_users_page:"), IsAdminFilter())
+async def admin_users_page_callback(callback: CallbackQuery) -> None:
+    """Перехід між сторінками списку користувачів."""
+    await _show_users_page(callback, callback.data.split(":", 1)[1])
+
+
+async def _show_users_page(callback: CallbackQuery, cursor: str = None) -> None:
+    """Показує сторінку користувачів (нові реєстрації першими)."""
+    page = await db.get_users_page(cursor)
+    users = page.items
     
     if not users:
         await callback.answer("❌ Користувачів не знайдено", show_alert=True)
         return
     
-    users_text = f"👥 {html.bold('Користувачі (останні 20):')}\n\n"
+    users_text = f"👥 {html.bold('Користувачі (нові першими):')}\n\n"
     
     for user in users:
         username = f"@{user['username']}" if user['username'] else "—"
@@ -36,5 +45,5 @@ async def admin_users_callback(callback: CallbackQuery) -> None:
             f"   Дата реєстрації: {user['created_at']}\n\n"
         )
     
-    await callback.message.edit_text(users_text, reply_markup=get_admin_main_keyboard())
+    await callback.message.edit_text(users_text, reply_markup=get_admin_users_keyboard(page))
     await callback.answer()
@@ -35,6 +35,7 @@ from .orders import router as orders_router
 from .orders import (
     command_my_orders_handler,
     my_orders_callback,
+    my_orders_page_callback,
     order_product_with_contact_start,
     process_order_phone,
     process_order_email,
@@ -72,6 +73,7 @@ __all__ = [
     # Order handlers
     "command_my_orders_handler",
     "my_orders_callback",
+    "my_orders_page_callback",
     "order_product_with_contact_start",
     "process_order_phone",
     "process_order_email",
@@ -47,21 +47,13 @@ async def command_catalog_handler(message: Message) -> None:
 @router.callback_query(F.data == "choose_categories", IsUserCallbackFilter())
 async def choose_categories_callback(callback: CallbackQuery) -> None:
     """Обробник для вибору перегляду за категоріями."""
-    categories = await db.get_categories()
+    # Категорії разом з кількістю товарів (один запит до БД)
+    categories_with_counts = await db.get_category_counts()
     
-    if not categories:
+    if not categories_with_counts:
         await callback.answer("😔 Наразі немає доступних категорій", show_alert=True)
         return
     
-    # Отримуємо кількість товарів для кожної категорії
-    categories_with_counts = []
-    for category in categories:
-        products_count = len(await db.get_products_by_category(category))
-        categories_with_counts.append((category, products_count))
-    
-    # Сортуємо за кількістю товарів (спадаючи)
-    categories_with_counts.sort(key=lambda x: x[1], reverse=True)
-    
     await callback.message.edit_text(
         "📂 Виберіть категорію:",
         reply_markup=get_categories_keyboard(categories_with_counts)
@@ -72,21 +64,13 @@ async def choose_categories_callback(callback: CallbackQuery) -> None:
 @router.message(Command("categories"), IsUserFilter())
 async def command_categories_handler(message: Message) -> None:
     """Обробник команди /categories."""
-    categories = await db.get_categories()
+    # Категорії разом з кількістю товарів (один запит до БД)
+    categories_with_counts = await db.get_category_counts()
     
-    if not categories:
+    if not categories_with_counts:
         await message.answer("😔 Наразі немає доступних категорій.")
         return
     
-    # Отримуємо кількість товарів для кожної категорії
-    categories_with_counts = []
-    for category in categories:
-        products_count = len(await db.get_products_by_category(category))
-        categories_with_counts.append((category, products_count))
-    
-    # Сортуємо за кількістю товарів (спадаючи)
-    categories_with_counts.sort(key=lambda x: x[1], reverse=True)
-    
     await message.answer(
         "📂 Виберіть категорію:",
         reply_markup=get_categories_keyboard(categories_with_counts)
@@ -180,21 +164,13 @@ async def back_to_catalog_callback(callback: CallbackQuery) -> None:
 @router.callback_query(F.data == "back_to_categories", IsUserCallbackFilter())
 async def back_to_categories_callback(callback: CallbackQuery) -> None:
     """Обробник для повернення до списку категорій."""
-    categories = await db.get_categories()
+    # Категорії разом з кількістю товарів (один запит до БД)
+    categories_with_counts = await db.get_category_counts()
     
-    if not categories:
+    if not categories_with_counts:
         await callback.message.edit_text("😔 Наразі немає доступних категорій.")
         return
     
-    # Отримуємо кількість товарів для кожної категорії
-    categories_with_counts = []
-    for category in categories:
-        products_count = len(await db.get_products_by_category(category))
-        categories_with_counts.append((category, products_count))
-    
-    # Сортуємо за кількістю товарів (спадаючи)
-    categories_with_counts.sort(key=lambda x: x[1], reverse=True)
-    
     await callback.message.edit_text(
         "📂 Виберіть категорію:",
         reply_markup=get_categories_keyboard(categories_with_counts)
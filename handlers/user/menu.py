@@ -9,6 +9,7 @@ from keyboards import (
     get_my_orders_keyboard
 )
 from filters import IsUserFilter, IsUserCallbackFilter
+from handlers.user.orders import format_user_orders
 from config import ADMIN_IDS
 from logger_config import get_logger
 
@@ -39,56 +40,25 @@ async def handle_catalog_button(message: Message) -> None:
 @router.message(F.text == "📦 Мої замовлення", IsUserFilter())
 async def handle_my_orders_button(message: Message) -> None:
     """Обробник кнопки мої замовлення."""
-    orders = await db.get_user_orders(message.from_user.id)
+    page = await db.get_user_orders_page(message.from_user.id)
     
-    if not orders:
+    if not page.items:
         await message.answer("У вас ще немає замовлень.")
         return
     
-    orders_text = f"📦 {html.bold('Ваші замовлення:')}\n\n"
-    
-    status_emoji = {
-        'pending': '🕐',
-        'confirmed': '✅',
-        'shipped': '🚚',
-        'delivered': '📬',
-        'cancelled': '❌'
-    }
-    
-    for order in orders:
-        status = order['status']
-        emoji = status_emoji.get(status, '❓')
-        
-        orders_text += (
-            f"{emoji} {html.bold(f'Замовлення #{order['id']}')}"
-            f"\n   Товар: {order['product_name']}"
-            f"\n   Кількість: {order['quantity']} шт."
-            f"\n   Сума: {float(order['total_price']):.2f} грн"
-            f"\n   Статус: {status}"
-            f"\n   Дата: {order['created_at']}\n\n"
-        )
-    
-    await message.answer(orders_text, reply_markup=get_my_orders_keyboard())
+    await message.answer(format_user_orders(page.items), reply_markup=get_my_orders_keyboard(page))
 
 
 @router.message(F.text == "📚 Категорії", IsUserFilter())
 async def handle_categories_button(message: Message) -> None:
     """Обробник кнопки категорії."""
-    categories = await db.get_categories()
+    # Категорії разом з кількістю товарів (один запит до БД)
+    categories_with_counts = await db.get_category_counts()
     
-    if not categories:
+    if not categories_with_counts:
         await message.answer("😔 Категорії не знайдені.")
         return
     
-    # Отримуємо кількість товарів для кожної категорії
-    categories_with_counts = []
-    for category in categories:
-        products_count = len(await db.get_products_by_category(category))
-        categories_with_counts.append((category, products_count))
-    
-    # Сортуємо за кількістю товарів (спадаючи)
-    categories_with_counts.sort(key=lambda x: x[1], reverse=True)
-    
     from keyboards.inline import get_categories_keyboard
     
     await message.answer(
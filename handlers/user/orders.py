@@ -21,28 +21,22 @@ logger = get_logger("aiogram.handlers")
 router = Router()
 
 
-@router.message(Command("myorders"), IsUserFilter())
-async def command_my_orders_handler(message: Message) -> None:
-    """Обробник команди /myorders."""
-    orders = await db.get_user_orders(message.from_user.id)
-    
-    if not orders:
-        await message.answer("📭 У вас ще немає замовлень. Перегляньте /catalog!")
-        return
-    
+STATUS_EMOJI = {
+    'pending': '🕐',
+    'confirmed': '✅',
+    'shipped': '🚚',
+    'delivered': '📬',
+    'cancelled': '❌'
+}
+
+
+def format_user_orders(orders) -> str:
+    """Форматує сторінку замовлень користувача в текст повідомлення."""
     orders_text = f"📦 {html.bold('Ваші замовлення:')}\n\n"
     
-    status_emoji = {
-        'pending': '🕐',
-        'confirmed': '✅',
-        'shipped': '🚚',
-        'delivered': '📬',
-        'cancelled': '❌'
-    }
-    
     for order in orders:
         status = order['status']
-        emoji = status_emoji.get(status, '❓')
+        emoji = STATUS_EMOJI.get(status, '❓')
         
         orders_text += (
             f"{emoji} {html.bold(f'Замовлення #{order['id']}')}\n"
@@ -53,44 +47,53 @@ async def command_my_orders_handler(message: Message) -> None:
             f"   Дата: {order['created_at']}\n\n"
         )
     
-    await message.answer(orders_text)
+    return orders_text
+
+
+@router.message(Command("myorders"), IsUserFilter())
+async def command_my_orders_handler(message: Message) -> None:
+    """Обробник команди /myorders."""
+    page = await db.get_user_orders_page(message.from_user.id)
+    
+    if not page.items:
+        await message.answer("📭 У вас ще немає замовлень. Перегляньте /catalog!")
+        return
+    
+    await message.answer(
+        format_user_orders(page.items),
+        reply_markup=get_my_orders_keyboard(page)
+    )
 
 
 @router.callback_query(F.data == "my_orders", IsUserCallbackFilter())
 async def my_orders_callback(callback: CallbackQuery) -> None:
     """Обробник callback для перегляду замовлень."""
-    orders = await db.get_user_orders(callback.from_user.id)
+    page = await db.get_user_orders_page(callback.from_user.id)
     
-    if not orders:
+    if not page.items:
         await callback.message.edit_text("📭 У вас ще немає замовлень. Перегляньте /catalog!")
         return
     
-    orders_text = f"📦 {html.bold('Ваші замовлення:')}\n\n"
-    
-    status_emoji = {
-        'pending': '🕐',
-        'confirmed': '✅',
-        'shipped': '🚚',
-        'delivered': '📬',
-        'cancelled': '❌'
-    }
+    await callback.message.edit_text(
+        format_user_orders(page.items), 
+        reply_markup=get_my_orders_keyboard(page)
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("my_orders_page:"), IsUserCallbackFilter())
+async def my_orders_page_callback(callback: CallbackQuery) -> None:
+    """Перехід між сторінками замовлень користувача."""
+    cursor = callback.data.split(":", 1)[1]
+    page = await db.get_user_orders_page(callback.from_user.id, cursor)
     
-    for order in orders:
-        status = order['status']
-        emoji = status_emoji.get(status, '❓')
-        
-        orders_text += (
-            f"{emoji} {html.bold(f'Замовлення #{order['id']}')}\n"
-            f"   Товар: {order['product_name']}\n"
-            f"   Кількість: {order['quantity']} шт.\n"
-            f"   Сума: {float(order['total_price']):.2f} грн\n"
-            f"   Статус: {status}\n"
-            f"   Дата: {order['created_at']}\n\n"
-        )
+    if not page.items:
+        await callback.answer("📭 Більше замовлень немає", show_alert=True)
+        return
     
     await callback.message.edit_text(
-        orders_text, 
-        reply_markup=get_my_orders_keyboard()
+        format_user_orders(page.items),
+        reply_markup=get_my_orders_keyboard(page)
     )
     await callback.answer()
 
@@ -1,12 +1,15 @@
 """Handlers для товарів (користувач)."""
 from aiogram import Router, html, F
-from aiogram.types import CallbackQuery
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, CallbackQuery, InlineKeyboardMarkup, Message
 
 from database import db
 from keyboards import get_product_details_keyboard
 from keyboards.inline import get_product_details_with_category_keyboard
 from filters import IsUserCallbackFilter
-from tts_service import text_to_speech, get_product_description_for_tts
+from media_store import media_store
+from tts_service import get_product_description_for_tts
+from tts_cache import tts_cache, tts_cache_key
 from logger_config import get_logger
 
 logger = get_logger("aiogram.handlers")
@@ -14,6 +17,55 @@ logger = get_logger("aiogram.handlers")
 router = Router()
 
 
+async def send_product_photo(message: Message, product: dict) -> bool:
+    """Відправляє зображення товару: за file_id, а якщо його ще немає - зменшену
+    копію з локального сховища.
+    
+    Зображення, задані лише URL, завантажуються в сховище один раз. file_id,
+    повернутий Telegram після завантаження, зберігається в товарі.
+    
+    Returns:
+        True якщо зображення відправлено
+    """
+    product_id = product['id']
+    file_id = product.get('image_file_id')
+    if file_id:
+        try:
+            await message.answer_photo(photo=file_id)
+            return True
+        except TelegramBadRequest as e:
+            logger.warning(f"Image file_id rejected for product_id={product_id}: {e}")
+    
+    image_key = product.get('image_key')
+    data = await media_store.read_variant(image_key) if image_key else None
+    if data is None and product.get('image_url'):
+        image_key = await media_store.download(product['image_url'])
+        data = await media_store.read_variant(image_key) if image_key else None
+    if data is None:
+        return False
+    
+    sent = await message.answer_photo(photo=BufferedInputFile(data, filename=f"product.{media_store.processor.extension}"))
+    if sent and sent.photo:
+        await db.update_product(product_id, image_key=image_key, image_file_id=sent.photo[-1].file_id)
+        logger.info(f"Product image uploaded for product_id={product_id}")
+    return True
+
+
+async def show_product_card(callback: CallbackQuery, product: dict, text: str,
+                            keyboard: InlineKeyboardMarkup) -> None:
+    """Показує картку товару; якщо у товару є зображення - фото над карткою."""
+    has_image = product.get('image_file_id') or product.get('image_key') or product.get('image_url')
+    if has_image and await send_product_photo(callback.message, product):
+        await callback.message.answer(text, reply_markup=keyboard)
+        try:
+            await callback.message.delete()
+        except TelegramBadRequest:
+            pass
+        return
+    
+    await callback.message.edit_text(text, reply_markup=keyboard)
+
+
 @router.callback_query(F.data.startswith("listen_product:"), IsUserCallbackFilter())
 async def listen_product_callback(callback: CallbackQuery) -> None:
     """Обробник для озвучування опису товару."""
@@ -25,21 +77,37 @@ async def listen_product_callback(callback: CallbackQuery) -> None:
             await callback.answer("❌ Товар не знайдено", show_alert=True)
             return
         
-        # Показуємо статус обробки
-        await callback.answer("🔊 Генерую аудіофайл...")
-        
         # Підготовляємо текст для озвучування
         tts_text = get_product_description_for_tts(product)
+        cache_key = tts_cache_key(tts_text, "uk")
+        caption = f"🔊 Інформація про товар '{product['name']}'"
         
-        # Генеруємо аудіофайл
-        audio_buffer = await text_to_speech(tts_text, language="uk")
+        # Аудіо вже відправлялось - посилаємось на file_id без завантаження
+        file_id = tts_cache.get_file_id(cache_key)
+        if file_id:
+            try:
+                await callback.answer()
+                await callback.message.answer_voice(voice=file_id, caption=caption)
+                logger.info(f"Product audio sent by file_id for product_id={product_id}")
+                return
+            except TelegramBadRequest as e:
+                logger.warning(f"Cached file_id rejected for product_id={product_id}: {e}")
+                tts_cache.forget_file_id(cache_key)
+        else:
+            # Показуємо статус обробки
+            await callback.answer("🔊 Генерую аудіофайл...")
         
-        if audio_buffer:
+        # Беремо аудіо з кешу або генеруємо
+        audio = await tts_cache.get_audio(tts_text, language="uk", product_id=product_id)
+        
+        if audio:
             # Відправляємо аудіофайл
-            await callback.message.answer_voice(
-                voice=audio_buffer,
-                caption=f"🔊 Інформація про товар '{product['name']}'"
+            sent = await callback.message.answer_voice(
+                voice=BufferedInputFile(audio, filename="product_info.mp3"),
+                caption=caption
             )
+            if sent and sent.voice:
+                tts_cache.set_file_id(cache_key, sent.voice.file_id)
             logger.info(f"Product audio sent for product_id={product_id}")
         else:
             await callback.message.answer(
@@ -69,10 +137,7 @@ async def product_details_callback(callback: CallbackQuery) -> None:
         f"📦 В наявності: {product['stock']} шт.\n"
     )
     
-    await callback.message.edit_text(
-        details_text, 
-        reply_markup=get_product_details_keyboard(product['id'])
-    )
+    await show_product_card(callback, product, details_text, get_product_details_keyboard(product['id']))
     await callback.answer()
 
 
@@ -104,8 +169,5 @@ async def product_details_with_category_callback(callback: CallbackQuery) -> Non
     else:
         keyboard = get_product_details_keyboard(product['id'])
     
-    await callback.message.edit_text(
-        details_text, 
-        reply_markup=keyboard
-    )
+    await show_product_card(callback, product, details_text, keyboard)
     await callback.answer()
@@ -1,14 +1,14 @@
-"""Webhook handlers for payment callbacks."""
+"""Webhook handlers for payment callbacks and Telegram updates."""
 
-from aiogram import Router, F, html
+from aiogram import Bot, Dispatcher, Router, F, html
 from aiogram.types import Message
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
-import json
 import logging
 
-from database import db
 from payments import LiqPayService
-from config import LIQPAY_CALLBACK_URL
+from payment_events import payment_events
+from config import LIQPAY_CALLBACK_URL, TELEGRAM_WEBHOOK_PATH, TELEGRAM_WEBHOOK_SECRET
 from logger_config import get_logger
 
 logger = get_logger("aiogram.handlers.webhook")
@@ -18,7 +18,11 @@ logger = get_logger("aiogram.handlers.webhook")
 
 
 async def handle_liqpay_webhook(request: web.Request) -> web.Response:
-    """Handle LiqPay webhook callback."""
+    """Handle LiqPay webhook callback.
+
+    Only the signature is checked here: the verified payload is stored in the
+    payment_events inbox and applied to payments/orders by payment_events.
+    """
     try:
         # Get POST data
         post_data = await request.post()
@@ -30,88 +34,28 @@ async def handle_liqpay_webhook(request: web.Request) -> web.Response:
             logger.warning("Invalid webhook request - missing data or signature")
             return web.Response(status=400, text="Invalid request")
         
-        # Verify signature
+        # Verify signature and decode the callback data
         liqpay_service = LiqPayService()
-        if not liqpay_service.verify_callback(data, signature):
+        decoded_data = liqpay_service.verify_callback(data, signature)
+        if decoded_data is None:
             logger.warning(f"Invalid signature for webhook data: {data}")
             return web.Response(status=401, text="Invalid signature")
         
-        # Decode the callback data
-        import base64
-        decoded_data = json.loads(base64.b64decode(data).decode('utf-8'))
-        
-        logger.info(f"Valid LiqPay webhook received: {decoded_data}")
-        
-        # Extract payment information
-        status = decoded_data.get('status')
-        order_id = decoded_data.get('order_id')
-        liqpay_payment_id = decoded_data.get('payment_id')
-        amount = decoded_data.get('amount')
-        currency = decoded_data.get('currency')
-        
-        if not order_id:
+        if not decoded_data.get('order_id'):
             logger.error("Webhook data missing order_id")
             return web.Response(status=400, text="Missing order_id")
         
-        # Get payment record
-        payment = await db.get_payment_by_order(order_id)
-        
-        if not payment:
-            logger.warning(f"No payment record found for order_id: {order_id}")
-            # Create one if it doesn't exist (failsafe)
-            payment_id = await db.create_payment_record(
-                order_id=order_id,
-                user_id=None,  # Will be retrieved from order
-                amount=float(amount),
-                currency=currency,
-                payment_method="liqpay",
-                status=status
-            )
-            logger.info(f"Created payment record #{payment_id} for order #{order_id}")
+        # A database error falls through to 500: LiqPay retries the callback
+        event_id = await payment_events.receive(decoded_data)
+        if event_id is None:
+            logger.info(f"Repeated LiqPay callback for order #{decoded_data.get('order_id')}, "
+                        f"status: {decoded_data.get('status')}")
         else:
-            # Update existing payment
-            await db.update_payment_status(
-                payment_id=payment['id'],
-                status=status,
-                liqpay_payment_id=liqpay_payment_id
-            )
-            logger.info(f"Updated payment #{payment['id']} status to {status}")
-        
-        # Handle different payment statuses
-        if status == "success":
-            # Update order status to paid
-            order = await db.get_order(order_id)
-            if order:
-                await db.update_order_payment_info(
-                    order_id=order_id,
-                    payment_status="paid",
-                    payment_method="liqpay"
-                )
-                logger.info(f"Order #{order_id} marked as paid")
-                
-                # TODO: Send confirmation message to user
-                # This would require storing user_id in payment record
-                # or retrieving it from order
-        
-        elif status == "failure":
-            logger.warning(f"Payment failed for order #{order_id}")
-            # Update order status to failed
-            await db.update_order_payment_info(
-                order_id=order_id,
-                payment_status="failed",
-                payment_method="liqpay"
-            )
-            # TODO: Notify user about failed payment
-        
-        elif status in ["init", "processing"]:
-            logger.info(f"Payment processing for order #{order_id}, status: {status}")
+            logger.info(f"LiqPay event #{event_id} queued for order #{decoded_data.get('order_id')}, "
+                        f"status: {decoded_data.get('status')}")
         
         # Return 200 OK to acknowledge receipt
         return web.Response(status=200, text="OK")
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in webhook: {e}", exc_info=True)
-        return web.Response(status=400, text="Invalid JSON")
     
     except Exception as e:
         logger.error(f"Error handling LiqPay webhook: {e}", exc_info=True)
@@ -133,3 +77,46 @@ async def webhook_test(request: web.Request) -> web.Response:
             {"error": str(e)},
             status=500
         )
+
+
+def register_telegram_webhook(app: web.Application, dispatcher: Dispatcher, bot: Bot,
+                              path: str = TELEGRAM_WEBHOOK_PATH,
+                              secret_token: str = TELEGRAM_WEBHOOK_SECRET) -> SimpleRequestHandler:
+    """Register the Telegram update route on the aiohttp app.
+
+    Requests without a matching X-Telegram-Bot-Api-Secret-Token header are
+    rejected with 401. Accepted updates are acknowledged immediately and fed
+    to the dispatcher in the background, so Telegram never waits for handlers.
+    Dispatcher startup/shutdown hooks are bound to the app lifecycle.
+    """
+    handler = SimpleRequestHandler(dispatcher=dispatcher, bot=bot, secret_token=secret_token)
+    handler.register(app, path=path)
+    setup_application(app, dispatcher, bot=bot)
+    return handler
+
+
+async def set_telegram_webhook(bot: Bot, dispatcher: Dispatcher, base_url: str,
+                               path: str = TELEGRAM_WEBHOOK_PATH,
+                               secret_token: str = TELEGRAM_WEBHOOK_SECRET) -> bool:
+    """Point Telegram at our webhook URL.
+
+    setWebhook is idempotent, so every process behind the load balancer may
+    call it on startup. The webhook is not deleted on shutdown: other
+    processes keep serving the same URL. Polling mode deletes it on startup
+    instead, otherwise getUpdates fails with 409 Conflict.
+
+    Returns:
+        False if Telegram rejected the webhook; the bot must not keep running
+    """
+    url = base_url.rstrip('/') + path
+    try:
+        await bot.set_webhook(
+            url,
+            secret_token=secret_token,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+        )
+        logger.info(f"Telegram webhook set: {url}")
+        return True
+    except Exception as e:
+        logger.error(f"Error setting Telegram webhook {url}: {e}", exc_info=True)
+        return False
@@ -0,0 +1,125 @@
+"""Спільний HTTP-клієнт для вихідних запитів бота (LiqPay, завантаження зображень).
+
+Окрема aiohttp.ClientSession на кожен запит щоразу платить за TCP- і
+TLS-з'єднання та DNS-запит. Одна сесія на весь час роботи застосунку
+тримає пул keep-alive з'єднань з обмеженням на хост і кешує DNS.
+Статистика (запити та нові/повторно використані з'єднання по хостах)
+збирається через aiohttp.TraceConfig.
+"""
+
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import aiohttp
+
+from config import (
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+)
+from logger_config import get_logger
+
+logger = get_logger("http.client")
+
+
+class _HostStats:
+    """Лічильники одного хоста."""
+
+    __slots__ = ("requests", "new_connections", "reused_connections", "errors")
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.errors = 0
+
+
+class HTTPClient:
+    """Одна aiohttp-сесія з пулом з'єднань на весь час роботи застосунку."""
+
+    def __init__(self, limit: int = HTTP_POOL_LIMIT, limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+                 keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT, dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+                 timeout: float = HTTP_TIMEOUT, connect_timeout: float = HTTP_CONNECT_TIMEOUT):
+        """
+        Args:
+            limit: Максимум відкритих з'єднань загалом
+            limit_per_host: Максимум відкритих з'єднань з одним хостом
+            keepalive_timeout: Скільки тримати невикористане з'єднання, секунди
+            dns_cache_ttl: Скільки кешувати результат DNS, секунди
+            timeout: Загальний таймаут запиту за замовчуванням, секунди
+            connect_timeout: Таймаут встановлення з'єднання, секунди
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._hosts: Dict[str, _HostStats] = defaultdict(_HostStats)
+
+    async def start(self) -> None:
+        """Створює сесію (викликається в bot.main)."""
+        _ = self.session
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Сесія для запитів; без start створюється при першому зверненні."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout, trace_configs=[self._trace_config()]
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Закриває сесію та всі з'єднання пулу."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info(f"HTTP client closed, stats: {self.stats()}")
+        self._session = None
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Повертає лічильники по хостах."""
+        return {
+            host: {
+                "requests": s.requests,
+                "new_connections": s.new_connections,
+                "reused_connections": s.reused_connections,
+                "errors": s.errors,
+            }
+            for host, s in self._hosts.items()
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context: SimpleNamespace, params) -> None:
+            context.host = params.url.host
+            self._hosts[context.host].requests += 1
+
+        async def on_connection_create_end(session, context: SimpleNamespace, params) -> None:
+            self._hosts[context.host].new_connections += 1
+
+        async def on_connection_reuseconn(session, context: SimpleNamespace, params) -> None:
+            self._hosts[context.host].reused_connections += 1
+
+        async def on_request_exception(session, context: SimpleNamespace, params) -> None:
+            self._hosts[context.host].errors += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+
+http_client = HTTPClient()
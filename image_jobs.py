@@ -0,0 +1,240 @@
+"""Черга задач генерації зображень для адмін-панелі.
+
+Обробник підтвердження ставить задачу в чергу і одразу завершується, тому
+генерація (10-30 секунд) не тримає обробку оновлень. Воркери черги (глобальна
+межа паралельності) викликають OpenAI, при RateLimitError повторюють запит
+з експоненційною затримкою і показують хід роботи, редагуючи повідомлення
+статусу. Задача може просити кілька варіантів: DALL-E 3 приймає лише n=1,
+тому варіанти генеруються паралельними запитами (загальну кількість
+одночасних запитів обмежує семафор). Тимчасовий URL результату одразу
+завантажується в media_store і
+записується в кеш промптів. Ключ зображення передається колбеку задачі,
+який повертає адміна в FSM.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+from aiogram.exceptions import TelegramAPIError
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+from openai import RateLimitError
+
+from config import (
+    IMAGE_JOBS_CONCURRENCY,
+    IMAGE_JOBS_MAX_ATTEMPTS,
+    IMAGE_JOBS_BACKOFF,
+    IMAGE_JOBS_BACKOFF_MAX,
+    IMAGE_JOBS_PROGRESS_INTERVAL,
+    IMAGE_JOBS_MAX_REQUESTS,
+)
+from image_prompt_cache import ImagePromptCache, image_prompt_cache
+from logger_config import get_logger
+from media_store import MediaStore, media_store
+import openai_service
+
+logger = get_logger("openai.jobs")
+
+_job_ids = itertools.count(1)
+
+
+@dataclass
+class ImageJob:
+    """Задача генерації зображення.
+
+    Attributes:
+        admin_id: ID адміністратора
+        prompt: Опис зображення
+        size: Розмір (1024x1024, 1792x1024, 1024x1792)
+        style: Стиль (vivid або natural)
+        state: FSM адміністратора (працює і після завершення обробника)
+        message: Повідомлення статусу, яке редагується під час роботи
+        deliver: Колбек deliver(job, image_key); image_key None - зображення немає в сховищі
+        variants: Скільки варіантів згенерувати (усі ключі - в candidates)
+        fresh: Нова варіація: не брати результат з кешу промптів
+        cached: Результат узято з кешу промптів
+        image_url: Тимчасовий URL від OpenAI (якщо зберегти локально не вдалося)
+        candidates: Ключі збережених варіантів
+        generation_seconds: Тривалість генерації
+    """
+
+    admin_id: int
+    prompt: str
+    size: str
+    style: str
+    state: FSMContext
+    message: Message
+    deliver: Callable[["ImageJob", Optional[str]], Awaitable[None]]
+    variants: int = 1
+    fresh: bool = False
+    cached: bool = False
+    image_url: Optional[str] = None
+    candidates: List[str] = field(default_factory=list)
+    generation_seconds: float = 0.0
+    id: int = field(default_factory=lambda: next(_job_ids))
+    attempts: int = 0
+    phase: str = ""
+
+    def __post_init__(self):
+        self.phase = self.phase or self.working_phase
+
+    @property
+    def working_phase(self) -> str:
+        """Текст статусу під час генерації."""
+        if self.variants > 1:
+            return f"⏳ Генерую варіанти зображення ({self.variants})..."
+        return "⏳ Генерую зображення..."
+
+
+class ImageJobQueue:
+    """Черга генерації з обмеженою кількістю воркерів і повтором при RateLimitError."""
+
+    def __init__(self, concurrency: int = IMAGE_JOBS_CONCURRENCY,
+                 max_attempts: int = IMAGE_JOBS_MAX_ATTEMPTS,
+                 backoff: float = IMAGE_JOBS_BACKOFF, backoff_max: float = IMAGE_JOBS_BACKOFF_MAX,
+                 progress_interval: float = IMAGE_JOBS_PROGRESS_INTERVAL,
+                 max_requests: int = IMAGE_JOBS_MAX_REQUESTS,
+                 cache: ImagePromptCache = image_prompt_cache, store: MediaStore = media_store):
+        """
+        Args:
+            concurrency: Скільки зображень генерується одночасно (на весь бот)
+            max_attempts: Максимум спроб задачі при RateLimitError
+            backoff: Перша затримка повтору, секунди (далі подвоюється)
+            backoff_max: Максимальна затримка повтору, секунди
+            progress_interval: Як часто оновлювати повідомлення статусу, секунди
+            max_requests: Скільки запитів до OpenAI виконується одночасно (з варіантами)
+            cache: Кеш промптів, куди записуються результати
+            store: Сховище, куди завантажуються зображення
+        """
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.progress_interval = progress_interval
+        self.cache = cache
+        self._requests = asyncio.Semaphore(max_requests)
+        self.store = store
+        self.completed = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._queue: "asyncio.Queue[ImageJob]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    def submit(self, job: ImageJob) -> int:
+        """Ставить задачу в чергу; повертає кількість задач перед нею."""
+        ahead = self._queue.qsize()
+        self._queue.put_nowait(job)
+        logger.info(f"Image job #{job.id} queued for admin {job.admin_id} ({ahead} ahead)")
+        return ahead
+
+    def start(self) -> None:
+        """Запускає воркери."""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def close(self) -> None:
+        """Зупиняє воркери."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self) -> None:
+        """Чекає, поки всі задачі будуть оброблені."""
+        await self._queue.join()
+
+    def retry_delay(self, attempt: int, error: Optional[RateLimitError] = None) -> float:
+        """Затримка перед повтором: Retry-After від OpenAI або експоненційна з джитером."""
+        delay = min(self.backoff_max, self.backoff * 2 ** (attempt - 1))
+        delay += random.uniform(0, delay * 0.1)
+        retry_after = openai_service.get_retry_after(error) if error is not None else None
+        return max(delay, retry_after or 0)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in image job #{job.id}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def lookup(self, job: ImageJob) -> Optional[str]:
+        """Повертає ключ збереженого зображення для параметрів задачі (крім нових варіацій)."""
+        if job.fresh or job.variants > 1:
+            return None
+        image_key = await self.cache.get(job.prompt, job.size, job.style)
+        job.cached = image_key is not None
+        return image_key
+
+    async def _run(self, job: ImageJob) -> None:
+        started = time.monotonic()
+        progress = asyncio.create_task(self._report_progress(job, started))
+        try:
+            urls = await asyncio.gather(*(self._generate(job) for _ in range(job.variants)))
+            urls = [url for url in urls if url]
+            job.image_url = urls[0] if urls else None
+            # URL від OpenAI тимчасовий: зберігаємо зображення локально
+            keys = await asyncio.gather(*(self.store.download(url) for url in urls))
+            job.candidates = [key for key in keys if key]
+        finally:
+            progress.cancel()
+
+        job.generation_seconds = time.monotonic() - started
+        image_key = job.candidates[0] if job.candidates else None
+        if job.image_url:
+            self.completed += 1
+            logger.info(f"Image job #{job.id} done in {job.generation_seconds:.1f}s: "
+                        f"{len(urls)}/{job.variants} image(s), {job.attempts} attempt(s)")
+            # Варіант потрапляє в кеш лише після вибору адміністратором
+            if image_key and job.variants == 1:
+                await self.cache.put(job.prompt, job.size, job.style, image_key, job.generation_seconds)
+        else:
+            self.failed += 1
+        await job.deliver(job, image_key)
+
+    async def _generate(self, job: ImageJob) -> Optional[str]:
+        attempt = 0
+        while True:
+            attempt += 1
+            job.attempts += 1
+            try:
+                async with self._requests:
+                    return await openai_service.request_image(job.prompt, job.size, job.style)
+            except RateLimitError as e:
+                self.rate_limited += 1
+                if attempt >= self.max_attempts:
+                    logger.warning(f"Image job #{job.id} gave up after {attempt} rate-limited attempts")
+                    return None
+                delay = self.retry_delay(attempt, e)
+                logger.warning(f"Image job #{job.id} rate limited, retry in {delay:.1f}s")
+                job.phase = (f"⏳ Ліміт запитів OpenAI, повтор через {delay:.0f} с "
+                             f"(спроба {attempt + 1}/{self.max_attempts})...")
+                await edit_status(job.message, job.phase)
+                await asyncio.sleep(delay)
+                job.phase = job.working_phase
+
+    async def _report_progress(self, job: ImageJob, started: float) -> None:
+        await edit_status(job.message, job.phase)
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            elapsed = time.monotonic() - started
+            await edit_status(job.message, f"{job.phase} {elapsed:.0f} с")
+
+
+async def edit_status(message: Message, text: str) -> None:
+    """Редагує повідомлення статусу; помилки Telegram не зупиняють задачу."""
+    try:
+        await message.edit_text(text)
+    except TelegramAPIError as e:
+        logger.debug(f"Could not update image job status: {e}")
+
+
+image_jobs = ImageJobQueue()
@@ -0,0 +1,110 @@
+"""Зменшені копії зображень товарів.
+
+Оригінали DALL-E мають 1024-1792 px, а зображення за URL від адміністратора
+можуть бути ще більшими. Поруч з оригіналом зберігаються мініатюра (для
+альбому варіантів адміністратора) та середня копія (для картки товару):
+кожне місце відправляє найменшу придатну копію, що зменшує обсяг
+завантаження в Telegram і час показу на клієнті.
+Декодування та масштабування навантажують CPU, тому виконуються в пулі
+процесів і не блокують event loop.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from config import (
+    MEDIA_PROCESS_WORKERS,
+    MEDIA_THUMB_SIZE,
+    MEDIA_MEDIUM_SIZE,
+    MEDIA_VARIANT_FORMAT,
+    MEDIA_VARIANT_QUALITY,
+)
+from logger_config import get_logger
+
+logger = get_logger("media.processing")
+
+# Копії зображення: назва -> максимальна сторона, px
+IMAGE_VARIANTS: Dict[str, int] = {"thumb": MEDIA_THUMB_SIZE, "medium": MEDIA_MEDIUM_SIZE}
+
+VARIANT_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+
+def render_variants(source_path: str, targets: Dict[str, Tuple[str, int]],
+                    image_format: str, quality: int) -> Dict[str, int]:
+    """Створює зменшені копії зображення (виконується в процесі пулу).
+
+    Args:
+        source_path: Шлях до оригіналу
+        targets: Назва копії -> (шлях, максимальна сторона)
+        image_format: Формат копій (JPEG або WEBP)
+        quality: Якість стиснення
+
+    Returns:
+        Назва копії -> розмір файлу в байтах
+    """
+    from PIL import Image
+
+    sizes = {}
+    with Image.open(source_path) as original:
+        image = original.convert("RGB")
+    for name, (path, max_side) in targets.items():
+        variant = image.copy()
+        # Менші за max_side зображення не збільшуються
+        variant.thumbnail((max_side, max_side), Image.LANCZOS)
+        tmp_path = f"{path}.tmp"
+        variant.save(tmp_path, format=image_format, quality=quality, optimize=True)
+        os.replace(tmp_path, path)
+        sizes[name] = os.path.getsize(path)
+    return sizes
+
+
+class ImageProcessor:
+    """Пул процесів для масштабування зображень."""
+
+    def __init__(self, max_workers: int = MEDIA_PROCESS_WORKERS,
+                 image_format: str = MEDIA_VARIANT_FORMAT, quality: int = MEDIA_VARIANT_QUALITY):
+        """
+        Args:
+            max_workers: Кількість процесів
+            image_format: Формат копій (JPEG або WEBP)
+            quality: Якість стиснення копій
+        """
+        self.max_workers = max_workers
+        self.image_format = image_format.upper()
+        self.quality = quality
+        self.extension = VARIANT_EXTENSIONS.get(self.image_format, self.image_format.lower())
+        self.rendered = 0
+        self.failed = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def render(self, source_path: str,
+                     targets: Dict[str, Tuple[str, int]]) -> Optional[Dict[str, int]]:
+        """Створює копії в пулі процесів; повертає розміри файлів або None при помилці."""
+        if self._pool is None:
+            # Процеси запускаються при першому зображенні, а не при імпорті;
+            # spawn, бо fork з потоками пулу TTS небезпечний
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        try:
+            sizes = await loop.run_in_executor(
+                self._pool, render_variants, source_path, targets, self.image_format, self.quality
+            )
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error rendering image variants for {source_path}: {e}")
+            return None
+        self.rendered += 1
+        return sizes
+
+    def close(self) -> None:
+        """Зупиняє пул процесів."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+image_processor = ImageProcessor()
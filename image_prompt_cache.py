@@ -0,0 +1,84 @@
+"""Кеш результатів генерації DALL-E за (промпт, розмір, стиль).
+
+Адміністратори часто генерують зображення з тим самим описом, розміром і
+стилем (наприклад, після скасування), а кожен виклик images.generate
+платний і триває 10-30 секунд. Результат генерації зберігається в
+media_store, а ключ файлу - в таблиці image_prompt_cache, тому кеш
+переживає перезапуск. Нова варіація (fresh) оминає кеш і замінює запис.
+"""
+
+import hashlib
+from typing import Dict, Optional
+
+from database import db
+from logger_config import get_logger
+from media_store import MediaStore, media_store
+
+logger = get_logger("openai.cache")
+
+
+def prompt_key(prompt: str, size: str, style: str) -> str:
+    """Повертає ключ кешу; пробіли в промпті нормалізуються."""
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{size}\0{style}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class ImagePromptCache:
+    """Постійний кеш згенерованих зображень з лічильниками влучань."""
+
+    def __init__(self, database, store: MediaStore = media_store):
+        """
+        Args:
+            database: Екземпляр Database (таблиця image_prompt_cache)
+            store: Сховище, в якому лежать зображення
+        """
+        self.database = database
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    async def get(self, prompt: str, size: str, style: str) -> Optional[str]:
+        """Повертає ключ збереженого зображення або None (промах чи помилка БД)."""
+        key = prompt_key(prompt, size, style)
+        try:
+            entry = await self.database.get_image_prompt(key)
+            if entry is not None and entry['image_key'] not in self.store:
+                # Файл видалено з диска: запис більше не придатний
+                logger.warning(f"Cached image {entry['image_key']} is missing, dropping prompt entry")
+                await self.database.delete_image_prompt(key)
+                entry = None
+        except Exception as e:
+            logger.error(f"Error reading image prompt cache: {e}", exc_info=True)
+            return None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_seconds += entry['generation_seconds']
+        logger.info(f"Image prompt cache hit ({size}, {style}), saved {entry['generation_seconds']:.1f}s")
+        return entry['image_key']
+
+    async def put(self, prompt: str, size: str, style: str, image_key: str,
+                  generation_seconds: float) -> None:
+        """Зберігає результат генерації."""
+        try:
+            await self.database.save_image_prompt(
+                prompt_key(prompt, size, style), prompt, size, style, image_key, generation_seconds
+            )
+        except Exception as e:
+            logger.error(f"Error saving image prompt cache entry: {e}", exc_info=True)
+
+    def stats(self) -> Dict[str, float]:
+        """Повертає лічильники кешу з моменту запуску."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+image_prompt_cache = ImagePromptCache(db)
@@ -15,6 +15,8 @@ from keyboards.admin import (
     get_order_status_change_keyboard,
     get_order_detail_keyboard,
     get_orders_list_keyboard,
+    get_admin_users_keyboard,
+    get_admin_products_picker_keyboard,
     get_product_edit_fields_keyboard,
     get_product_field_confirmation_keyboard,
     get_product_detail_keyboard
@@ -46,6 +48,8 @@ __all__ = [
     "get_order_status_change_keyboard",
     "get_order_detail_keyboard",
     "get_orders_list_keyboard",
+    "get_admin_users_keyboard",
+    "get_admin_products_picker_keyboard",
     "get_product_edit_fields_keyboard",
     "get_product_field_confirmation_keyboard",
     "get_product_detail_keyboard",
@@ -1,5 +1,8 @@
+from aiogram.types import InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from keyboards.pagination import add_page_navigation
+
 
 def get_admin_main_keyboard():
     """Головне меню адміністратора."""
@@ -30,6 +33,7 @@ def get_admin_products_keyboard():
     builder.button(text="➕ Додати товар", callback_data="admin_add_product")
     builder.button(text="📝 Редагувати", callback_data="admin_edit_products")
     builder.button(text="🗑 Видалити", callback_data="admin_delete_products")
+    builder.button(text="🔊 Озвучити каталог", callback_data="admin_tts_warmup")
     builder.button(text="◀️ Назад", callback_data="admin_main")
     builder.adjust(2)
     return builder.as_markup()
@@ -144,8 +148,14 @@ def get_order_detail_keyboard(order_id):
     return builder.as_markup()
 
 
-def get_orders_list_keyboard(orders):
-    """Клавіатура зі списком замовлень як інлайн кнопками."""
+def get_orders_list_keyboard(orders, status=None, page=None):
+    """Клавіатура зі списком замовлень як інлайн кнопками.
+    
+    Args:
+        orders: Замовлення поточної сторінки
+        status: Статус замовлень у списку (для кнопок переходу між сторінками)
+        page: Поточна сторінка (pagination.Page)
+    """
     builder = InlineKeyboardBuilder()
     
     for order in orders:
@@ -157,9 +167,45 @@ def get_orders_list_keyboard(orders):
             text=button_text,
             callback_data=f"admin_order_detail:{order_id}"
         )
+    builder.adjust(1)
     
-    builder.button(text="◀️ Назад", callback_data="admin_orders")
+    if status:
+        add_page_navigation(builder, page, f"admin_status_page:{status}:")
+    builder.row(InlineKeyboardButton(text="◀️ Назад", callback_data="admin_orders"))
+    return builder.as_markup()
+
+
+def get_admin_users_keyboard(page=None):
+    """Клавіатура списку користувачів з переходом між сторінками."""
+    builder = InlineKeyboardBuilder()
+    add_page_navigation(builder, page, "admin_users_page:")
+    builder.row(InlineKeyboardButton(text="◀️ Назад", callback_data="admin_main"))
+    return builder.as_markup()
+
+
+def get_admin_products_picker_keyboard(products, action, page=None):
+    """Клавіатура вибору товару для редагування або видалення.
+    
+    Args:
+        products: Товари поточної сторінки
+        action: "edit" або "delete"
+        page: Поточна сторінка (pagination.Page)
+    """
+    icon, callback_prefix = {
+        "edit": ("📦", "admin_edit_product_start:"),
+        "delete": ("❌", "delete_product:"),
+    }[action]
+    
+    builder = InlineKeyboardBuilder()
+    for product in products:
+        builder.button(
+            text=f"{icon} {product['name']} ({product['stock']} шт) - {float(product['price']):.0f} грн",
+            callback_data=f"{callback_prefix}{product['id']}"
+        )
     builder.adjust(1)
+    
+    add_page_navigation(builder, page, f"admin_{action}_products_page:")
+    builder.row(InlineKeyboardButton(text="◀️ Назад", callback_data="admin_products"))
     return builder.as_markup()
 
 
@@ -1,6 +1,8 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from keyboards.pagination import add_page_navigation
+
 
 def get_products_keyboard(products):
     """Створює клавіатуру зі списком товарів."""
@@ -76,18 +78,22 @@ def get_order_confirmation_keyboard():
     return builder.as_markup()
 
 
-def get_my_orders_keyboard():
-    """Створює клавіатуру для перегляду замовлень."""
+def get_my_orders_keyboard(page=None):
+    """Створює клавіатуру для перегляду замовлень.
+    
+    Args:
+        page: Поточна сторінка замовлень (для кнопок переходу між сторінками)
+    """
     builder = InlineKeyboardBuilder()
-    builder.button(
+    add_page_navigation(builder, page, "my_orders_page:")
+    builder.row(InlineKeyboardButton(
         text="🛍 Замовити ще",
         callback_data="back_to_catalog"
-    )
-    builder.button(
+    ))
+    builder.row(InlineKeyboardButton(
         text="🏠 На початок",
         callback_data="back_to_start"
-    )
-    builder.adjust(1)
+    ))
     return builder.as_markup()
 
 
@@ -0,0 +1,27 @@
+from aiogram.types import InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+def add_page_navigation(builder: InlineKeyboardBuilder, page, callback_prefix: str):
+    """Додає рядок кнопок переходу між сторінками списку.
+    
+    Args:
+        builder: Клавіатура, до якої додається рядок
+        page: Сторінка (pagination.Page) з курсорами сусідніх сторінок
+        callback_prefix: Префікс callback_data; курсор додається після нього
+    """
+    if page is None:
+        return
+    buttons = []
+    if page.prev_cursor:
+        buttons.append(InlineKeyboardButton(
+            text="⬅️ Попередня",
+            callback_data=f"{callback_prefix}{page.prev_cursor}"
+        ))
+    if page.next_cursor:
+        buttons.append(InlineKeyboardButton(
+            text="Наступна ➡️",
+            callback_data=f"{callback_prefix}{page.next_cursor}"
+        ))
+    if buttons:
+        builder.row(*buttons)
@@ -0,0 +1,145 @@
+"""Локальне сховище зображень товарів.
+
+URL від DALL-E тимчасовий, тому зображення завантажується один раз і
+зберігається на диску під ключем - хешем вмісту (однакові зображення
+займають один файл). Ключ записується в products.image_key. Після першої
+відправки Telegram повертає file_id, який зберігається в
+products.image_file_id; наступні картки товару відправляються за file_id
+без вихідних HTTP-запитів. Поруч з оригіналом зберігаються зменшені копії
+(image_processing.py); картка товару використовує CARD_VARIANT, альбом
+варіантів генерації - PREVIEW_VARIANT.
+"""
+
+import hashlib
+import os
+from typing import Dict, Optional
+
+import aiohttp
+
+from config import MEDIA_DIR, MEDIA_MAX_BYTES, MEDIA_DOWNLOAD_TIMEOUT
+from http_client import HTTPClient, http_client
+from image_processing import IMAGE_VARIANTS, ImageProcessor, image_processor
+from logger_config import get_logger
+
+logger = get_logger("media.store")
+
+# Копія зображення для картки товару та вибраного адміністратором зображення
+CARD_VARIANT = "medium"
+# Мініатюри для альбому варіантів: адмін лише порівнює їх між собою
+PREVIEW_VARIANT = "thumb"
+
+
+def media_key(data: bytes) -> str:
+    """Повертає ключ файлу для вмісту зображення."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class MediaStore:
+    """Content-addressed сховище зображень на диску."""
+
+    def __init__(self, directory: str = MEDIA_DIR, max_bytes: int = MEDIA_MAX_BYTES,
+                 timeout: float = MEDIA_DOWNLOAD_TIMEOUT, processor: ImageProcessor = image_processor,
+                 variants: Dict[str, int] = IMAGE_VARIANTS, http: HTTPClient = http_client):
+        """
+        Args:
+            directory: Каталог для зображень
+            max_bytes: Максимальний розмір одного зображення
+            timeout: Таймаут завантаження за URL, секунди
+            processor: Пул процесів для зменшених копій
+            variants: Копії зображення: назва -> максимальна сторона, px
+            http: Спільний HTTP-клієнт для завантаження за URL
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.processor = processor
+        self.variants = variants
+        self.http = http
+        self.downloads = 0
+
+    def path(self, key: str, variant: Optional[str] = None) -> str:
+        """Шлях до оригіналу або до зменшеної копії зображення."""
+        name = f"{key}.{variant}.{self.processor.extension}" if variant else key
+        return os.path.join(self.directory, key[:2], name)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def save(self, data: bytes) -> Optional[str]:
+        """Зберігає зображення на диск; повертає його ключ або None при помилці."""
+        key = media_key(data)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error saving image {key}: {e}")
+            return None
+        return key
+
+    def read(self, key: str, variant: Optional[str] = None) -> Optional[bytes]:
+        """Читає зображення (або його копію) з диска; None, якщо файлу немає."""
+        try:
+            with open(self.path(key, variant), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Image {key} is unreadable: {e}")
+            return None
+
+    async def build_variants(self, key: str) -> bool:
+        """Створює зменшені копії збереженого зображення в пулі процесів."""
+        targets = {name: (self.path(key, name), max_side) for name, max_side in self.variants.items()}
+        sizes = await self.processor.render(self.path(key), targets)
+        if sizes is None:
+            return False
+        logger.info(f"Image variants for {key}: {sizes}")
+        return True
+
+    async def read_variant(self, key: str, variant: str = CARD_VARIANT) -> Optional[bytes]:
+        """Повертає копію зображення, за потреби створивши її; якщо не вдалося - оригінал."""
+        data = self.read(key, variant)
+        if data is None and key in self and await self.build_variants(key):
+            data = self.read(key, variant)
+        return data if data is not None else self.read(key)
+
+    async def download(self, url: str) -> Optional[str]:
+        """Завантажує зображення за URL і зберігає його.
+
+        Returns:
+            Ключ збереженого зображення або None, якщо завантажити не вдалося
+        """
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with self.http.session.get(url, timeout=timeout) as response:
+                if response.status != 200:
+                    logger.warning(f"Image download failed with HTTP {response.status}: {url[:80]}")
+                    return None
+                if not response.content_type.startswith("image/"):
+                    logger.warning(f"URL is not an image ({response.content_type}): {url[:80]}")
+                    return None
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    data.extend(chunk)
+                    if len(data) > self.max_bytes:
+                        logger.warning(f"Image exceeds {self.max_bytes} bytes: {url[:80]}")
+                        return None
+        except Exception as e:
+            logger.error(f"Error downloading image {url[:80]}: {e}")
+            return None
+
+        key = self.save(bytes(data))
+        if key:
+            self.downloads += 1
+            logger.info(f"Image stored as {key} ({len(data)} bytes)")
+            await self.build_variants(key)
+        return key
+
+
+media_store = MediaStore()
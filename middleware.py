@@ -116,3 +116,26 @@ class CallbackLoggerMiddleware(BaseMiddleware):
                 exc_info=True
             )
             raise
+
+
+class FSMFlushMiddleware(BaseMiddleware):
+    """Зберігає зміни FSM, накопичені за обробку оновлення, одним записом.
+
+    Реєструється як outer middleware для update, тому виконується всередині
+    FSMContextMiddleware диспетчера і бачить FSMContext поточного оновлення.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: dict[str, Any],
+    ) -> Any:
+        """Обробка оновлення зі збереженням змін FSM наприкінці."""
+        try:
+            return await handler(event, data)
+        finally:
+            state = data.get("state")
+            storage = data.get("fsm_storage")
+            if state is not None and hasattr(storage, "flush"):
+                await storage.flush(state.key)
@@ -0,0 +1,95 @@
+-- Початкова схема БД.
+-- Написана ідемпотентно, щоб її можна було застосувати до бази,
+-- створеної старим init_db (до появи міграцій).
+
+-- Таблиця товарів
+CREATE TABLE IF NOT EXISTS products (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    price NUMERIC(10, 2) NOT NULL,
+    category TEXT NOT NULL,
+    image_url TEXT,
+    stock INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Таблиця користувачів
+CREATE TABLE IF NOT EXISTS users (
+    id BIGINT PRIMARY KEY,
+    username TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    phone TEXT,
+    email TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Таблиця замовлень
+CREATE TABLE IF NOT EXISTS orders (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    user_name TEXT,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER DEFAULT 1,
+    total_price NUMERIC(10, 2) NOT NULL,
+    phone TEXT,
+    email TEXT,
+    status TEXT DEFAULT 'pending',
+    payment_status TEXT DEFAULT 'unpaid',
+    payment_method TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (product_id) REFERENCES products (id)
+);
+
+-- Таблиця платежів
+CREATE TABLE IF NOT EXISTS payments (
+    id SERIAL PRIMARY KEY,
+    order_id INTEGER NOT NULL UNIQUE,
+    user_id BIGINT NOT NULL,
+    amount NUMERIC(10, 2) NOT NULL,
+    currency TEXT DEFAULT 'UAH',
+    payment_method TEXT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    liqpay_payment_id TEXT,
+    liqpay_order_id TEXT,
+    telegram_payment_id TEXT,
+    telegram_provider_payment_id TEXT,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Таблиця логів редагування замовлень
+CREATE TABLE IF NOT EXISTS order_edit_logs (
+    id SERIAL PRIMARY KEY,
+    order_id INTEGER NOT NULL,
+    admin_id BIGINT NOT NULL,
+    field_name TEXT NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE
+);
+
+-- Таблиця логів редагування товарів
+CREATE TABLE IF NOT EXISTS product_edit_logs (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    admin_id BIGINT NOT NULL,
+    field_name TEXT NOT NULL,
+    old_value TEXT,
+    new_value TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+);
+
+-- Колонки, яких не було в ранніх версіях схеми
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS phone TEXT;
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS email TEXT;
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS payment_status TEXT DEFAULT 'unpaid';
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS payment_method TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS phone TEXT;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS email TEXT;
@@ -0,0 +1,15 @@
+-- Початкові товари (лише для порожнього каталогу)
+INSERT INTO products (name, description, price, category, image_url, stock)
+SELECT name, description, price, category, image_url, stock
+FROM (VALUES
+    (1, 'Зимова куртка ''Арктика''', 'Тепла зимова куртка з хутряним коміром', 3500.00, 'Куртки', NULL, 15),
+    (2, 'Пальто класичне', 'Елегантне вовняне пальто для офісу', 4200.00, 'Пальта', NULL, 10),
+    (3, 'Плащ ''Осінній''', 'Водонепроникний плащ для дощової погоди', 2800.00, 'Плащі', NULL, 20),
+    (4, 'Вітрівка спортивна', 'Легка вітрівка для активного відпочинку', 1500.00, 'Вітрівки', NULL, 25),
+    (5, 'Пуховик ''Норд''', 'Ультралегкий пуховик з мембраною', 5500.00, 'Пуховики', NULL, 12),
+    (6, 'Куртка шкіряна', 'Стильна шкіряна куртка', 6000.00, 'Куртки', NULL, 8),
+    (7, 'Пальто вовняне довге', 'Довге пальто з вовни для холодної погоди', 4800.00, 'Пальта', NULL, 7),
+    (8, 'Плащ тренч', 'Класичний тренч бежевого кольору', 3200.00, 'Плащі', NULL, 14)
+) AS initial (position, name, description, price, category, image_url, stock)
+WHERE NOT EXISTS (SELECT 1 FROM products)
+ORDER BY position;
@@ -0,0 +1,27 @@
+-- Індекси для гарячих запитів.
+-- Міграції виконуються в транзакції, тому тут звичайний CREATE INDEX,
+-- а не CONCURRENTLY: на великих таблицях його варто створити вручну заздалегідь.
+
+-- Замовлення користувача (get_user_orders), новіші першими
+CREATE INDEX IF NOT EXISTS idx_orders_user_created
+    ON orders (user_id, created_at, id);
+
+-- Список замовлень адміністратора за статусом (get_orders_by_status)
+CREATE INDEX IF NOT EXISTS idx_orders_status_created
+    ON orders (status, created_at, id);
+
+-- Перевірка зовнішнього ключа при видаленні товару
+CREATE INDEX IF NOT EXISTS idx_orders_product_id
+    ON orders (product_id);
+
+-- Товари категорії в наявності (get_products_by_category, get_categories)
+CREATE INDEX IF NOT EXISTS idx_products_in_stock_category
+    ON products (category, id)
+    WHERE stock > 0;
+
+-- Логи редагування (get_order_edit_logs, get_product_edit_logs)
+CREATE INDEX IF NOT EXISTS idx_order_edit_logs_order_created
+    ON order_edit_logs (order_id, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_product_edit_logs_product_created
+    ON product_edit_logs (product_id, created_at);
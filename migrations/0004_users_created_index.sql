@@ -0,0 +1,3 @@
+-- Індекс для курсорної пагінації списку користувачів (get_users_page)
+CREATE INDEX IF NOT EXISTS idx_users_created
+    ON users (created_at, id);
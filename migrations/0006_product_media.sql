@@ -0,0 +1,3 @@
+-- Локальні зображення товарів (media_store.py): ключ файлу на диску та file_id Telegram
+ALTER TABLE products ADD COLUMN IF NOT EXISTS image_key VARCHAR(64);
+ALTER TABLE products ADD COLUMN IF NOT EXISTS image_file_id TEXT;
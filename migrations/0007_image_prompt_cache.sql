@@ -0,0 +1,12 @@
+-- Збережені результати генерації DALL-E за (промпт, розмір, стиль) (image_prompt_cache.py)
+CREATE TABLE IF NOT EXISTS image_prompt_cache (
+    prompt_hash VARCHAR(64) PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    size VARCHAR(20) NOT NULL,
+    style VARCHAR(20) NOT NULL,
+    image_key VARCHAR(64) NOT NULL,
+    generation_seconds REAL NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,16 @@
+-- Вхідні події LiqPay (payment_events.py): webhook лише записує подію,
+-- фоновий обробник застосовує її до payments/orders
+CREATE TABLE IF NOT EXISTS payment_events (
+    id BIGSERIAL PRIMARY KEY,
+    provider TEXT NOT NULL DEFAULT 'liqpay',
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    locked_until TIMESTAMP,
+    last_error TEXT,
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP
+);
+
+-- Черга необроблених подій для claim_payment_events
+CREATE INDEX IF NOT EXISTS idx_payment_events_pending
+    ON payment_events (id) WHERE processed_at IS NULL;
@@ -0,0 +1,17 @@
+-- Повторні доставки callback LiqPay: одна подія на (payment_id, status)
+ALTER TABLE payment_events
+    ADD COLUMN IF NOT EXISTS liqpay_payment_id TEXT GENERATED ALWAYS AS (payload->>'payment_id') STORED,
+    ADD COLUMN IF NOT EXISTS status TEXT GENERATED ALWAYS AS (payload->>'status') STORED;
+
+-- ADD CONSTRAINT не має IF NOT EXISTS: перевіряємо pg_constraint, щоб міграцію можна було виконати повторно
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'payment_events_liqpay_status_key'
+          AND conrelid = 'payment_events'::regclass
+    ) THEN
+        ALTER TABLE payment_events
+            ADD CONSTRAINT payment_events_liqpay_status_key UNIQUE (liqpay_payment_id, status);
+    END IF;
+END $$;
@@ -0,0 +1,3 @@
+-- Лічильник змін рядка товару: знімок каталогу (catalog_snapshot.py) за ним
+-- відкидає відповіді записів, що прийшли пізніше за новіший запис
+ALTER TABLE products ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT 0;
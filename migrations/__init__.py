@@ -0,0 +1,103 @@
+"""Версійовані міграції схеми БД.
+
+Кожна міграція - SQL-файл з номером версії у назві (0001_initial_schema.sql).
+Застосовані версії зберігаються в таблиці schema_migrations. Теплий старт
+(все вже застосовано) коштує один запит; нові міграції виконуються в одній
+транзакції під advisory lock, тому кілька екземплярів бота можуть
+стартувати одночасно.
+"""
+
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import asyncpg
+
+from logger_config import get_logger
+
+logger = get_logger("aiogram.database")
+
+MIGRATIONS_DIR = Path(__file__).parent
+
+# Довільний, але сталий ключ advisory lock для міграцій цього застосунку
+MIGRATIONS_LOCK_ID = 4_815_162_342
+
+_MIGRATION_FILE_RE = re.compile(r"^(\d+)_[\w-]+\.sql$")
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    """Повертає міграції з каталогу як список (версія, назва, SQL), впорядкований за версією.
+
+    Raises:
+        ValueError: Якщо дві міграції мають однаковий номер версії
+    """
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = _MIGRATION_FILE_RE.match(path.name)
+        if not match:
+            logger.warning(f"Skipping migration file with unexpected name: {path.name}")
+            continue
+        migrations.append((int(match.group(1)), path.stem, path.read_text(encoding="utf-8")))
+
+    migrations.sort(key=lambda m: m[0])
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+async def _applied_versions(conn: asyncpg.Connection) -> Optional[set]:
+    """Повертає застосовані версії або None, якщо таблиці schema_migrations ще немає."""
+    try:
+        rows = await conn.fetch("SELECT version FROM schema_migrations")
+    except asyncpg.UndefinedTableError:
+        return None
+    return {row['version'] for row in rows}
+
+
+async def run_migrations(conn: asyncpg.Connection, directory: Path = MIGRATIONS_DIR) -> List[int]:
+    """Застосовує міграції, яких ще немає в schema_migrations.
+
+    Args:
+        conn: Підключення до БД (не в транзакції)
+        directory: Каталог з SQL-файлами міграцій
+
+    Returns:
+        Список застосованих версій (порожній, якщо схема актуальна)
+    """
+    migrations = load_migrations(directory)
+
+    # Теплий старт: один запит, без блокувань
+    applied = await _applied_versions(conn)
+    if applied is not None and all(version in applied for version, _, _ in migrations):
+        return []
+
+    newly_applied = []
+    async with conn.transaction():
+        # Блокування знімається автоматично разом із завершенням транзакції
+        await conn.execute("SELECT pg_advisory_xact_lock($1)", MIGRATIONS_LOCK_ID)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Інший екземпляр міг застосувати міграції, поки ми чекали на блокування
+        applied = await _applied_versions(conn)
+
+        for version, name, sql in migrations:
+            if version in applied:
+                continue
+            logger.info(f"Applying migration {name}")
+            await conn.execute(sql)
+            await conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+                version, name
+            )
+            newly_applied.append(version)
+
+    if newly_applied:
+        logger.info(f"Applied {len(newly_applied)} migration(s): {newly_applied}")
+    return newly_applied
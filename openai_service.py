@@ -32,12 +32,14 @@ def init_openai() -> AsyncOpenAI:
     return openai_client
 
 
-async def generate_image(
+async def request_image(
     prompt: str,
     size: str = "1024x1024",
     style: str = "vivid"
 ) -> Optional[str]:
-    """Генерує зображення через OpenAI DALL-E 3.
+    """Генерує зображення через OpenAI DALL-E 3, передаючи RateLimitError викликачу.
+    
+    Використовується чергою генерації, яка повторює запит з backoff.
     
     Args:
         prompt: Текстовий опис зображення (10-4000 символів)
@@ -46,6 +48,9 @@ async def generate_image(
     
     Returns:
         URL сгенерованого зображення або None при помилці
+    
+    Raises:
+        RateLimitError: Якщо перевищено ліміт запитів OpenAI
     """
     global openai_client
     
@@ -84,9 +89,8 @@ async def generate_image(
         
         return image_url
         
-    except RateLimitError as e:
-        logger.warning(f"RateLimitError: Перевищено ліміт запитів. Спробуйте пізніше.")
-        return None
+    except RateLimitError:
+        raise
         
     except APIError as e:
         logger.exception(f"OpenAI API помилка: {e}")
@@ -101,6 +105,42 @@ async def generate_image(
         return None
 
 
+async def generate_image(
+    prompt: str,
+    size: str = "1024x1024",
+    style: str = "vivid"
+) -> Optional[str]:
+    """Генерує зображення через OpenAI DALL-E 3.
+    
+    Кеш за промптом, розміром і стилем (ImagePromptCache) тут не перевіряється:
+    він зберігає ключі файлів у media_store, а ця функція повертає тимчасовий
+    URL OpenAI для команди /generate. Зображення товарів генеруються через
+    ImageJobQueue, яка звертається до кешу перед запитом (ImageJobQueue.lookup).
+    
+    Args:
+        prompt: Текстовий опис зображення (10-4000 символів)
+        size: Розмір зображення (1024x1024, 1792x1024, 1024x1792)
+        style: Стиль (vivid або natural)
+    
+    Returns:
+        URL сгенерованого зображення або None при помилці
+    """
+    try:
+        return await request_image(prompt, size, style)
+    except RateLimitError:
+        logger.warning(f"RateLimitError: Перевищено ліміт запитів. Спробуйте пізніше.")
+        return None
+
+
+def get_retry_after(error: RateLimitError) -> Optional[float]:
+    """Повертає затримку з заголовка Retry-After відповіді OpenAI (секунди), якщо вона є."""
+    try:
+        value = error.response.headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
 async def get_available_sizes() -> list[str]:
     """Повертає доступні розміри для DALL-E 3.
     
@@ -0,0 +1,336 @@
+"""Вихідна черга повідомлень Telegram для фонових сповіщень.
+
+Сповіщення, які надсилає не обробник оновлення, а фонова задача
+(наприклад, результат оплати з обробника подій LiqPay), ставляться в
+чергу і не затримують того, хто їх створив. Черга має власний Bot і
+дотримується лімітів Telegram через два token bucket: загальний
+(~30 повідомлень за секунду на бота) і окремий для кожного чату
+(1 повідомлення за секунду). Повідомлення одного чату відправляються по
+черзі, різних чатів - паралельно. При 429 (TelegramRetryAfter) відправка
+призупиняється на retry_after секунд. Кілька редагувань того самого
+повідомлення, що ще чекають у черзі, зливаються в одне - з останнім
+текстом. stats() повертає глибину черги та затримку відправки.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup
+
+from config import (
+    BOT_TOKEN,
+    OUTBOUND_RATE,
+    OUTBOUND_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_BATCH_SIZE,
+    OUTBOUND_MAX_ATTEMPTS,
+)
+from logger_config import get_logger
+
+logger = get_logger("aiogram.outbound")
+
+# Скільки останніх затримок відправки зберігається для stats()
+LATENCY_WINDOW = 1000
+
+
+class TokenBucket:
+    """Token bucket: rate токенів за секунду, не більше capacity в запасі."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Скільки секунд чекати до наступного токена (0 - можна відправляти)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass
+class OutboundMessage:
+    """Повідомлення (або редагування повідомлення) в черзі на відправку."""
+
+    chat_id: int
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+    message_id: Optional[int] = None
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class OutboundQueue:
+    """Черга вихідних повідомлень із загальним і поштучним для чатів лімітом швидкості."""
+
+    def __init__(self, rate: float = OUTBOUND_RATE, burst: float = OUTBOUND_BURST,
+                 chat_rate: float = OUTBOUND_CHAT_RATE, chat_burst: float = OUTBOUND_CHAT_BURST,
+                 batch_size: int = OUTBOUND_BATCH_SIZE, max_attempts: int = OUTBOUND_MAX_ATTEMPTS,
+                 bot: Optional[Bot] = None):
+        """
+        Args:
+            rate: Максимум повідомлень за секунду (на весь бот)
+            burst: Скільки повідомлень можна відправити одразу після паузи
+            chat_rate: Максимум повідомлень за секунду в один чат
+            chat_burst: Скільки повідомлень у чат можна відправити одразу
+            batch_size: Скільки повідомлень відправляється одночасно
+            max_attempts: Максимум спроб одного повідомлення при TelegramRetryAfter
+            bot: Bot для відправки; без нього черга створює власний при start
+        """
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.bot = bot
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.coalesced = 0
+        self._bucket = TokenBucket(rate, burst)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._chats: Dict[int, Deque[OutboundMessage]] = {}
+        # Чати з повідомленнями в черзі: (коли можна відправляти, порядок, chat_id)
+        self._ready: List[Tuple[float, int, int]] = []
+        self._order = itertools.count()
+        self._edits: Dict[Tuple[int, int], OutboundMessage] = {}
+        self._paused_until = 0.0
+        self._depth = 0
+        self._unfinished = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._sending: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._owns_bot = False
+        self._worker_task: Optional[asyncio.Task] = None
+
+    def send_message(self, chat_id: int, text: str,
+                     reply_markup: Optional[InlineKeyboardMarkup] = None) -> int:
+        """Ставить повідомлення в чергу; повертає кількість повідомлень перед ним."""
+        ahead = self._depth
+        self._push(OutboundMessage(chat_id, text, reply_markup))
+        return ahead
+
+    def edit_message_text(self, chat_id: int, message_id: int, text: str,
+                          reply_markup: Optional[InlineKeyboardMarkup] = None) -> int:
+        """Ставить редагування в чергу; ще не відправлене редагування того самого
+        повідомлення замінюється новим текстом. Повертає кількість повідомлень перед ним."""
+        pending = self._edits.get((chat_id, message_id))
+        if pending is not None:
+            pending.text, pending.reply_markup = text, reply_markup
+            self.coalesced += 1
+            return self._depth - 1
+        ahead = self._depth
+        message = OutboundMessage(chat_id, text, reply_markup, message_id=message_id)
+        self._edits[(chat_id, message_id)] = message
+        self._push(message)
+        return ahead
+
+    def stats(self) -> Dict[str, float]:
+        """Глибина черги, лічильники та затримка від постановки в чергу до відправки, секунди."""
+        latencies = sorted(self._latencies)
+        return {
+            "depth": self._depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "coalesced": self.coalesced,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+        }
+
+    def start(self, bot: Optional[Bot] = None) -> None:
+        """Запускає воркер; без bot черга відкриває власний Bot (окрема HTTP-сесія)."""
+        if bot is not None:
+            self.bot = bot
+        if self.bot is None:
+            self.bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+            self._owns_bot = True
+        if self._worker_task is None:
+            self._sending = asyncio.Semaphore(self.batch_size)
+            self._worker_task = asyncio.create_task(self._worker())
+
+    async def close(self) -> None:
+        """Зупиняє воркер; невідправлені повідомлення відкидаються."""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            await asyncio.gather(self._worker_task, return_exceptions=True)
+            self._worker_task = None
+        # Повідомлення, які вже відправляються, завершуються
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._depth:
+            logger.warning(f"Outbound queue closed with {self._depth} unsent message(s)")
+        if self._owns_bot and self.bot is not None:
+            await self.bot.session.close()
+            self.bot = None
+            self._owns_bot = False
+
+    async def join(self) -> None:
+        """Чекає, поки всі повідомлення будуть відправлені."""
+        await self._idle.wait()
+
+    def _push(self, message: OutboundMessage) -> None:
+        chat = self._chats.get(message.chat_id)
+        if chat is None:
+            chat = self._chats[message.chat_id] = deque()
+        if not chat:
+            self._schedule(message.chat_id, time.monotonic())
+        chat.append(message)
+        self._depth += 1
+        self._unfinished += 1
+        self._idle.clear()
+        self._wakeup.set()
+
+    def _schedule(self, chat_id: int, at: float) -> None:
+        heapq.heappush(self._ready, (at, next(self._order), chat_id))
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def _sleep(self, delay: float) -> None:
+        """Чекає delay секунд або нового повідомлення в черзі."""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _worker(self) -> None:
+        while True:
+            # Місце для відправки займається до вибору повідомлення, щоб пауза
+            # після 429 стосувалась і наступного повідомлення
+            await self._sending.acquire()
+            try:
+                message = await self._next_message()
+            except BaseException:
+                self._sending.release()
+                raise
+            task = asyncio.create_task(self._send(message))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _next_message(self) -> OutboundMessage:
+        """Чекає, поки загальний ліміт і ліміт якогось чату дозволять відправку."""
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = time.monotonic()
+            at, _, chat_id = self._ready[0]
+            if at > now:
+                await self._sleep(at - now)
+                continue
+            # Пауза після 429, потім загальний ліміт
+            delay = max(self._paused_until - now, self._bucket.delay(now))
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            chat_bucket = self._chat_bucket(chat_id)
+            chat_delay = chat_bucket.delay(now)
+            if chat_delay > 0:
+                heapq.heapreplace(self._ready, (now + chat_delay, next(self._order), chat_id))
+                continue
+
+            heapq.heappop(self._ready)
+            chat = self._chats[chat_id]
+            message = chat.popleft()
+            if message.message_id is not None:
+                self._edits.pop((chat_id, message.message_id), None)
+            self._bucket.take(now)
+            chat_bucket.take(now)
+            self._depth -= 1
+            if chat:
+                self._schedule(chat_id, now)
+            else:
+                del self._chats[chat_id]
+                self._prune(now)
+            return message
+
+    def _prune(self, now: float) -> None:
+        """Видаляє bucket чатів без повідомлень, які вже повністю відновились."""
+        if len(self._chat_buckets) > 10 * max(1, len(self._chats)) + 100:
+            for chat_id in [c for c, bucket in self._chat_buckets.items()
+                            if c not in self._chats and bucket.full(now)]:
+                del self._chat_buckets[chat_id]
+
+    async def _send(self, message: OutboundMessage) -> None:
+        message.attempts += 1
+        try:
+            if message.message_id is None:
+                await self.bot.send_message(message.chat_id, message.text, reply_markup=message.reply_markup)
+            else:
+                await self.bot.edit_message_text(message.text, chat_id=message.chat_id,
+                                                 message_id=message.message_id,
+                                                 reply_markup=message.reply_markup)
+            self.sent += 1
+            self._latencies.append(time.monotonic() - message.enqueued_at)
+        except TelegramRetryAfter as e:
+            self.rate_limited += 1
+            if message.attempts >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Dropping message to {message.chat_id} after {message.attempts} attempt(s)")
+            else:
+                logger.warning(f"Telegram flood control, pausing outbound queue for {e.retry_after}s")
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                self._retry(message)
+        except TelegramForbiddenError:
+            # Користувач заблокував бота
+            self.failed += 1
+            logger.info(f"Chat {message.chat_id} blocked the bot, message dropped")
+        except (TelegramAPIError, OSError, asyncio.TimeoutError) as e:
+            self.failed += 1
+            logger.error(f"Error sending message to {message.chat_id}: {e}")
+        finally:
+            self._sending.release()
+            self._unfinished -= 1
+            if not self._unfinished:
+                self._idle.set()
+
+    def _retry(self, message: OutboundMessage) -> None:
+        """Повертає повідомлення на початок черги його чату."""
+        if message.message_id is not None:
+            key = (message.chat_id, message.message_id)
+            if key in self._edits:
+                # У черзі вже новіше редагування цього повідомлення
+                self.coalesced += 1
+                return
+            self._edits[key] = message
+        chat = self._chats.get(message.chat_id)
+        if chat is None:
+            chat = self._chats[message.chat_id] = deque()
+            self._schedule(message.chat_id, time.monotonic())
+        chat.appendleft(message)
+        self._depth += 1
+        self._unfinished += 1
+        self._wakeup.set()
+
+
+outbound_queue = OutboundQueue()
@@ -0,0 +1,94 @@
+"""Курсорна (keyset) пагінація списків.
+
+Сторінка вибирається умовою за ключем сортування `(created_at, id)` замість
+OFFSET, тому вартість запиту не залежить від глибини історії. Позиція
+передається в callback_data як короткий рядковий курсор:
+
+    n<мікросекунди>.<id>  - наступна сторінка (після цього рядка)
+    p<мікросекунди>.<id>  - попередня сторінка (перед цим рядком)
+
+Для списків, впорядкованих лише за id, мікросекунди порожні: `n.42`.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Позиція в списку: ключ рядка та напрямок переходу від нього."""
+
+    id: int
+    created_at: Optional[datetime] = None
+    backward: bool = False
+
+    def encode(self) -> str:
+        """Кодує курсор у рядок для callback_data (без двокрапок)."""
+        micros = "" if self.created_at is None else str((self.created_at - _EPOCH) // _MICROSECOND)
+        return f"{'p' if self.backward else 'n'}{micros}.{self.id}"
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        """Розбирає рядок курсора.
+
+        Raises:
+            ValueError: Якщо рядок не є курсором
+        """
+        if not token or token[0] not in "np" or "." not in token:
+            raise ValueError(f"Invalid cursor: {token!r}")
+        micros, _, row_id = token[1:].partition(".")
+        created_at = _EPOCH + int(micros) * _MICROSECOND if micros else None
+        return cls(id=int(row_id), created_at=created_at, backward=token[0] == "p")
+
+
+@dataclass(frozen=True)
+class Page:
+    """Сторінка списку з курсорами сусідніх сторінок (None - сторінки немає)."""
+
+    items: List[Dict] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def build_page(rows: Sequence[Any], limit: int, position: Optional[Cursor],
+               key: Callable[[Dict], Tuple[Optional[datetime], int]]) -> Page:
+    """Збирає сторінку з вибірки до limit + 1 рядків у напрямку переходу.
+
+    Args:
+        rows: Рядки в порядку обходу (для переходу назад - у зворотному)
+        limit: Розмір сторінки; зайвий рядок означає, що далі є ще сторінка
+        position: Курсор, від якого вибирали (None - перша сторінка)
+        key: Повертає (created_at, id) рядка
+    """
+    backward = position is not None and position.backward
+    has_more = len(rows) > limit
+    items = [dict(row) for row in rows[:limit]]
+    if backward:
+        items.reverse()
+    if not items:
+        return Page()
+
+    has_next = True if backward else has_more
+    has_prev = has_more if backward else position is not None
+
+    first_created, first_id = key(items[0])
+    last_created, last_id = key(items[-1])
+    return Page(
+        items=items,
+        next_cursor=Cursor(last_id, last_created).encode() if has_next else None,
+        prev_cursor=Cursor(first_id, first_created, backward=True).encode() if has_prev else None,
+    )
+
+
+def parse_cursor(token: Optional[str]) -> Optional[Cursor]:
+    """Розбирає курсор з callback_data; некоректний курсор означає першу сторінку."""
+    if not token:
+        return None
+    try:
+        return Cursor.decode(token)
+    except ValueError:
+        return None
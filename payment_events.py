@@ -0,0 +1,274 @@
+"""Background processing of LiqPay callbacks stored in the payment_events inbox.
+
+The webhook only verifies the signature, inserts the decoded payload into
+payment_events and answers 200, so its latency does not depend on the
+payments/orders updates. This processor drains the inbox in batches: a
+batch is claimed with FOR UPDATE SKIP LOCKED (several bot processes can
+run it side by side) and reserved for a lease; an event whose processing
+fails or whose worker dies is claimed again after the lease expires, so
+no callback is lost.
+
+LiqPay retries callbacks, so processing is idempotent: a repeated
+(payment_id, status) is answered from an in-memory cache of recent
+events or rejected by the unique constraint on payment_events, and a
+payment status only moves forward (a late "processing" never
+overwrites "success"). When a payment becomes successful or fails, the
+buyer is notified through the outbound message queue.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    PAYMENT_EVENTS_BATCH_SIZE,
+    PAYMENT_EVENTS_POLL_INTERVAL,
+    PAYMENT_EVENTS_LEASE,
+    PAYMENT_EVENTS_MAX_ATTEMPTS,
+    PAYMENT_EVENTS_DEDUPE_SIZE,
+)
+from database import db
+from keyboards import get_payment_retry_keyboard
+from logger_config import get_logger
+from outbound import OutboundQueue, outbound_queue
+
+logger = get_logger("aiogram.payments.events")
+
+# Order of payment statuses; other LiqPay statuses (processing, wait_*, *_verify) are 1.
+# success ranks above failure/error: the buyer may retry a failed payment and pay.
+PAYMENT_STATUS_RANK = {
+    "pending": 0,
+    "init": 0,
+    "failure": 2,
+    "error": 2,
+    # cancelled by the buyer in the bot; expired by payment reconciliation
+    "cancelled": 2,
+    "expired": 2,
+    "success": 3,
+    "reversed": 4,
+}
+
+
+def status_rank(status: str) -> int:
+    """Position of a payment status in the payment lifecycle."""
+    return PAYMENT_STATUS_RANK.get(status, 1)
+
+
+# orders.payment_status set by a payment status
+ORDER_PAYMENT_STATUSES = {"success": "paid", "failure": "failed"}
+
+
+def blocking_statuses(status: str) -> List[str]:
+    """Statuses from which a payment must not move to the given status."""
+    rank = status_rank(status)
+    return sorted({status} | {known for known, known_rank in PAYMENT_STATUS_RANK.items() if known_rank >= rank})
+
+
+def notify_payment_result(outbox: OutboundQueue, user_id: int, order_id: int, status: str) -> None:
+    """Queues the success or failure message for the buyer (other statuses are silent)."""
+    if status == "success":
+        outbox.send_message(
+            user_id,
+            f"✅ Оплату замовлення #{order_id} отримано!\n\n"
+            f"Дякуємо за покупку. Ми зв'яжемося з вами для підтвердження доставки."
+        )
+    elif status == "failure":
+        outbox.send_message(
+            user_id,
+            f"❌ Оплата замовлення #{order_id} не пройшла.\n\n"
+            f"Спробуйте оплатити ще раз або скасуйте замовлення.",
+            reply_markup=get_payment_retry_keyboard()
+        )
+
+
+def event_key(payload: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Deduplication key of a callback or None if it has no payment_id."""
+    if payload.get('payment_id') is None:
+        return None
+    return str(payload['payment_id']), str(payload.get('status'))
+
+
+class RecentEvents:
+    """LRU set of recently received (payment_id, status) pairs."""
+
+    def __init__(self, size: int = PAYMENT_EVENTS_DEDUPE_SIZE):
+        self.size = size
+        self._keys: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def add(self, key: Tuple[str, str]) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.size:
+            self._keys.popitem(last=False)
+
+
+class PaymentEventProcessor:
+    """Drains payment_events and applies callbacks to payments and orders."""
+
+    def __init__(self, database, batch_size: int = PAYMENT_EVENTS_BATCH_SIZE,
+                 poll_interval: float = PAYMENT_EVENTS_POLL_INTERVAL,
+                 lease: int = PAYMENT_EVENTS_LEASE, max_attempts: int = PAYMENT_EVENTS_MAX_ATTEMPTS,
+                 dedupe_size: int = PAYMENT_EVENTS_DEDUPE_SIZE, outbox: OutboundQueue = outbound_queue):
+        """
+        Args:
+            database: Database instance (payment_events, payments, orders tables)
+            batch_size: How many events are claimed at once
+            poll_interval: How often the table is checked without a local wakeup, seconds
+            lease: How long a claimed event is reserved for this worker, seconds
+            max_attempts: Attempts after which an event is left for manual review
+            dedupe_size: How many recent (payment_id, status) pairs are kept in memory
+            outbox: Queue for buyer notifications
+        """
+        self.database = database
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.outbox = outbox
+        self.processed = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.recent = RecentEvents(dedupe_size)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_duplicate(self, payload: Dict[str, Any]) -> bool:
+        """Checks the in-memory cache of events received by this process."""
+        key = event_key(payload)
+        if key is not None and key in self.recent:
+            self.duplicates += 1
+            return True
+        return False
+
+    async def receive(self, payload: Dict[str, Any]) -> Optional[int]:
+        """Stores a verified callback and wakes the worker up.
+
+        Returns:
+            Event ID or None for a repeated delivery
+
+        Raises:
+            Exception: Database errors (the callback must be retried by LiqPay)
+        """
+        if self.is_duplicate(payload):
+            return None
+        event_id = await self.database.add_payment_event(payload)
+        key = event_key(payload)
+        if key is not None:
+            self.recent.add(key)
+        if event_id is None:
+            self.duplicates += 1
+        else:
+            self.notify()
+        return event_id
+
+    def notify(self) -> None:
+        """Wakes the worker up after a new event was stored by this process."""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Starts the background worker."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stops the background worker; unfinished events stay in the inbox."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def process_batch(self) -> int:
+        """Claims and processes one batch of events; returns how many were claimed."""
+        events = await self.database.claim_payment_events(self.batch_size, self.lease, self.max_attempts)
+        done = []
+        for event in events:
+            try:
+                await self.apply(event['payload'])
+                done.append(event['id'])
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing payment event #{event['id']} "
+                             f"(attempt {event['attempts']}/{self.max_attempts}): {e}", exc_info=True)
+                await self.database.fail_payment_event(event['id'], str(e))
+        await self.database.complete_payment_events(done)
+        self.processed += len(done)
+        if events:
+            logger.info(f"Processed {len(done)}/{len(events)} payment event(s)")
+        return len(events)
+
+    async def apply(self, payload: Dict[str, Any]) -> None:
+        """Applies one LiqPay callback to the payment and order records.
+
+        Raises:
+            RuntimeError: If the records could not be updated (the event is retried)
+        """
+        status = payload.get('status')
+        order_id = int(payload['order_id'])
+        # LiqPay sends payment_id as a number; payments.liqpay_payment_id is TEXT
+        liqpay_payment_id = str(payload['payment_id']) if payload.get('payment_id') is not None else None
+
+        settled = await self._settle(order_id, status, liqpay_payment_id)
+        if settled is None:
+            payment = await self.database.get_payment_by_order(order_id)
+            if payment:
+                self.stale += 1
+                logger.info(f"Ignoring {status} for order #{order_id}: payment is already {payment['status']}")
+                return
+            if not await self._create_payment(order_id, payload):
+                return
+            settled = await self._settle(order_id, status, liqpay_payment_id)
+            if settled is None:
+                raise RuntimeError(f"payment for order #{order_id} was not settled")
+        logger.info(f"Payment #{settled['payment_id']} for order #{order_id} moved to {status}")
+        notify_payment_result(self.outbox, settled['user_id'], order_id, status)
+
+    async def _settle(self, order_id: int, status: str, liqpay_payment_id: Optional[str]) -> Optional[Dict]:
+        return await self.database.settle_payment(
+            order_id, status, liqpay_payment_id, blocking_statuses(status), ORDER_PAYMENT_STATUSES.get(status)
+        )
+
+    async def _create_payment(self, order_id: int, payload: Dict[str, Any]) -> bool:
+        """Creates the missing pending payment record of an order (failsafe)."""
+        logger.warning(f"No payment record found for order_id: {order_id}")
+        order = await self.database.get_order(order_id)
+        if not order:
+            logger.warning(f"Ignoring payment event for unknown order #{order_id}")
+            return False
+        payment_id = await self.database.create_payment_record(
+            order_id=order_id,
+            user_id=order['user_id'],
+            amount=float(payload.get('amount') or order['total_price']),
+            currency=payload.get('currency') or "UAH",
+            payment_method="liqpay"
+        )
+        if payment_id is None:
+            raise RuntimeError(f"payment record for order #{order_id} was not created")
+        logger.info(f"Created payment record #{payment_id} for order #{order_id}")
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error claiming payment events: {e}", exc_info=True)
+                claimed = 0
+            if claimed < self.batch_size:
+                # Inbox drained: wait for a local webhook or for the next poll
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+payment_events = PaymentEventProcessor(db)
@@ -0,0 +1,150 @@
+"""Periodic reconciliation of LiqPay payments whose callback was lost.
+
+A payment that has not reached a final status some minutes after it was
+created is looked up through the LiqPay status API. Stale payments are
+selected in keyset batches; the status requests of a batch run
+concurrently (bounded by a semaphore) over the shared HTTP session, and
+the statuses LiqPay reports are applied with one bulk statement using the
+same monotonic rules (and buyer notifications) as the webhook pipeline.
+Abandoned checkouts never get a status from LiqPay, so payments older than
+max_age_minutes are marked expired and are no longer polled.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from config import (
+    PAYMENT_RECONCILE_INTERVAL,
+    PAYMENT_RECONCILE_STALE_MINUTES,
+    PAYMENT_RECONCILE_MAX_AGE_MINUTES,
+    PAYMENT_RECONCILE_BATCH_SIZE,
+    PAYMENT_RECONCILE_CONCURRENCY,
+)
+from database import db
+from logger_config import get_logger
+from outbound import OutboundQueue, outbound_queue
+from payment_events import ORDER_PAYMENT_STATUSES, PAYMENT_STATUS_RANK, blocking_statuses, notify_payment_result
+from payments.liqpay_service import LiqPayService, liqpay_service
+
+logger = get_logger("aiogram.payments.reconciliation")
+
+# Statuses after which a payment needs no reconciliation
+FINAL_STATUSES = [status for status, rank in PAYMENT_STATUS_RANK.items() if rank >= 2]
+
+
+class PaymentReconciler:
+    """Queries LiqPay for stale payments and applies their real status."""
+
+    def __init__(self, database, liqpay: LiqPayService = liqpay_service,
+                 interval: float = PAYMENT_RECONCILE_INTERVAL,
+                 stale_minutes: int = PAYMENT_RECONCILE_STALE_MINUTES,
+                 max_age_minutes: int = PAYMENT_RECONCILE_MAX_AGE_MINUTES,
+                 batch_size: int = PAYMENT_RECONCILE_BATCH_SIZE,
+                 concurrency: int = PAYMENT_RECONCILE_CONCURRENCY,
+                 outbox: OutboundQueue = outbound_queue):
+        """
+        Args:
+            database: Database instance (payments, orders tables)
+            liqpay: LiqPay client used for status requests
+            interval: Pause between reconciliation runs, seconds
+            stale_minutes: Payment age after which its status is requested, minutes
+            max_age_minutes: Payment age after which it is marked expired, minutes
+            batch_size: How many payments are selected and checked at once
+            concurrency: How many status requests run at the same time
+            outbox: Queue for buyer notifications
+        """
+        self.database = database
+        self.liqpay = liqpay
+        self.interval = interval
+        self.stale_minutes = stale_minutes
+        self.max_age_minutes = max_age_minutes
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.outbox = outbox
+        self.last_run: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts periodic reconciliation."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stops periodic reconciliation."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Reconciles all stale payments.
+
+        Returns:
+            Run statistics: expired, checked, updated, failed (no answer from
+            LiqPay), settled (changed payments with order_id and user_id),
+            seconds, rate
+        """
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats: Dict[str, Any] = {"checked": 0, "updated": 0, "failed": 0, "settled": []}
+        stats["expired"] = await self.database.expire_stale_payments(self.max_age_minutes, FINAL_STATUSES)
+        if stats["expired"]:
+            logger.info(f"{stats['expired']} payment(s) older than {self.max_age_minutes} min marked expired")
+        after_id = 0
+        while True:
+            payments = await self.database.get_stale_payments(
+                self.stale_minutes, FINAL_STATUSES, after_id=after_id, limit=self.batch_size
+            )
+            if not payments:
+                break
+            after_id = payments[-1]['id']
+
+            results = await asyncio.gather(*(self._check(payment, semaphore) for payment in payments))
+            settlements = [result for result in results if result is not None]
+            settled = await self.database.settle_payments(settlements)
+            statuses = {settlement[0]: settlement[1] for settlement in settlements}
+            for row in settled:
+                notify_payment_result(self.outbox, row['user_id'], row['order_id'], statuses[row['order_id']])
+
+            stats["checked"] += len(payments)
+            stats["failed"] += len(payments) - len(settlements)
+            stats["updated"] += len(settled)
+            stats["settled"] += settled
+            elapsed = time.monotonic() - started
+            logger.info(f"Reconciled {stats['checked']} payment(s), {stats['updated']} updated, "
+                        f"{stats['checked'] / elapsed:.1f}/s")
+            if len(payments) < self.batch_size:
+                break
+
+        stats["seconds"] = time.monotonic() - started
+        stats["rate"] = stats["checked"] / stats["seconds"] if stats["seconds"] else 0.0
+        if stats["checked"]:
+            logger.info(f"Payment reconciliation done: {stats['checked']} checked, {stats['updated']} updated, "
+                        f"{stats['failed']} without status in {stats['seconds']:.1f}s ({stats['rate']:.1f}/s)")
+        self.last_run = stats
+        return stats
+
+    async def _check(self, payment: Dict, semaphore: asyncio.Semaphore) -> Optional[tuple]:
+        """Requests the payment status; returns a settle_payments tuple or None."""
+        async with semaphore:
+            result = await self.liqpay.check_payment_status(str(payment['order_id']))
+        # Unknown orders come back as an error without payment_id
+        if not result or not result.get('payment_id') or not result.get('status'):
+            return None
+        status = result['status']
+        return (payment['order_id'], status, str(result['payment_id']), blocking_statuses(status),
+                ORDER_PAYMENT_STATUSES.get(status))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reconciling payments: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+
+payment_reconciler = PaymentReconciler(db)
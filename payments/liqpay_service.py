@@ -13,6 +13,7 @@ from config import (
     LIQPAY_CURRENCY,
     LIQPAY_CALLBACK_URL
 )
+from http_client import HTTPClient, http_client
 from logger_config import get_logger
 
 logger = get_logger("aiogram.payments.liqpay")
@@ -21,7 +22,12 @@ logger = get_logger("aiogram.payments.liqpay")
 class LiqPayService:
     """Service for LiqPay payment integration."""
     
-    def __init__(self):
+    def __init__(self, http: HTTPClient = http_client):
+        """
+        Args:
+            http: Shared HTTP client (connection pool for LiqPay API calls)
+        """
+        self.http = http
         self.public_key = LIQPAY_PUBLIC_KEY
         self.private_key = LIQPAY_PRIVATE_KEY
         self.api_url = LIQPAY_API_URL
@@ -164,19 +170,18 @@ class LiqPayService:
             signature = self._generate_signature(data_encoded)
             
             # Send request to LiqPay API
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.api_url}request",
-                    data={"data": data_encoded, "signature": signature},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"Payment status checked - Order: {liqpay_order_id}")
-                        return result
-                    else:
-                        logger.error(f"LiqPay API error: {response.status}")
-                        return None
+            async with self.http.session.post(
+                f"{self.api_url}request",
+                data={"data": data_encoded, "signature": signature},
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    logger.info(f"Payment status checked - Order: {liqpay_order_id}")
+                    return result
+                else:
+                    logger.error(f"LiqPay API error: {response.status}")
+                    return None
         except Exception as e:
             logger.error(f"Error checking payment status: {e}", exc_info=True)
             return None
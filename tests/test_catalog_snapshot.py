@@ -0,0 +1,246 @@
+"""Тести для знімка каталогу в пам'яті (catalog_snapshot.py)."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from catalog_snapshot import CatalogSnapshot, CatalogCache
+
+
+def make_product(product_id, category="Куртки", stock=5, **kwargs):
+    """Допоміжна функція для створення рядка товару."""
+    product = {
+        'id': product_id,
+        'name': f"Product {product_id}",
+        'description': "Test",
+        'price': 100,
+        'category': category,
+        'image_url': None,
+        'stock': stock,
+    }
+    product.update(kwargs)
+    return product
+
+
+class TestCatalogSnapshot:
+    """Тести для незмінного знімка каталогу."""
+
+    def test_build_indexes(self):
+        """Тест побудови індексів знімка."""
+        snapshot = CatalogSnapshot.build(1, [
+            make_product(3, "Пальта"),
+            make_product(1, "Куртки"),
+            make_product(2, "Куртки"),
+            make_product(4, "Плащі", stock=0),
+        ])
+
+        assert snapshot.version == 1
+        assert [p['id'] for p in snapshot.get_all_products()] == [1, 2, 3]
+        assert snapshot.get_categories() == ["Куртки", "Пальта"]
+        assert snapshot.get_category_counts() == [("Куртки", 2), ("Пальта", 1)]
+        assert [p['id'] for p in snapshot.get_products_by_category("Куртки")] == [1, 2]
+        assert snapshot.get_products_by_category("Плащі") == []
+        # Товар без залишку доступний за ID, але не в списках
+        assert snapshot.get_product_by_id(4)['stock'] == 0
+        assert snapshot.get_product_by_id(999) is None
+
+    def test_snapshot_is_immutable(self):
+        """Тест що зміни повернутих даних не впливають на знімок."""
+        snapshot = CatalogSnapshot.build(1, [make_product(1)])
+
+        product = snapshot.get_product_by_id(1)
+        product['name'] = "Changed"
+        snapshot.get_all_products()[0]['stock'] = 0
+
+        assert snapshot.get_product_by_id(1)['name'] == "Product 1"
+        assert snapshot.get_all_products()[0]['stock'] == 5
+        with pytest.raises(TypeError):
+            snapshot.by_id[1]['name'] = "Changed"
+
+    def test_with_product_creates_new_version(self):
+        """Тест що оновлення товару створює новий знімок."""
+        snapshot = CatalogSnapshot.build(1, [make_product(1), make_product(2)])
+
+        updated = snapshot.with_product(2, make_product(2, stock=0))
+        added = updated.with_product(3, make_product(3, "Пальта"))
+
+        assert snapshot.get_product_by_id(2)['stock'] == 5
+        assert updated.version == 2
+        assert updated.get_category_counts() == [("Куртки", 1)]
+        assert added.version == 3
+        assert added.get_categories() == ["Куртки", "Пальта"]
+
+    def test_get_products_from(self):
+        """Тест вибірки сторінки товарів у наявності від позиції."""
+        snapshot = CatalogSnapshot.build(1, [
+            make_product(i, stock=0 if i == 3 else 5) for i in range(1, 7)
+        ])
+
+        assert [p['id'] for p in snapshot.get_products_from(None, 3)] == [1, 2, 4]
+        assert [p['id'] for p in snapshot.get_products_from(2, 3)] == [4, 5, 6]
+        assert [p['id'] for p in snapshot.get_products_from(5, 3, backward=True)] == [4, 2, 1]
+        assert snapshot.get_products_from(6, 3) == []
+
+    def test_without_product(self):
+        """Тест видалення товару зі знімка."""
+        snapshot = CatalogSnapshot.build(1, [make_product(1), make_product(2)])
+
+        removed = snapshot.without_product(2, 1)
+
+        assert removed.get_product_by_id(1) is None
+        assert snapshot.get_product_by_id(1) is not None
+
+
+class TestCatalogCache:
+    """Тести для кешу знімків з версіонуванням."""
+
+    @pytest.mark.asyncio
+    async def test_loads_once(self):
+        """Тест що знімок завантажується лише один раз."""
+        cache = CatalogCache()
+        loader = AsyncMock(return_value=[make_product(1)])
+
+        first = await cache.get(loader)
+        second = await cache.get(loader)
+
+        assert first is second
+        loader.assert_awaited_once()
+        assert cache.loads == 1
+
+    @pytest.mark.asyncio
+    async def test_apply_product_patches_in_place(self):
+        """Тест що запис латає знімок без перезавантаження."""
+        cache = CatalogCache()
+        loader = AsyncMock(return_value=[make_product(1)])
+        await cache.get(loader)
+
+        cache.apply_product(make_product(1, stock=0))
+        cache.apply_product(make_product(2))
+        snapshot = await cache.get(loader)
+
+        loader.assert_awaited_once()
+        assert snapshot.version == cache.version == 2
+        assert [p['id'] for p in snapshot.get_all_products()] == [2]
+
+    @pytest.mark.asyncio
+    async def test_stock_decrement_out_of_order(self):
+        """Тест що запізніле списання не повертає більший залишок."""
+        cache = CatalogCache()
+        await cache.get(AsyncMock(return_value=[make_product(1, stock=10, row_version=0)]))
+
+        cache.apply_product(make_product(1, stock=8, row_version=2))
+        cache.apply_product(make_product(1, stock=9, row_version=1))
+
+        assert cache.snapshot.get_product_by_id(1)['stock'] == 8
+        assert cache.snapshot.version == cache.version
+
+    @pytest.mark.asyncio
+    async def test_restock_not_overwritten_by_late_order(self):
+        """Тест що запізніла відповідь замовлення не скасовує поповнення залишку."""
+        cache = CatalogCache()
+        await cache.get(AsyncMock(return_value=[make_product(1, stock=3, row_version=0)]))
+
+        # Замовлення (3 -> 2) закомічене раніше за поповнення, але відповідь прийшла пізніше
+        cache.apply_product(make_product(1, stock=10, row_version=2))
+        cache.apply_product(make_product(1, stock=2, row_version=1))
+
+        assert cache.snapshot.get_product_by_id(1)['stock'] == 10
+
+    @pytest.mark.asyncio
+    async def test_invalidate_reloads(self):
+        """Тест що invalidate змушує перезавантажити знімок."""
+        cache = CatalogCache()
+        loader = AsyncMock(return_value=[make_product(1)])
+        await cache.get(loader)
+
+        cache.invalidate()
+        assert cache.snapshot is None
+        await cache.get(loader)
+
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry_reloads(self):
+        """Тест що застарілий за TTL знімок перезавантажується."""
+        cache = CatalogCache(ttl=60)
+        loader = AsyncMock(return_value=[make_product(1)])
+        snapshot = await cache.get(loader)
+
+        # Імітуємо старий знімок
+        object.__setattr__(snapshot, 'loaded_at', snapshot.loaded_at - 61)
+        await cache.get(loader)
+
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_write_during_load_is_not_cached(self):
+        """Тест що знімок, завантажений паралельно із записом, не кешується."""
+        cache = CatalogCache()
+
+        async def loader():
+            cache.apply_product(make_product(2))
+            return [make_product(1)]
+
+        snapshot = await cache.get(loader)
+
+        assert snapshot.get_product_by_id(2) is None
+        assert cache.snapshot is None
+
+
+class TestDatabaseCatalogSnapshot:
+    """Тести читання каталогу через Database зі знімка."""
+
+    @pytest.mark.asyncio
+    async def test_browsing_does_not_hit_db(self, db_clean, product_factory):
+        """Тест що прогрітий каталог читається без звернень до БД."""
+        product = await product_factory.create(name="Snapshot Coat", category="Snapshot", stock=3)
+        await db_clean.get_all_products()
+
+        pool = db_clean.pool
+        db_clean.pool = MagicMock()
+        db_clean.pool.acquire.side_effect = AssertionError("DB should not be queried")
+        try:
+            assert any(p['id'] == product['id'] for p in await db_clean.get_all_products())
+            assert "Snapshot" in await db_clean.get_categories()
+            assert ("Snapshot", 1) in await db_clean.get_category_counts()
+            assert (await db_clean.get_products_by_category("Snapshot"))[0]['name'] == "Snapshot Coat"
+            assert (await db_clean.get_product_by_id(product['id']))['stock'] == 3
+        finally:
+            db_clean.pool = pool
+
+    @pytest.mark.asyncio
+    async def test_writes_update_snapshot(self, db_clean, product_factory, user_factory):
+        """Тест що записи через Database одразу видно в знімку."""
+        product = await product_factory.create(category="Snapshot", stock=2)
+        user = await user_factory.create()
+        version = db_clean.catalog.version
+
+        await db_clean.update_product(product['id'], name="Renamed")
+        assert (await db_clean.get_product_by_id(product['id']))['name'] == "Renamed"
+
+        await db_clean.create_order(user['id'], "Test", product['id'], quantity=2)
+        assert (await db_clean.get_product_by_id(product['id']))['stock'] == 0
+        assert (await db_clean.get_product_by_id(product['id']))['row_version'] == 2
+        assert "Snapshot" not in await db_clean.get_categories()
+
+        assert db_clean.catalog.version > version
+        assert db_clean.catalog.loads == 1
+
+    @pytest.mark.asyncio
+    async def test_snapshot_matches_sql(self, db_clean, product_factory):
+        """Тест що знімок повертає ті ж дані, що й SQL-запити."""
+        await product_factory.create_batch(3, category="Snapshot")
+        await product_factory.create(category="Snapshot Empty", stock=0)
+
+        cached = (
+            await db_clean.get_all_products(),
+            await db_clean.get_category_counts(),
+            await db_clean.get_products_by_category("Snapshot"),
+        )
+        db_clean.catalog.enabled = False
+        direct = (
+            await db_clean.get_all_products(),
+            await db_clean.get_category_counts(),
+            await db_clean.get_products_by_category("Snapshot"),
+        )
+
+        assert cached == direct
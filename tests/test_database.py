@@ -58,7 +58,31 @@ class TestDatabase:
             assert isinstance(products, list)
             if products:
                 assert all(p['category'] == category for p in products)
-    
+
+    @pytest.mark.asyncio
+    async def test_get_category_counts(self, db_clean, product_factory):
+        """Тест отримання категорій з кількістю товарів одним запитом."""
+        await product_factory.create(category="Count Test A", stock=5)
+        await product_factory.create(category="Count Test A", stock=1)
+        await product_factory.create(category="Count Test B", stock=3)
+        # Товари без залишку не враховуються
+        await product_factory.create(category="Count Test B", stock=0)
+        await product_factory.create(category="Count Test C", stock=0)
+
+        counts = await db_clean.get_category_counts()
+        counts_by_category = dict(counts)
+
+        assert counts_by_category["Count Test A"] == 2
+        assert counts_by_category["Count Test B"] == 1
+        assert "Count Test C" not in counts_by_category
+
+        # Результат збігається з N+1 підрахунком через get_products_by_category
+        for category, count in counts:
+            assert count == len(await db_clean.get_products_by_category(category))
+
+        # Відсортовано за кількістю (спадаючи)
+        assert [c for _, c in counts] == sorted((c for _, c in counts), reverse=True)
+
     @pytest.mark.asyncio
     async def test_add_user(self, db_clean, user_factory):
         """Тест додавання користувача."""
@@ -101,6 +125,45 @@ class TestDatabase:
         updated_product = await db_clean.get_product_by_id(product['id'])
         assert updated_product['stock'] == initial_stock - 1
     
+    @pytest.mark.asyncio
+    async def test_create_order_insufficient_stock(self, db_clean, product_factory):
+        """Тест що замовлення більшої кількості, ніж є на складі, не створюється."""
+        product = await product_factory.create(stock=2, price=150.00)
+
+        assert await db_clean.create_order(1, "Test", product['id'], quantity=3) is None
+        assert await db_clean.create_order(1, "Test", 99999) is None
+
+        order_id = await db_clean.create_order(1, "Test", product['id'], quantity=2)
+        async with db_clean.pool.acquire() as conn:
+            order = await conn.fetchrow("SELECT * FROM orders WHERE id = $1", order_id)
+        assert float(order['total_price']) == 300.00
+        assert (await db_clean.get_product_by_id(product['id']))['stock'] == 0
+
+    @pytest.mark.asyncio
+    async def test_create_order_concurrent_no_oversell(self, db_clean, product_factory):
+        """Стрес-тест: 1000 одночасних замовлень на залишок 50 без перепродажу."""
+        stock = 50
+        attempts = 1000
+        product = await product_factory.create(stock=stock)
+
+        results = await asyncio.gather(*(
+            db_clean.create_order(1000 + i, "Stress", product['id'])
+            for i in range(attempts)
+        ))
+
+        created = [order_id for order_id in results if order_id]
+        assert len(created) == stock
+        assert len(set(created)) == stock
+
+        async with db_clean.pool.acquire() as conn:
+            db_stock = await conn.fetchval("SELECT stock FROM products WHERE id = $1", product['id'])
+            orders_count = await conn.fetchval(
+                "SELECT COUNT(*) FROM orders WHERE product_id = $1", product['id']
+            )
+        assert db_stock == 0
+        assert orders_count == stock
+        assert (await db_clean.get_product_by_id(product['id']))['stock'] == 0
+
     @pytest.mark.asyncio
     async def test_get_user_orders(self, db_clean, user_factory, product_factory, order_factory):
         """Тест отримання замовлень користувача."""
@@ -120,6 +183,94 @@ class TestDatabase:
         assert isinstance(orders, list)
         assert len(orders) > 0
         assert orders[0]['user_id'] == user['id']
+
+    @pytest.mark.asyncio
+    async def test_get_orders_by_status(self, db_clean, user_factory, product_factory, order_factory):
+        """Тест отримання останніх замовлень зі статусом."""
+        user = await user_factory.create(first_name="Status")
+        product = await product_factory.create(stock=10)
+        first = await order_factory.create(user_id=user['id'], product_id=product['id'])
+        second = await order_factory.create(user_id=user['id'], product_id=product['id'])
+        await db_clean.update_order_status(first['id'], "confirmed")
+
+        orders = (await db_clean.get_orders_by_status("pending", limit=50)).items
+        ids = [order['id'] for order in orders]
+
+        assert second['id'] in ids
+        assert first['id'] not in ids
+        assert all(order['status'] == "pending" for order in orders)
+        found = next(order for order in orders if order['id'] == second['id'])
+        assert found['product_name'] == product['name']
+        assert found['first_name'] == "Status"
+
+    @pytest.mark.asyncio
+    async def test_get_user_orders_page_walks_history(self, db_clean, user_factory, product_factory):
+        """Тест що курсорні сторінки покривають всю історію без пропусків і повторів."""
+        user = await user_factory.create()
+        product = await product_factory.create(stock=100)
+        # Частина замовлень з однаковим created_at - порядок визначає id
+        async with db_clean.pool.acquire() as conn:
+            await conn.execute(
+                """INSERT INTO orders (user_id, user_name, product_id, total_price, created_at)
+                   SELECT $1, 'Pager', $2, 100, TIMESTAMP '2025-01-01' + (g / 3) * INTERVAL '1 hour'
+                   FROM generate_series(1, 23) g""",
+                user['id'], product['id']
+            )
+            expected = [row['id'] for row in await conn.fetch(
+                "SELECT id FROM orders WHERE user_id = $1 ORDER BY created_at DESC, id DESC",
+                user['id']
+            )]
+        
+        pages = [await db_clean.get_user_orders_page(user['id'], limit=5)]
+        while pages[-1].next_cursor:
+            pages.append(await db_clean.get_user_orders_page(user['id'], pages[-1].next_cursor, limit=5))
+        
+        assert [len(page.items) for page in pages] == [5, 5, 5, 5, 3]
+        assert [o['id'] for page in pages for o in page.items] == expected
+        assert pages[0].prev_cursor is None
+        assert all(page.prev_cursor for page in pages[1:])
+        
+        # Назад з останньої сторінки повертає ту ж передостанню сторінку
+        back = await db_clean.get_user_orders_page(user['id'], pages[-1].prev_cursor, limit=5)
+        assert back.items == pages[-2].items
+        first = await db_clean.get_user_orders_page(user['id'], pages[1].prev_cursor, limit=5)
+        assert first.items == pages[0].items
+        assert first.prev_cursor is None
+    
+    @pytest.mark.asyncio
+    async def test_get_users_page(self, db_clean, user_factory):
+        """Тест курсорної пагінації користувачів (нові першими)."""
+        users = await user_factory.create_batch(3)
+        
+        page = await db_clean.get_users_page(limit=2)
+        rest = await db_clean.get_users_page(page.next_cursor, limit=100)
+        ids = [u['id'] for u in page.items + rest.items]
+        
+        assert len(page.items) == 2
+        assert set(u['id'] for u in users) <= set(ids)
+        assert len(ids) == len(set(ids))
+    
+    @pytest.mark.asyncio
+    async def test_get_products_page_matches_snapshot(self, db_clean, product_factory):
+        """Тест що сторінки товарів зі знімка і з SQL однакові."""
+        await product_factory.create_batch(4, category="Pager")
+        await product_factory.create(category="Pager", stock=0)
+        
+        async def walk():
+            pages = [await db_clean.get_products_page(limit=3)]
+            while pages[-1].next_cursor:
+                pages.append(await db_clean.get_products_page(pages[-1].next_cursor, limit=3))
+            back = await db_clean.get_products_page(pages[-1].prev_cursor, limit=3)
+            return [[p['id'] for p in page.items] for page in pages], [p['id'] for p in back.items]
+        
+        cached = await walk()
+        db_clean.catalog.enabled = False
+        direct = await walk()
+        
+        assert cached == direct
+        ids = [product_id for page in cached[0] for product_id in page]
+        assert ids == [p['id'] for p in await db_clean.get_all_products()]
+        assert cached[1] == cached[0][-2]
     
     @pytest.mark.asyncio
     async def test_update_order_status(self, db_clean, user_factory, product_factory, order_factory):
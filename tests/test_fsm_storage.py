@@ -0,0 +1,306 @@
+"""Тести для FSM-сховища в PostgreSQL (fsm_storage.py)."""
+
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, Message, Update, User
+
+from fsm_storage import BoundedMemoryStorage, PostgresStorage, create_fsm_storage
+from middleware import FSMFlushMiddleware
+
+
+class CheckoutStates(StatesGroup):
+    waiting_for_phone = State()
+
+
+def make_key(user_id=777):
+    return StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+
+
+@pytest_asyncio.fixture
+async def storage(db_clean):
+    """Сховище з вимкненим відкладеним flush (зберігаємо явно)."""
+    storage = PostgresStorage(db_clean, flush_delay=3600)
+    yield storage
+    await storage.close()
+
+
+class TestPostgresStorage:
+    """Тести для PostgresStorage."""
+
+    @pytest.mark.asyncio
+    async def test_state_survives_restart(self, db_clean, storage):
+        """Тест що стан і дані доступні новому екземпляру сховища після flush."""
+        key = make_key()
+        await storage.set_state(key, CheckoutStates.waiting_for_phone)
+        await storage.set_data(key, {'product_id': 5, 'product_name': "Куртка"})
+        await storage.flush(key)
+
+        restarted = PostgresStorage(db_clean)
+        assert await restarted.get_state(key) == "CheckoutStates:waiting_for_phone"
+        assert await restarted.get_data(key) == {'product_id': 5, 'product_name': "Куртка"}
+
+    @pytest.mark.asyncio
+    async def test_updates_collapse_into_one_write(self, storage):
+        """Тест що кілька update_data до flush - це одне читання й один запис."""
+        key = make_key()
+        context = FSMContext(storage=storage, key=key)
+
+        await context.update_data(phone="+380501234567")
+        await context.update_data(email="user@example.com")
+        data = await context.update_data(quantity=2)
+        assert await context.get_data() == data
+        await context.set_state(CheckoutStates.waiting_for_phone)
+
+        assert storage.reads == 1
+        assert storage.writes == 0
+
+        await storage.flush(key)
+
+        assert storage.writes == 1
+        restored = await PostgresStorage(storage.database).get_data(key)
+        assert restored == {'phone': "+380501234567", 'email': "user@example.com", 'quantity': 2}
+
+    @pytest.mark.asyncio
+    async def test_returned_data_is_a_copy(self, storage):
+        """Тест що зміна отриманих даних не змінює сховище."""
+        key = make_key()
+        await storage.set_data(key, {'a': 1})
+
+        data = await storage.get_data(key)
+        data['a'] = 2
+
+        assert await storage.get_data(key) == {'a': 1}
+
+    @pytest.mark.asyncio
+    async def test_clear_deletes_row(self, db_clean, storage):
+        """Тест що state.clear() видаляє запис з БД."""
+        key = make_key()
+        context = FSMContext(storage=storage, key=key)
+        await context.update_data(order_id=1)
+        await storage.flush(key)
+
+        await context.clear()
+        await storage.flush(key)
+
+        async with db_clean.pool.acquire() as conn:
+            assert await conn.fetchval("SELECT COUNT(*) FROM fsm_states") == 0
+
+    @pytest.mark.asyncio
+    async def test_db_values_are_serialized(self, storage):
+        """Тест що Decimal і datetime з рядків БД зберігаються (як у dict(order))."""
+        key = make_key()
+        await storage.set_data(key, {'order': {
+            'total_price': Decimal("199.50"), 'created_at': datetime(2025, 1, 2, 3, 4, 5), 'quantity': 2
+        }})
+        await storage.flush(key)
+
+        order = (await PostgresStorage(storage.database).get_data(key))['order']
+
+        assert order == {'total_price': 199.5, 'created_at': "2025-01-02T03:04:05", 'quantity': 2}
+
+    @pytest.mark.asyncio
+    async def test_delayed_flush(self, db_clean):
+        """Тест що зміни поза обробкою оновлення зберігаються відкладеним flush."""
+        storage = PostgresStorage(db_clean, flush_delay=0.01)
+        key = make_key()
+        await storage.set_state(key, "waiting")
+
+        await asyncio.sleep(0.1)
+
+        assert storage.writes == 1
+        assert await PostgresStorage(db_clean).get_state(key) == "waiting"
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending(self, db_clean):
+        """Тест що close() зберігає незбережені зміни."""
+        storage = PostgresStorage(db_clean, flush_delay=3600)
+        key = make_key()
+        await storage.set_data(key, {'pending': True})
+
+        await storage.close()
+
+        assert await PostgresStorage(db_clean).get_data(key) == {'pending': True}
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried(self, db_clean, storage):
+        """Тест що після помилки запису зміни лишаються в кеші до наступного flush."""
+        key = make_key()
+        await storage.set_data(key, {'retry': 1})
+
+        pool = db_clean.pool
+        db_clean.pool = MagicMock()
+        db_clean.pool.acquire.side_effect = ConnectionError("DB is down")
+        try:
+            await storage.flush(key)
+        finally:
+            db_clean.pool = pool
+        assert storage.writes == 0
+
+        await storage.flush(key)
+
+        assert storage.writes == 1
+        assert await PostgresStorage(db_clean).get_data(key) == {'retry': 1}
+
+
+class FakeClock:
+    """Керований годинник для перевірки TTL."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBoundedMemoryStorage:
+    """Тести обмеженого сховища в пам'яті."""
+
+    @pytest.mark.asyncio
+    async def test_state_and_data_roundtrip(self):
+        """Тест збереження стану і даних та видалення сесії після clear."""
+        storage = BoundedMemoryStorage(ttl=60, max_entries=10, shards=2)
+        key = make_key()
+
+        await storage.set_state(key, CheckoutStates.waiting_for_phone)
+        await storage.set_data(key, {'product_name': "Телефон"})
+
+        assert await storage.get_state(key) == CheckoutStates.waiting_for_phone.state
+        assert await storage.get_data(key) == {'product_name': "Телефон"}
+
+        state = FSMContext(storage=storage, key=key)
+        await state.clear()
+        assert len(storage) == 0
+
+    @pytest.mark.asyncio
+    async def test_reads_do_not_create_sessions(self):
+        """Тест що читання відсутнього ключа не займає пам'ять."""
+        storage = BoundedMemoryStorage(ttl=60, max_entries=10, shards=2)
+
+        assert await storage.get_state(make_key()) is None
+        assert await storage.get_data(make_key()) == {}
+        assert len(storage) == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_session_expires(self):
+        """Тест що неактивна сесія зникає після TTL, а активна - ні."""
+        clock = FakeClock()
+        storage = BoundedMemoryStorage(ttl=100, max_entries=10, shards=2, clock=clock)
+        idle, active = make_key(1), make_key(2)
+        await storage.set_data(idle, {'phone': "+380501234567"})
+        await storage.set_data(active, {'phone': "+380671234567"})
+
+        clock.now = 60
+        assert await storage.get_data(active) == {'phone': "+380671234567"}
+        clock.now = 120
+
+        assert await storage.get_data(idle) == {}
+        assert await storage.get_data(active) == {'phone': "+380671234567"}
+        assert storage.evicted_expired == 1
+
+    @pytest.mark.asyncio
+    async def test_sweep_evicts_untouched_sessions(self):
+        """Тест що періодичне прибирання видаляє сесії, до яких більше не звертаються."""
+        clock = FakeClock()
+        storage = BoundedMemoryStorage(ttl=100, max_entries=100, shards=4,
+                                       sweep_interval=10, clock=clock)
+        for user_id in range(20):
+            await storage.set_data(make_key(user_id), {'email': "user@example.com"})
+
+        clock.now = 200
+        await storage.get_state(make_key(999))
+
+        assert storage.stats() == {'entries': 0, 'evicted_expired': 20, 'evicted_lru': 0}
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_at_capacity(self):
+        """Тест що при переповненні витісняється найдавніше використана сесія."""
+        storage = BoundedMemoryStorage(ttl=0, max_entries=2, shards=1)
+        first, second, third = make_key(1), make_key(2), make_key(3)
+        await storage.set_data(first, {'n': 1})
+        await storage.set_data(second, {'n': 2})
+        await storage.get_data(first)
+
+        await storage.set_data(third, {'n': 3})
+
+        assert await storage.get_data(second) == {}
+        assert await storage.get_data(first) == {'n': 1}
+        assert storage.evicted_lru == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_stays_bounded(self):
+        """Тест що кількість сесій не перевищує межу за тривалої роботи."""
+        clock = FakeClock()
+        storage = BoundedMemoryStorage(ttl=3600, max_entries=1000, shards=16, clock=clock)
+        for user_id in range(20_000):
+            clock.now = user_id
+            await storage.set_data(make_key(user_id), {'product_name': "Товар"})
+            assert len(storage) <= 1000
+
+        stats = storage.stats()
+        assert stats['evicted_expired'] + stats['evicted_lru'] + stats['entries'] == 20_000
+
+
+class TestDispatcherIntegration:
+    """Тести роботи сховища в диспетчері з FSMFlushMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_one_read_and_one_write_per_update(self, db_clean):
+        """Тест що оновлення з кількома змінами FSM коштує один SELECT та один upsert."""
+        storage = PostgresStorage(db_clean, flush_delay=3600)
+        router = Router()
+
+        @router.message(F.text == "start")
+        async def start(message: Message, state: FSMContext):
+            await state.update_data(product_id=1)
+            await state.update_data(quantity=1)
+            await state.set_state(CheckoutStates.waiting_for_phone)
+
+        @router.message(CheckoutStates.waiting_for_phone)
+        async def phone(message: Message, state: FSMContext):
+            data = await state.update_data(phone=message.text)
+            assert data['product_id'] == 1
+            await state.set_state(None)
+
+        dp = Dispatcher(storage=storage)
+        dp.update.outer_middleware(FSMFlushMiddleware())
+        dp.include_router(router)
+        bot = Bot(token="42:TEST")
+
+        def update(update_id, text):
+            user = User(id=777, is_bot=False, first_name="Test")
+            return Update(update_id=update_id, message=Message(
+                message_id=update_id, date=datetime.now(), text=text, from_user=user,
+                chat=Chat(id=777, type="private")
+            ))
+
+        await dp.feed_update(bot, update(1, "start"))
+        assert (storage.reads, storage.writes) == (1, 1)
+
+        await dp.feed_update(bot, update(2, "+380501234567"))
+        assert (storage.reads, storage.writes) == (2, 2)
+
+        saved = await PostgresStorage(db_clean).get_data(make_key())
+        assert saved == {'product_id': 1, 'quantity': 1, 'phone': "+380501234567"}
+        await bot.session.close()
+
+
+def test_create_fsm_storage():
+    """Тест вибору сховища за налаштуванням."""
+    database = MagicMock()
+
+    assert isinstance(create_fsm_storage(database, "memory"), MemoryStorage)
+    assert isinstance(create_fsm_storage(database, "postgres"), PostgresStorage)
+    assert isinstance(create_fsm_storage(database, "bounded"), BoundedMemoryStorage)
+    with pytest.raises(ValueError):
+        create_fsm_storage(database, "redis")
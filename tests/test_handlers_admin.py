@@ -6,13 +6,17 @@ from aiogram.types import Message, CallbackQuery, User, Chat
 from aiogram.fsm.context import FSMContext
 from datetime import datetime
 
+from pagination import Page
+
 from handlers.admin import (
     command_admin_handler,
     admin_main_callback,
     admin_stats_callback,
     admin_orders_callback,
     admin_products_callback,
+    admin_tts_warmup_callback,
     admin_users_callback,
+    admin_users_page_callback,
     admin_add_product_start,
     process_product_name,
     process_product_description,
@@ -132,6 +136,21 @@ class TestAdminProductsCallback:
             await admin_products_callback(callback)
         
         callback.message.edit_text.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_admin_tts_warmup_schedules_catalog(self):
+        """Тест що кнопка озвучування ставить каталог у фонову чергу."""
+        callback = MagicMock(spec=CallbackQuery)
+        callback.data = "admin_tts_warmup"
+        callback.from_user = MagicMock(id=12345)
+        callback.answer = AsyncMock()
+        
+        with patch('handlers.admin.products.menu.tts_prerenderer') as mock_prerenderer:
+            mock_prerenderer.warmup = AsyncMock(return_value=7)
+            await admin_tts_warmup_callback(callback)
+        
+        mock_prerenderer.warmup.assert_awaited_once()
+        assert "7" in callback.answer.call_args[0][0]
 
 
 class TestAdminUsersCallback:
@@ -156,22 +175,32 @@ class TestAdminUsersCallback:
             }
         ]
         
-        # Мокуємо pool.acquire для запиту користувачів
-        mock_conn = MagicMock()
-        mock_conn.fetch = AsyncMock(return_value=mock_users)
-        
-        mock_pool_context = MagicMock()
-        mock_pool_context.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_pool_context.__aexit__ = AsyncMock(return_value=None)
-        
-        with patch('handlers.admin.users.db.pool') as mock_pool:
-            mock_pool.acquire = MagicMock(return_value=mock_pool_context)
-            with patch('handlers.admin.main.get_admin_main_keyboard') as mock_keyboard:
-                mock_keyboard.return_value = MagicMock()
-                await admin_users_callback(callback)
-        
+        with patch('handlers.admin.users.db.get_users_page', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = Page(items=mock_users, next_cursor="n1.123")
+            await admin_users_callback(callback)
+            mock_get.assert_called_once_with(None)
+
         # Текст має містити користувачів
         callback.message.edit_text.assert_called_once()
+        keyboard = callback.message.edit_text.call_args[1]['reply_markup']
+        callbacks = [b.callback_data for row in keyboard.inline_keyboard for b in row]
+        assert "admin_users_page:n1.123" in callbacks
+
+    @pytest.mark.asyncio
+    async def test_admin_users_page_passes_cursor(self):
+        """Тест що кнопка сторінки передає курсор у запит."""
+        callback = MagicMock(spec=CallbackQuery)
+        callback.data = "admin_users_page:p1.123"
+        callback.message = MagicMock()
+        callback.message.edit_text = AsyncMock()
+        callback.answer = AsyncMock()
+
+        with patch('handlers.admin.users.db.get_users_page', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = Page()
+            await admin_users_page_callback(callback)
+            mock_get.assert_called_once_with("p1.123")
+
+        callback.answer.assert_called_once()
 
 
 class TestAdminAddProductStart:
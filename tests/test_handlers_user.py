@@ -2,7 +2,8 @@
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from aiogram.types import Message, CallbackQuery, User, Chat
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, Message, CallbackQuery, User, Chat
 from aiogram import html
 
 from handlers.user import (
@@ -23,6 +24,9 @@ from handlers.user import (
     my_orders_callback,
 )
 from config import ADMIN_IDS
+from pagination import Page
+from tts_cache import TTSCache, tts_cache_key
+from tts_service import get_product_description_for_tts
 
 
 def create_mock_message(text="Test", user_id=123, full_name="Test User"):
@@ -352,10 +356,9 @@ class TestCommandCategoriesHandler:
         """Тест команди /categories з категоріями."""
         message = create_mock_message("/categories")
         
-        with patch('handlers.user.catalog.db.get_categories', new_callable=AsyncMock) as mock_get_cat:
+        with patch('handlers.user.catalog.db.get_category_counts', new_callable=AsyncMock) as mock_get_counts:
             with patch('handlers.user.catalog.db.get_products_by_category', new_callable=AsyncMock) as mock_get_prod:
-                mock_get_cat.return_value = ['Category 1', 'Category 2']
-                mock_get_prod.side_effect = [[{'id': 1}], [{'id': 2}, {'id': 3}]]
+                mock_get_counts.return_value = [('Category 2', 2), ('Category 1', 1)]
                 
                 await command_categories_handler(message)
                 
@@ -365,6 +368,8 @@ class TestCommandCategoriesHandler:
                 assert "Виберіть категорію" in call_args[0][0]
                 # Перевіряємо що є reply_markup (клавіатура)
                 assert call_args[1]['reply_markup'] is not None
+                # Кількість товарів береться з одного запиту, без N+1
+                mock_get_prod.assert_not_called()
 
     
     @pytest.mark.asyncio
@@ -372,7 +377,7 @@ class TestCommandCategoriesHandler:
         """Тест команди /categories без категорій."""
         message = create_mock_message("/categories")
         
-        with patch('handlers.user.catalog.db.get_categories', new_callable=AsyncMock) as mock_get:
+        with patch('handlers.user.catalog.db.get_category_counts', new_callable=AsyncMock) as mock_get:
             mock_get.return_value = []
             
             await command_categories_handler(message)
@@ -399,8 +404,8 @@ class TestCommandMyOrdersHandler:
             }
         ]
         
-        with patch('handlers.user.orders.db.get_user_orders', new_callable=AsyncMock) as mock_get:
-            mock_get.return_value = mock_orders
+        with patch('handlers.user.orders.db.get_user_orders_page', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = Page(items=mock_orders)
             
             await command_my_orders_handler(message)
             
@@ -417,8 +422,8 @@ class TestCommandMyOrdersHandler:
         """Тест команди /myorders без замовлень."""
         message = create_mock_message("/myorders", user_id=123)
         
-        with patch('handlers.user.orders.db.get_user_orders', new_callable=AsyncMock) as mock_get:
-            mock_get.return_value = []
+        with patch('handlers.user.orders.db.get_user_orders_page', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = Page()
             
             await command_my_orders_handler(message)
             
@@ -450,8 +455,8 @@ class TestCommandMyOrdersHandler:
             }
         ]
         
-        with patch('handlers.user.orders.db.get_user_orders', new_callable=AsyncMock) as mock_get:
-            mock_get.return_value = mock_orders
+        with patch('handlers.user.orders.db.get_user_orders_page', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = Page(items=mock_orders)
             
             await command_my_orders_handler(message)
             
@@ -500,6 +505,33 @@ class TestProductDetailsCallback:
                 assert "Test Product" in call_args
                 assert "100" in call_args
     
+    @pytest.mark.asyncio
+    async def test_product_details_callback_with_image(self):
+        """Тест що товар із зображенням показується фото за file_id над новою карткою."""
+        callback = create_mock_callback("product:1")
+        callback.message.answer_photo = AsyncMock()
+        callback.message.delete = AsyncMock()
+        
+        mock_product = {
+            'id': 1,
+            'name': 'Test Product',
+            'description': 'Test Description',
+            'category': 'Test Category',
+            'price': 100.0,
+            'stock': 10,
+            'image_file_id': 'photo-file-id'
+        }
+        
+        with patch('handlers.user.products.db.get_product_by_id', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = mock_product
+            
+            await product_details_callback(callback)
+        
+        callback.message.answer_photo.assert_awaited_once_with(photo='photo-file-id')
+        assert "Test Product" in callback.message.answer.call_args[0][0]
+        callback.message.delete.assert_awaited_once()
+        callback.message.edit_text.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_product_details_callback_product_not_found(self):
         """Тест отримання деталей неіснуючого товару."""
@@ -518,25 +550,38 @@ class TestProductDetailsCallback:
 class TestListenProductCallback:
     """Тести для callback обробника озвучування товару."""
     
+    mock_product = {
+        'id': 1,
+        'name': 'Test Product',
+        'description': 'Test Description',
+        'price': 100.0,
+        'stock': 10,
+        'category': 'Category'
+    }
+    
+    @pytest.fixture(autouse=True)
+    def cache(self, tmp_path):
+        cache = TTSCache(directory=str(tmp_path), max_bytes=1024 * 1024)
+        with patch('handlers.user.products.tts_cache', cache):
+            yield cache
+    
+    @staticmethod
+    def sent_voice(file_id="voice-file-id"):
+        sent = MagicMock()
+        sent.voice.file_id = file_id
+        return sent
+    
     @pytest.mark.asyncio
-    async def test_listen_product_callback_success(self):
+    async def test_listen_product_callback_success(self, cache):
         """Тест успішного озвучування товару."""
         callback = create_mock_callback("listen_product:1")
-        
-        mock_product = {
-            'id': 1,
-            'name': 'Test Product',
-            'description': 'Test Description',
-            'price': 100.0,
-            'stock': 10,
-            'category': 'Category'
-        }
+        callback.message.answer_voice.return_value = self.sent_voice()
         
         with patch('handlers.user.products.db.get_product_by_id', new_callable=AsyncMock) as mock_get:
-            with patch('handlers.user.products.text_to_speech', new_callable=AsyncMock) as mock_tts:
+            with patch('tts_cache.text_to_speech', new_callable=AsyncMock) as mock_tts:
                 with patch('handlers.user.products.get_product_description_for_tts') as mock_desc:
-                    mock_get.return_value = mock_product
-                    mock_tts.return_value = b'audio_data'
+                    mock_get.return_value = self.mock_product
+                    mock_tts.return_value = BufferedInputFile(b'audio_data', filename="product_info.mp3")
                     mock_desc.return_value = "Test Product Description"
                     
                     await listen_product_callback(callback)
@@ -544,6 +589,45 @@ class TestListenProductCallback:
                     mock_get.assert_called_once_with(1)
                     mock_tts.assert_called_once()
                     callback.message.answer_voice.assert_called_once()
+                    assert cache.get_file_id(tts_cache_key("Test Product Description", "uk")) == "voice-file-id"
+    
+    @pytest.mark.asyncio
+    async def test_listen_product_callback_reuses_file_id(self, cache):
+        """Тест що повторне озвучування відправляє file_id без синтезу та завантаження."""
+        first, second = create_mock_callback("listen_product:1"), create_mock_callback("listen_product:1")
+        first.message.answer_voice.return_value = self.sent_voice()
+        
+        with patch('handlers.user.products.db.get_product_by_id', new_callable=AsyncMock, return_value=self.mock_product):
+            with patch('tts_cache.text_to_speech', new_callable=AsyncMock) as mock_tts:
+                mock_tts.return_value = BufferedInputFile(b'audio_data', filename="product_info.mp3")
+                
+                await listen_product_callback(first)
+                await listen_product_callback(second)
+        
+        mock_tts.assert_called_once()
+        assert second.message.answer_voice.call_args.kwargs['voice'] == "voice-file-id"
+    
+    @pytest.mark.asyncio
+    async def test_listen_product_callback_rejected_file_id_falls_back_to_upload(self, cache):
+        """Тест що відхилений Telegram file_id замінюється файлом з дискового кешу."""
+        text = get_product_description_for_tts(self.mock_product)
+        key = tts_cache_key(text, "uk")
+        cache.write(key, b'cached_audio', product_id=1)
+        cache.set_file_id(key, "stale-file-id")
+        callback = create_mock_callback("listen_product:1")
+        callback.message.answer_voice.side_effect = [
+            TelegramBadRequest(method=MagicMock(), message="wrong file identifier"),
+            self.sent_voice("fresh-file-id"),
+        ]
+        
+        with patch('handlers.user.products.db.get_product_by_id', new_callable=AsyncMock, return_value=self.mock_product):
+            with patch('tts_cache.text_to_speech', new_callable=AsyncMock) as mock_tts:
+                await listen_product_callback(callback)
+        
+        mock_tts.assert_not_called()
+        uploaded = callback.message.answer_voice.call_args.kwargs['voice']
+        assert isinstance(uploaded, BufferedInputFile) and uploaded.data == b'cached_audio'
+        assert cache.get_file_id(key) == "fresh-file-id"
     
     @pytest.mark.asyncio
     async def test_listen_product_callback_product_not_found(self):
@@ -563,19 +647,10 @@ class TestListenProductCallback:
         """Тест озвучування при помилці TTS."""
         callback = create_mock_callback("listen_product:1")
         
-        mock_product = {
-            'id': 1,
-            'name': 'Test Product',
-            'description': 'Test Description',
-            'price': 100.0,
-            'stock': 10,
-            'category': 'Category'
-        }
-        
         with patch('handlers.user.products.db.get_product_by_id', new_callable=AsyncMock) as mock_get:
-            with patch('handlers.user.products.text_to_speech', new_callable=AsyncMock) as mock_tts:
+            with patch('tts_cache.text_to_speech', new_callable=AsyncMock) as mock_tts:
                 with patch('handlers.user.products.get_product_description_for_tts') as mock_desc:
-                    mock_get.return_value = mock_product
+                    mock_get.return_value = self.mock_product
                     mock_tts.return_value = None  # TTS failure
                     mock_desc.return_value = "Test"
                     
@@ -642,9 +717,9 @@ class TestMyOrdersCallback:
             }
         ]
         
-        with patch('handlers.user.orders.db.get_user_orders', new_callable=AsyncMock) as mock_get:
+        with patch('handlers.user.orders.db.get_user_orders_page', new_callable=AsyncMock) as mock_get:
             with patch('keyboards.get_my_orders_keyboard') as mock_keyboard:
-                mock_get.return_value = mock_orders
+                mock_get.return_value = Page(items=mock_orders)
                 mock_keyboard.return_value = MagicMock()
                 
                 await my_orders_callback(callback)
@@ -657,8 +732,8 @@ class TestMyOrdersCallback:
         """Тест мої замовлення callback без замовлень."""
         callback = create_mock_callback("my_orders", user_id=123)
         
-        with patch('handlers.user.orders.db.get_user_orders', new_callable=AsyncMock) as mock_get:
-            mock_get.return_value = []
+        with patch('handlers.user.orders.db.get_user_orders_page', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = Page()
             
             await my_orders_callback(callback)
             
@@ -681,9 +756,9 @@ class TestMyOrdersCallback:
             }
         ]
         
-        with patch('handlers.user.orders.db.get_user_orders', new_callable=AsyncMock) as mock_get:
+        with patch('handlers.user.orders.db.get_user_orders_page', new_callable=AsyncMock) as mock_get:
             with patch('keyboards.get_my_orders_keyboard') as mock_keyboard:
-                mock_get.return_value = mock_orders
+                mock_get.return_value = Page(items=mock_orders)
                 mock_keyboard.return_value = MagicMock()
                 
                 await my_orders_callback(callback)
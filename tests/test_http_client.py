@@ -0,0 +1,81 @@
+"""Тести для спільного HTTP-клієнта."""
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from http_client import HTTPClient
+from payments.liqpay_service import LiqPayService
+
+
+@pytest_asyncio.fixture
+async def server():
+    async def status(request):
+        return web.json_response({"status": "success"})
+
+    app = web.Application()
+    app.router.add_get("/ping", status)
+    app.router.add_post("/api/request", status)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def client():
+    client = HTTPClient(limit_per_host=2, keepalive_timeout=30)
+    await client.start()
+    yield client
+    await client.close()
+
+
+class TestHTTPClient:
+    """Тести пулу з'єднань."""
+
+    @pytest.mark.asyncio
+    async def test_connections_reused(self, server, client):
+        """Тест що послідовні запити до хоста використовують одне keep-alive з'єднання."""
+        for _ in range(3):
+            async with client.session.get(server.make_url("/ping")) as response:
+                assert response.status == 200
+                await response.read()
+
+        stats = client.stats()[server.host]
+        assert stats == {"requests": 3, "new_connections": 1, "reused_connections": 2, "errors": 0}
+
+    @pytest.mark.asyncio
+    async def test_session_is_shared_until_close(self, client):
+        """Тест що сесія одна до закриття, а після close створюється нова."""
+        session = client.session
+        assert client.session is session
+
+        await client.close()
+        assert session.closed
+        assert client.session is not session
+
+    @pytest.mark.asyncio
+    async def test_connection_errors_counted(self, client):
+        """Тест що помилка з'єднання потрапляє в статистику хоста."""
+        with pytest.raises(Exception):
+            async with client.session.get("http://127.0.0.1:1/"):
+                pass
+
+        assert client.stats()["127.0.0.1"]["errors"] == 1
+
+
+class TestLiqPayUsesSharedClient:
+    """Тести використання спільного клієнта в LiqPayService."""
+
+    @pytest.mark.asyncio
+    async def test_check_payment_status(self, server, client):
+        """Тест що перевірки статусу йдуть через пул і повторно використовують з'єднання."""
+        service = LiqPayService(http=client)
+        service.public_key, service.private_key = "public", "private"
+        service.api_url = str(server.make_url("/api/"))
+
+        assert await service.check_payment_status("order_1") == {"status": "success"}
+        assert await service.check_payment_status("order_2") == {"status": "success"}
+
+        assert client.stats()[server.host]["reused_connections"] == 1
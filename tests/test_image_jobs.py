@@ -0,0 +1,443 @@
+"""Тести для черги генерації зображень."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from openai import RateLimitError
+
+from handlers.admin import (
+    AddProductStates, AdminGenerateImageStates, admin_confirm_generate_image, admin_regenerate_image,
+    admin_generate_image_variants, admin_pick_image,
+)
+from handlers.admin.products.image import deliver_generated_image
+from image_jobs import ImageJob, ImageJobQueue
+from image_prompt_cache import ImagePromptCache, prompt_key
+from media_store import MediaStore
+
+IMAGE_URL = "https://example.com/generated.png"
+PRODUCT_DATA = {
+    'name': "Смартфон", 'description': "Опис", 'price': 1000.0, 'category': "Електроніка", 'stock': 5,
+    'product_prompt': "A modern smartphone on white background",
+    'product_image_size': "1024x1024", 'product_image_style': "vivid",
+}
+
+
+def rate_limit_error(retry_after=None) -> RateLimitError:
+    response = MagicMock(status_code=429)
+    response.headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    return RateLimitError("Rate limit", response=response, body=None)
+
+
+IMAGE_KEY = "a" * 64
+
+
+def make_queue(**kwargs) -> ImageJobQueue:
+    """Черга з кешем промптів і сховищем у пам'яті."""
+    cache = MagicMock(get=AsyncMock(return_value=None), put=AsyncMock())
+    store = MagicMock(download=AsyncMock(return_value=IMAGE_KEY))
+    return ImageJobQueue(cache=cache, store=store, **kwargs)
+
+
+def make_message():
+    message = MagicMock()
+    message.edit_text = AsyncMock()
+    message.answer = AsyncMock()
+    message.answer_photo = AsyncMock()
+    return message
+
+
+async def make_state(state=AdminGenerateImageStates.waiting_for_generation) -> FSMContext:
+    fsm = FSMContext(storage=MemoryStorage(), key=StorageKey(bot_id=1, chat_id=100, user_id=100))
+    await fsm.set_data(dict(PRODUCT_DATA))
+    await fsm.set_state(state)
+    return fsm
+
+
+def make_query():
+    query = MagicMock()
+    query.from_user.id = 100
+    query.message = make_message()
+    query.message.answer_photo.return_value = MagicMock(photo=[MagicMock(file_id="photo-file-id")])
+    query.answer = AsyncMock()
+    return query
+
+
+def make_job(deliver, state=None, message=None) -> ImageJob:
+    return ImageJob(
+        admin_id=100, prompt=PRODUCT_DATA['product_prompt'], size="1024x1024", style="vivid",
+        state=state or MagicMock(), message=message or make_message(), deliver=deliver,
+    )
+
+
+class TestImageJobQueue:
+    """Тести воркерів черги."""
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_limit(self):
+        """Тест що одночасно генерується не більше concurrency зображень."""
+        running, peak = 0, 0
+
+        async def slow_request(prompt, size, style):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return IMAGE_URL
+
+        deliver = AsyncMock()
+        queue = make_queue(concurrency=2, progress_interval=10)
+        with patch('image_jobs.openai_service.request_image', side_effect=slow_request):
+            queue.start()
+            for _ in range(5):
+                queue.submit(make_job(deliver))
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+        assert peak == 2
+        assert deliver.await_count == 5
+        assert queue.completed == 5
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_retried_with_backoff(self):
+        """Тест що RateLimitError повторюється, а статус показує очікування."""
+        deliver = AsyncMock()
+        message = make_message()
+        job = make_job(deliver, message=message)
+        queue = make_queue(concurrency=1, max_attempts=5, backoff=0.01, progress_interval=10)
+
+        request = AsyncMock(side_effect=[rate_limit_error(), rate_limit_error(), IMAGE_URL])
+        with patch('image_jobs.openai_service.request_image', request):
+            queue.start()
+            queue.submit(job)
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+        assert job.attempts == 3
+        assert queue.rate_limited == 2
+        deliver.assert_awaited_once_with(job, IMAGE_KEY)
+        statuses = [call.args[0] for call in message.edit_text.call_args_list]
+        assert any("Ліміт запитів OpenAI" in text and "спроба 2/5" in text for text in statuses)
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self):
+        """Тест що після max_attempts задача завершується з None."""
+        deliver = AsyncMock()
+        job = make_job(deliver)
+        queue = make_queue(concurrency=1, max_attempts=3, backoff=0.001, progress_interval=10)
+
+        with patch('image_jobs.openai_service.request_image', AsyncMock(side_effect=rate_limit_error())):
+            queue.start()
+            queue.submit(job)
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+        deliver.assert_awaited_once_with(job, None)
+        assert (job.attempts, queue.failed) == (3, 1)
+
+    def test_retry_delay(self):
+        """Тест експоненційної затримки з межею та врахуванням Retry-After."""
+        queue = make_queue(backoff=2, backoff_max=10)
+
+        assert 2 <= queue.retry_delay(1) <= 2.2
+        assert 8 <= queue.retry_delay(3) <= 8.8
+        assert 10 <= queue.retry_delay(6) <= 11
+        assert queue.retry_delay(1, rate_limit_error(retry_after=30)) == 30
+
+    @pytest.mark.asyncio
+    async def test_failing_job_does_not_stop_worker(self):
+        """Тест що помилка доставки однієї задачі не зупиняє наступні."""
+        deliver = AsyncMock(side_effect=[RuntimeError("telegram"), None])
+        queue = make_queue(concurrency=1, progress_interval=10)
+
+        with patch('image_jobs.openai_service.request_image', AsyncMock(return_value=IMAGE_URL)):
+            queue.start()
+            queue.submit(make_job(deliver))
+            queue.submit(make_job(deliver))
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+        assert deliver.await_count == 2
+
+
+class TestImageVariants:
+    """Тести генерації кількох варіантів однією задачею."""
+
+    @pytest.mark.asyncio
+    async def test_variants_generated_concurrently(self):
+        """Тест що 4 варіанти генеруються приблизно за час одного."""
+        running, peak = 0, 0
+
+        async def slow_request(prompt, size, style):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.1)
+            running -= 1
+            return f"{IMAGE_URL}?{peak}-{running}"
+
+        deliver = AsyncMock()
+        queue = make_queue(concurrency=1, max_requests=4, progress_interval=10)
+        queue.store.download = AsyncMock(side_effect=lambda url: f"key-{url}")
+        job = make_job(deliver)
+        job.variants = 4
+
+        with patch('image_jobs.openai_service.request_image', side_effect=slow_request):
+            queue.start()
+            queue.submit(job)
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+        assert peak == 4
+        assert job.generation_seconds < 0.2
+        assert len(job.candidates) == 4
+        deliver.assert_awaited_once_with(job, job.candidates[0])
+        # Варіанти не кешуються до вибору
+        queue.cache.put.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_requests_limited_by_semaphore(self):
+        """Тест що одночасних запитів не більше max_requests, а невдалий варіант пропускається."""
+        running, peak, calls = 0, 0, 0
+
+        async def slow_request(prompt, size, style):
+            nonlocal running, peak, calls
+            calls += 1
+            call = calls
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return None if call == 1 else IMAGE_URL
+
+        queue = make_queue(concurrency=1, max_requests=2, progress_interval=10)
+        job = make_job(AsyncMock())
+        job.variants = 4
+
+        with patch('image_jobs.openai_service.request_image', side_effect=slow_request):
+            queue.start()
+            queue.submit(job)
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+        assert peak == 2
+        assert len(job.candidates) == 3
+
+    @pytest.mark.asyncio
+    async def test_pick_variant(self, db_clean, tmp_path):
+        """Тест що варіанти приходять альбомом, а вибраний стає зображенням товару."""
+        store = MediaStore(directory=str(tmp_path),
+                           processor=MagicMock(extension="jpg", render=AsyncMock(return_value=None)))
+        cache = ImagePromptCache(db_clean, store=store)
+        queue = ImageJobQueue(concurrency=1, progress_interval=10, cache=cache, store=store)
+        keys = [store.save(f"variant-{i}".encode()) for i in range(4)]
+        state = await make_state(AdminGenerateImageStates.waiting_for_confirmation)
+        query = make_query()
+        query.message.answer_media_group = AsyncMock()
+
+        with patch('handlers.admin.products.image.image_jobs', queue), \
+                patch('handlers.admin.products.image.media_store', store), \
+                patch('handlers.admin.products.image.IMAGE_JOBS_VARIANTS', 4), \
+                patch.object(store, 'download', AsyncMock(side_effect=keys)), \
+                patch('image_jobs.openai_service.request_image', AsyncMock(return_value=IMAGE_URL)) as request:
+            queue.start()
+            await admin_generate_image_variants(query, state)
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+            assert request.await_count == 4
+            media = query.message.answer_media_group.call_args[0][0]
+            assert [item.caption for item in media] == ["Варіант 1", "Варіант 2", "Варіант 3", "Варіант 4"]
+            assert media[0].media.filename == "variant_1.jpg"
+            assert await state.get_state() == AdminGenerateImageStates.waiting_for_choice.state
+
+            pick = make_query()
+            pick.data = "admin_pick_image:2"
+            await admin_pick_image(pick, state)
+
+        data = await state.get_data()
+        # Вибраний варіант відправляється копією для картки; її file_id переходить до товару
+        assert pick.message.answer_photo.call_args.kwargs['photo'].data == b"variant-2"
+        assert (data['image_key'], data['image_file_id'], data['image_url']) == (keys[2], "photo-file-id", None)
+        assert data['image_candidates'] is None
+        assert await state.get_state() == AddProductStates.waiting_for_confirmation.state
+        assert await cache.get(PRODUCT_DATA['product_prompt'], "1024x1024", "vivid") == keys[2]
+
+
+class TestAdminGenerateImageFlow:
+    """Тести обробника підтвердження та доставки результату в FSM."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return MediaStore(directory=str(tmp_path),
+                          processor=MagicMock(extension="jpg", render=AsyncMock(return_value=None)))
+
+    @pytest.mark.asyncio
+    async def test_confirm_returns_before_generation_finishes(self, db_clean, store):
+        """Тест що обробник завершується одразу, результат приходить пізніше в FSM,
+        а повторне підтвердження з тими самими параметрами бере зображення з кешу."""
+        cache = ImagePromptCache(db_clean, store=store)
+        queue = ImageJobQueue(concurrency=1, progress_interval=10, cache=cache, store=store)
+        image_key = store.save(b"png-bytes")
+        generated = asyncio.Event()
+
+        async def slow_request(prompt, size, style):
+            await generated.wait()
+            return IMAGE_URL
+
+        with patch('handlers.admin.products.image.image_jobs', queue), \
+                patch('handlers.admin.products.image.media_store', store), \
+                patch.object(store, 'download', AsyncMock(return_value=image_key)) as download, \
+                patch('image_jobs.openai_service.request_image', side_effect=slow_request) as request:
+            queue.start()
+            state = await make_state(AdminGenerateImageStates.waiting_for_confirmation)
+            query = make_query()
+            await asyncio.wait_for(admin_confirm_generate_image(query, state), 0.5)
+
+            assert await state.get_state() == AdminGenerateImageStates.waiting_for_generation.state
+            query.answer.assert_awaited_once()
+
+            generated.set()
+            await asyncio.wait_for(queue.join(), 2)
+
+            # Той самий опис, розмір і стиль: без запиту до OpenAI
+            cached_state = await make_state(AdminGenerateImageStates.waiting_for_confirmation)
+            cached_query = make_query()
+            await admin_confirm_generate_image(cached_query, cached_state)
+            await queue.close()
+
+        assert await state.get_state() == AddProductStates.waiting_for_confirmation.state
+        download.assert_awaited_once_with(IMAGE_URL)
+        data = await state.get_data()
+        # Тимчасовий URL OpenAI не зберігається: лише локальний файл і file_id
+        assert (data['image_url'], data['image_key'], data['image_file_id']) == \
+            (None, image_key, "photo-file-id")
+        query.message.answer_photo.assert_awaited_once()
+
+        assert request.call_count == 1
+        assert await cached_state.get_state() == AddProductStates.waiting_for_confirmation.state
+        assert (await cached_state.get_data())['image_key'] == image_key
+        assert "Збережене зображення" in cached_query.message.edit_text.call_args[0][0]
+        assert cache.stats()['hits'] == 1 and cache.saved_seconds > 0
+
+    @pytest.mark.asyncio
+    async def test_regenerate_bypasses_cache(self, db_clean, store):
+        """Тест що нова варіація генерується заново і замінює запис кешу."""
+        cache = ImagePromptCache(db_clean, store=store)
+        old_key, new_key = store.save(b"old"), store.save(b"new")
+        await cache.put(PRODUCT_DATA['product_prompt'], "1024x1024", "vivid", old_key, 20.0)
+        queue = ImageJobQueue(concurrency=1, progress_interval=10, cache=cache, store=store)
+        state = await make_state(AddProductStates.waiting_for_confirmation)
+        query = make_query()
+
+        with patch('handlers.admin.products.image.image_jobs', queue), \
+                patch('handlers.admin.products.image.media_store', store), \
+                patch.object(store, 'download', AsyncMock(return_value=new_key)), \
+                patch('image_jobs.openai_service.request_image', AsyncMock(return_value=IMAGE_URL)) as request:
+            queue.start()
+            await admin_regenerate_image(query, state)
+            await asyncio.wait_for(queue.join(), 2)
+            await queue.close()
+
+        request.assert_awaited_once()
+        assert (await state.get_data())['image_key'] == new_key
+        assert await cache.get(PRODUCT_DATA['product_prompt'], "1024x1024", "vivid") == new_key
+
+    @pytest.mark.asyncio
+    async def test_deliver_failure_returns_to_prompt(self):
+        """Тест що невдала генерація повертає адміна до введення опису."""
+        state = await make_state()
+        job = make_job(deliver_generated_image, state=state)
+
+        await deliver_generated_image(job, None)
+
+        assert await state.get_state() == AdminGenerateImageStates.waiting_for_prompt.state
+        assert "Помилка при генерації" in job.message.edit_text.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_candidates_skip_missing_files(self, store):
+        """Тест що варіанти без файлу в сховищі не потрапляють в альбом."""
+        keys = [store.save(b"variant-1"), "b" * 64, store.save(b"variant-3")]
+        state = await make_state()
+        job = make_job(deliver_generated_image, state=state)
+        job.candidates = keys
+        job.message.answer_media_group = AsyncMock()
+
+        with patch('handlers.admin.products.image.media_store', store):
+            await deliver_generated_image(job, keys[0])
+
+        media = job.message.answer_media_group.call_args[0][0]
+        assert [item.media.data for item in media] == [b"variant-1", b"variant-3"]
+        assert (await state.get_data())['image_candidates'] == [keys[0], keys[2]]
+        assert await state.get_state() == AdminGenerateImageStates.waiting_for_choice.state
+
+    @pytest.mark.asyncio
+    async def test_single_readable_candidate_delivered_as_result(self, store):
+        """Тест що єдиний доступний варіант доставляється як звичайний результат."""
+        keys = ["b" * 64, store.save(b"variant-2")]
+        state = await make_state()
+        job = make_job(deliver_generated_image, state=state)
+        job.candidates = keys
+        job.message.answer_media_group = AsyncMock()
+        job.message.answer_photo.return_value = MagicMock(photo=[MagicMock(file_id="photo-file-id")])
+
+        with patch('handlers.admin.products.image.media_store', store):
+            await deliver_generated_image(job, keys[0])
+
+        job.message.answer_media_group.assert_not_called()
+        assert job.message.answer_photo.call_args.kwargs['photo'].data == b"variant-2"
+        assert (await state.get_data())['image_key'] == keys[1]
+        assert await state.get_state() == AddProductStates.waiting_for_confirmation.state
+
+    @pytest.mark.asyncio
+    async def test_deliver_dropped_when_admin_left_flow(self):
+        """Тест що результат не змінює FSM, якщо адмін уже вийшов з процесу."""
+        state = await make_state(None)
+        job = make_job(deliver_generated_image, state=state)
+
+        await deliver_generated_image(job, IMAGE_KEY)
+
+        assert await state.get_state() is None
+        assert 'image_url' not in await state.get_data()
+        job.message.answer_photo.assert_not_called()
+
+
+class TestImagePromptCache:
+    """Тести постійного кешу промптів."""
+
+    def test_prompt_key(self):
+        """Тест що ключ враховує розмір і стиль, але не зайві пробіли."""
+        key = prompt_key("A red  phone\n on white", "1024x1024", "vivid")
+
+        assert key == prompt_key("A red phone on white", "1024x1024", "vivid")
+        assert key != prompt_key("A red phone on white", "1792x1024", "vivid")
+        assert key != prompt_key("A red phone on white", "1024x1024", "natural")
+
+    @pytest.mark.asyncio
+    async def test_hit_rate_and_saved_time(self, db_clean, tmp_path):
+        """Тест що влучання рахуються, а запис із втраченим файлом видаляється."""
+        store = MediaStore(directory=str(tmp_path))
+        cache = ImagePromptCache(db_clean, store=store)
+        image_key = store.save(b"png")
+
+        assert await cache.get("A red phone", "1024x1024", "vivid") is None
+        await cache.put("A red phone", "1024x1024", "vivid", image_key, 18.5)
+        assert await cache.get("A red phone", "1024x1024", "vivid") == image_key
+
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "saved_seconds": 18.5}
+
+        await cache.put("A blue phone", "1024x1024", "vivid", "f" * 64, 20.0)
+        assert await cache.get("A blue phone", "1024x1024", "vivid") is None
+        assert await db_clean.get_image_prompt(prompt_key("A blue phone", "1024x1024", "vivid")) is None
+
+    @pytest.mark.asyncio
+    async def test_database_error_is_a_miss(self):
+        """Тест що помилка БД не ламає генерацію."""
+        database = MagicMock(get_image_prompt=AsyncMock(side_effect=RuntimeError("db down")))
+        cache = ImagePromptCache(database)
+
+        assert await cache.get("A red phone", "1024x1024", "vivid") is None
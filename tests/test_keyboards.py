@@ -10,8 +10,10 @@ from keyboards.admin import (
     get_admin_main_keyboard,
     get_admin_orders_keyboard,
     get_admin_products_keyboard,
-    get_order_status_keyboard
+    get_order_status_keyboard,
+    get_admin_products_picker_keyboard
 )
+from pagination import Page
 
 
 def test_get_products_keyboard():
@@ -85,3 +87,23 @@ def test_get_order_status_keyboard():
     keyboard = get_order_status_keyboard(1)
     assert keyboard is not None
     assert hasattr(keyboard, 'inline_keyboard')
+
+
+def test_get_my_orders_keyboard_with_pages():
+    """Тест кнопок переходу між сторінками замовлень."""
+    page = Page(items=[{'id': 1}], next_cursor="n10.1", prev_cursor="p20.1")
+    keyboard = get_my_orders_keyboard(page)
+    callbacks = [button.callback_data for row in keyboard.inline_keyboard for button in row]
+
+    assert callbacks[:2] == ["my_orders_page:p20.1", "my_orders_page:n10.1"]
+    assert "back_to_catalog" in callbacks
+
+
+def test_get_admin_products_picker_keyboard():
+    """Тест клавіатури вибору товару з переходом між сторінками."""
+    products = [{'id': 5, 'name': 'Coat', 'stock': 2, 'price': 100}]
+    keyboard = get_admin_products_picker_keyboard(products, "delete", Page(products, next_cursor="n.5"))
+    callbacks = [button.callback_data for row in keyboard.inline_keyboard for button in row]
+
+    assert callbacks == ["delete_product:5", "admin_delete_products_page:n.5", "admin_products"]
+
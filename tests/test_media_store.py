@@ -0,0 +1,223 @@
+"""Тести для локального сховища зображень товарів."""
+
+import io
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from PIL import Image
+
+from handlers.user.products import send_product_photo
+from http_client import HTTPClient
+from image_processing import ImageProcessor
+from media_store import MediaStore, media_key
+
+
+def make_png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 90)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+PNG = make_png(1200, 900)
+
+
+@pytest.fixture
+def processor():
+    processor = ImageProcessor(max_workers=1)
+    yield processor
+    processor.close()
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path, processor):
+    http = HTTPClient()
+    yield MediaStore(directory=str(tmp_path), max_bytes=len(PNG) + 1024, timeout=5,
+                     processor=processor, variants={"thumb": 320, "medium": 800}, http=http)
+    await http.close()
+
+
+async def start_image_server(body: bytes = PNG, content_type: str = "image/png", status: int = 200):
+    """Локальний HTTP-сервер, що віддає одне зображення за /image."""
+    async def handler(request):
+        return web.Response(body=body, content_type=content_type, status=status)
+
+    app = web.Application()
+    app.router.add_get("/image", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def photo_message(file_id: str = "new-file-id"):
+    message = MagicMock()
+    message.answer_photo = AsyncMock(return_value=MagicMock(photo=[MagicMock(file_id=file_id)]))
+    return message
+
+
+class TestMediaStore:
+    """Тести збереження та завантаження зображень."""
+
+    def test_save_is_content_addressed(self, store):
+        """Тест що однаковий вміст зберігається один раз під хешем."""
+        key = store.save(PNG)
+
+        assert key == media_key(PNG)
+        assert store.save(PNG) == key
+        assert store.read(key) == PNG
+        assert key in store
+        assert os.listdir(os.path.dirname(store.path(key))) == [key]
+
+    @pytest.mark.asyncio
+    async def test_build_variants(self, store):
+        """Тест що копії зменшуються до максимальної сторони і займають менше місця."""
+        key = store.save(PNG)
+
+        assert await store.build_variants(key) is True
+
+        for variant, max_side in (("thumb", 320), ("medium", 800)):
+            with Image.open(store.path(key, variant)) as image:
+                assert max(image.size) == max_side
+                assert image.format == "JPEG"
+            assert len(store.read(key, variant)) < len(PNG)
+        assert store.processor.rendered == 1
+
+    @pytest.mark.asyncio
+    async def test_small_image_not_upscaled(self, store):
+        """Тест що зображення, менше за копію, не збільшується."""
+        key = store.save(make_png(200, 100))
+
+        await store.build_variants(key)
+
+        with Image.open(store.path(key, "medium")) as image:
+            assert image.size == (200, 100)
+
+    @pytest.mark.asyncio
+    async def test_read_variant_builds_missing_and_falls_back(self, store):
+        """Тест що відсутня копія створюється, а для нечитабельного файлу повертається оригінал."""
+        key = store.save(PNG)
+        with Image.open(io.BytesIO(await store.read_variant(key))) as image:
+            assert max(image.size) == 800
+
+        broken = store.save(b"not an image")
+        assert await store.read_variant(broken) == b"not an image"
+        assert store.processor.failed == 1
+
+    def test_read_missing(self, store):
+        """Тест що відсутній файл повертає None."""
+        assert store.read("0" * 64) is None
+
+    @pytest.mark.asyncio
+    async def test_download(self, store):
+        """Тест що зображення завантажується за URL і зберігається локально."""
+        server = await start_image_server()
+        try:
+            key = await store.download(str(server.make_url("/image")))
+        finally:
+            await server.close()
+
+        assert store.read(key) == PNG
+        assert store.downloads == 1
+        assert store.read(key, "thumb") is not None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("body, content_type, status", [
+        (PNG, "image/png", 404),
+        (b"<html></html>", "text/html", 200),
+        (PNG + b"x" * 2048, "image/png", 200),
+    ])
+    async def test_download_rejected(self, store, body, content_type, status):
+        """Тест що помилка HTTP, не-зображення та завеликий файл не зберігаються."""
+        server = await start_image_server(body, content_type, status)
+        try:
+            assert await store.download(str(server.make_url("/image"))) is None
+        finally:
+            await server.close()
+
+        assert store.downloads == 0
+
+
+class TestSendProductPhoto:
+    """Тести відправки зображення у картці товару."""
+
+    @pytest.mark.asyncio
+    async def test_sends_by_file_id_without_download(self, store):
+        """Тест що товар з file_id відправляється без звернення до сховища."""
+        message = photo_message()
+        product = {'id': 1, 'image_file_id': "cached-id", 'image_key': None, 'image_url': None}
+
+        with patch('handlers.user.products.media_store', store), \
+                patch.object(store, 'download', AsyncMock()) as download:
+            assert await send_product_photo(message, product) is True
+
+        message.answer_photo.assert_awaited_once_with(photo="cached-id")
+        download.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_upload_saves_file_id(self, db_clean, store):
+        """Тест що перше завантаження з диска зберігає file_id у товарі."""
+        key = store.save(PNG)
+        product_id = await db_clean.add_product("Телефон", "Опис", 100.0, "Електроніка", stock=5,
+                                                image_key=key)
+        message = photo_message()
+
+        with patch('handlers.user.products.media_store', store), \
+                patch('handlers.user.products.db', db_clean):
+            assert await send_product_photo(message, await db_clean.get_product_by_id(product_id))
+
+        photo = message.answer_photo.call_args.kwargs['photo']
+        assert isinstance(photo, BufferedInputFile) and photo.data == store.read(key, "medium")
+        product = await db_clean.get_product_by_id(product_id)
+        assert (product['image_key'], product['image_file_id']) == (key, "new-file-id")
+
+    @pytest.mark.asyncio
+    async def test_legacy_url_downloaded_once(self, db_clean, store):
+        """Тест що товар лише з URL завантажується в сховище і отримує file_id."""
+        product_id = await db_clean.add_product("Телефон", "Опис", 100.0, "Електроніка", stock=5,
+                                                image_url="https://example.com/phone.png")
+
+        async def fake_download(url):
+            return store.save(PNG)
+
+        with patch('handlers.user.products.media_store', store), \
+                patch('handlers.user.products.db', db_clean), \
+                patch.object(store, 'download', side_effect=fake_download) as download:
+            assert await send_product_photo(photo_message(), await db_clean.get_product_by_id(product_id))
+            message = photo_message()
+            assert await send_product_photo(message, await db_clean.get_product_by_id(product_id))
+
+        download.assert_awaited_once_with("https://example.com/phone.png")
+        message.answer_photo.assert_awaited_once_with(photo="new-file-id")
+
+    @pytest.mark.asyncio
+    async def test_rejected_file_id_falls_back_to_upload(self, store):
+        """Тест що відхилений Telegram file_id замінюється новим завантаженням."""
+        key = store.save(PNG)
+        message = photo_message()
+        message.answer_photo.side_effect = [
+            TelegramBadRequest(method=MagicMock(), message="wrong file identifier"),
+            MagicMock(photo=[MagicMock(file_id="fresh-id")]),
+        ]
+        product = {'id': 1, 'image_file_id': "stale-id", 'image_key': key, 'image_url': None}
+
+        with patch('handlers.user.products.media_store', store), \
+                patch('handlers.user.products.db.update_product', new_callable=AsyncMock) as update:
+            assert await send_product_photo(message, product) is True
+
+        update.assert_awaited_once_with(1, image_key=key, image_file_id="fresh-id")
+
+    @pytest.mark.asyncio
+    async def test_no_image(self, store):
+        """Тест що товар без зображення нічого не відправляє."""
+        message = photo_message()
+        product = {'id': 1, 'image_file_id': None, 'image_key': None, 'image_url': None}
+
+        with patch('handlers.user.products.media_store', store):
+            assert await send_product_photo(message, product) is False
+
+        message.answer_photo.assert_not_called()
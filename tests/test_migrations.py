@@ -0,0 +1,142 @@
+"""Тести для рушія міграцій схеми (migrations/)."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from migrations import MIGRATIONS_DIR, load_migrations, run_migrations
+
+
+class CountingConnection:
+    """Обгортка над підключенням, що рахує запити до БД."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.queries = []
+
+    def _counted(self, name):
+        method = getattr(self._conn, name)
+
+        async def wrapper(query, *args):
+            self.queries.append(query)
+            return await method(query, *args)
+        return wrapper
+
+    def __getattr__(self, name):
+        if name in ("fetch", "fetchval", "fetchrow", "execute"):
+            return self._counted(name)
+        return getattr(self._conn, name)
+
+
+@pytest_asyncio.fixture
+async def migrations_dir(db, tmp_path):
+    """Каталог з тестовими міграціями; прибирає їх результат після тесту."""
+    yield tmp_path
+    async with db.pool.acquire() as conn:
+        await conn.execute("DELETE FROM schema_migrations WHERE version >= 9000")
+        await conn.execute("DROP TABLE IF EXISTS migration_test_items")
+
+
+class TestLoadMigrations:
+    """Тести для завантаження файлів міграцій."""
+
+    def test_project_migrations_are_ordered(self):
+        """Тест що міграції проекту впорядковані за версією."""
+        migrations = load_migrations()
+        versions = [version for version, _, _ in migrations]
+
+        assert versions == sorted(versions)
+        assert versions[0] == 1
+        assert migrations[0][1] == "0001_initial_schema"
+        assert all(path.suffix == ".sql" for path in MIGRATIONS_DIR.glob("0*"))
+
+    def test_duplicate_versions_rejected(self, tmp_path):
+        """Тест що дублікати номерів версій відхиляються."""
+        (tmp_path / "0001_a.sql").write_text("SELECT 1")
+        (tmp_path / "0001_b.sql").write_text("SELECT 1")
+
+        with pytest.raises(ValueError):
+            load_migrations(tmp_path)
+
+    def test_unexpected_names_skipped(self, tmp_path):
+        """Тест що файли без номера версії пропускаються."""
+        (tmp_path / "0001_ok.sql").write_text("SELECT 1")
+        (tmp_path / "notes.sql").write_text("SELECT 1")
+
+        assert [m[0] for m in load_migrations(tmp_path)] == [1]
+
+
+class TestRunMigrations:
+    """Тести для застосування міграцій."""
+
+    @pytest.mark.asyncio
+    async def test_warm_start_is_single_query(self, db):
+        """Тест що теплий старт робить рівно один запит."""
+        async with db.pool.acquire() as conn:
+            counting = CountingConnection(conn)
+            applied = await run_migrations(counting)
+
+        assert applied == []
+        assert len(counting.queries) == 1
+
+    @pytest.mark.asyncio
+    async def test_applies_only_pending(self, db, migrations_dir):
+        """Тест що застосовуються лише нові міграції."""
+        (migrations_dir / "9001_create_items.sql").write_text(
+            "CREATE TABLE migration_test_items (id INTEGER PRIMARY KEY)"
+        )
+
+        async with db.pool.acquire() as conn:
+            assert await run_migrations(conn, migrations_dir) == [9001]
+
+            (migrations_dir / "9002_add_item.sql").write_text(
+                "INSERT INTO migration_test_items VALUES (1)"
+            )
+            assert await run_migrations(conn, migrations_dir) == [9002]
+            assert await run_migrations(conn, migrations_dir) == []
+
+            count = await conn.fetchval("SELECT COUNT(*) FROM migration_test_items")
+            recorded = await conn.fetchval(
+                "SELECT COUNT(*) FROM schema_migrations WHERE version >= 9000"
+            )
+
+        assert count == 1
+        assert recorded == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_migration_rolls_back(self, db, migrations_dir):
+        """Тест що помилка в міграції відкочує всі кроки запуску."""
+        (migrations_dir / "9001_create_items.sql").write_text(
+            "CREATE TABLE migration_test_items (id INTEGER PRIMARY KEY)"
+        )
+        (migrations_dir / "9002_broken.sql").write_text("INSERT INTO no_such_table VALUES (1)")
+
+        async with db.pool.acquire() as conn:
+            with pytest.raises(Exception):
+                await run_migrations(conn, migrations_dir)
+
+            exists = await conn.fetchval("SELECT to_regclass('migration_test_items') IS NOT NULL")
+            recorded = await conn.fetchval(
+                "SELECT COUNT(*) FROM schema_migrations WHERE version >= 9000"
+            )
+
+        assert exists is False
+        assert recorded == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_instances_apply_once(self, db, migrations_dir):
+        """Тест що одночасний старт кількох екземплярів застосовує міграцію один раз."""
+        # Повторне виконання цієї міграції впало б з помилкою "already exists"
+        (migrations_dir / "9001_create_items.sql").write_text(
+            "CREATE TABLE migration_test_items (id INTEGER PRIMARY KEY); "
+            "SELECT pg_sleep(0.1);"
+        )
+
+        async def start_instance():
+            async with db.pool.acquire() as conn:
+                return await run_migrations(conn, migrations_dir)
+
+        results = await asyncio.gather(*(start_instance() for _ in range(4)))
+
+        assert sorted(results) == [[], [], [], [9001]]
@@ -0,0 +1,166 @@
+"""Тести для вихідної черги повідомлень Telegram."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from outbound import OutboundQueue, TokenBucket
+
+
+def make_bot(side_effect=None):
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=side_effect)
+    bot.edit_message_text = AsyncMock()
+    return bot
+
+
+async def drain(queue: OutboundQueue, bot, timeout: float = 2) -> float:
+    """Запускає чергу, чекає на відправку всіх повідомлень; повертає тривалість."""
+    started = time.monotonic()
+    queue.start(bot)
+    try:
+        await asyncio.wait_for(queue.join(), timeout)
+        return time.monotonic() - started
+    finally:
+        await queue.close()
+
+
+class TestTokenBucket:
+    """Тести token bucket."""
+
+    def test_burst_then_rate(self):
+        """Тест що після запасу токени з'являються зі швидкістю rate."""
+        bucket = TokenBucket(rate=10, capacity=2)
+        now = bucket.updated
+
+        bucket.take(now)
+        bucket.take(now)
+
+        assert bucket.delay(now) == pytest.approx(0.1)
+        assert bucket.delay(now + 0.1) == pytest.approx(0, abs=1e-9)
+        assert bucket.full(now + 0.3)
+
+
+class TestOutboundQueue:
+    """Тести відправки повідомлень з черги."""
+
+    @pytest.mark.asyncio
+    async def test_send_does_not_block(self):
+        """Тест що постановка в чергу не чекає на відправку."""
+        queue = OutboundQueue()
+        bot = make_bot()
+
+        assert queue.send_message(1, "a") == 0
+        assert queue.send_message(2, "b") == 1
+        bot.send_message.assert_not_called()
+        assert queue.stats()["depth"] == 2
+
+        await drain(queue, bot)
+
+        assert [c.args for c in bot.send_message.call_args_list] == [(1, "a"), (2, "b")]
+        stats = queue.stats()
+        assert (stats["depth"], stats["sent"]) == (0, 2)
+        assert 0 < stats["latency_avg"] <= stats["latency_p95"] < 1
+
+    @pytest.mark.asyncio
+    async def test_global_rate_limit(self):
+        """Тест що після запасу повідомлення відправляються не швидше за rate за секунду."""
+        queue = OutboundQueue(rate=100, burst=5)
+        for i in range(15):
+            queue.send_message(i, "text")
+
+        elapsed = await drain(queue, make_bot())
+
+        # 5 одразу, ще 10 - зі швидкістю 100 за секунду
+        assert elapsed >= 0.09
+        assert queue.sent == 15
+
+    @pytest.mark.asyncio
+    async def test_chat_rate_limit_keeps_order_and_other_chats(self):
+        """Тест що ліміт чату зберігає порядок і не затримує інші чати."""
+        queue = OutboundQueue(chat_rate=20, chat_burst=1)
+        bot = make_bot()
+        sent_at = {}
+
+        async def record(chat_id, text, reply_markup=None):
+            sent_at[(chat_id, text)] = time.monotonic()
+        bot.send_message.side_effect = record
+        for text in ("1", "2", "3"):
+            queue.send_message(1, text)
+        queue.send_message(2, "other")
+        started = time.monotonic()
+
+        await drain(queue, bot)
+
+        chat_1 = [c.args[1] for c in bot.send_message.call_args_list if c.args[0] == 1]
+        assert chat_1 == ["1", "2", "3"]
+        assert sent_at[(1, "3")] - sent_at[(1, "1")] >= 0.09
+        assert sent_at[(2, "other")] - started < 0.05
+
+    @pytest.mark.asyncio
+    async def test_pending_edits_coalesced(self):
+        """Тест що редагування одного повідомлення в черзі зливаються в останнє."""
+        queue = OutboundQueue(chat_rate=50)
+        bot = make_bot()
+
+        queue.edit_message_text(1, 10, "⏳ 5 с")
+        queue.edit_message_text(1, 10, "⏳ 10 с")
+        queue.edit_message_text(1, 11, "інше")
+        queue.edit_message_text(1, 10, "✅ Готово")
+
+        await drain(queue, bot)
+
+        assert [(c.args[0], c.kwargs['message_id']) for c in bot.edit_message_text.call_args_list] == [
+            ("✅ Готово", 10), ("інше", 11)
+        ]
+        assert queue.coalesced == 2
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_queue(self):
+        """Тест що при flood control уся відправка зупиняється на retry_after, а повідомлення повторюється."""
+        bot = make_bot()
+        sent_at = []
+
+        async def flood_once(chat_id, text, reply_markup=None):
+            sent_at.append(time.monotonic())
+            if len(sent_at) == 1:
+                raise TelegramRetryAfter(method=MagicMock(), message="flood", retry_after=0.1)
+        bot.send_message.side_effect = flood_once
+        queue = OutboundQueue(chat_rate=50, batch_size=1)
+        queue.send_message(1, "first")
+        queue.send_message(2, "second")
+
+        await drain(queue, bot)
+
+        assert (queue.sent, queue.rate_limited, queue.failed) == (2, 1, 0)
+        assert sorted(c.args[1] for c in bot.send_message.call_args_list) == ["first", "first", "second"]
+        assert min(sent_at[1:]) - sent_at[0] >= 0.1
+
+    @pytest.mark.asyncio
+    async def test_blocked_chat_dropped(self):
+        """Тест що повідомлення користувачу, який заблокував бота, не повторюється."""
+        bot = make_bot(side_effect=TelegramForbiddenError(method=MagicMock(), message="blocked"))
+        queue = OutboundQueue()
+        queue.send_message(1, "text")
+
+        await drain(queue, bot)
+
+        assert (queue.sent, queue.failed) == (0, 1)
+        bot.send_message.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_owned_bot_closed(self):
+        """Тест що черга без переданого Bot створює власний і закриває його сесію."""
+        queue = OutboundQueue()
+
+        with patch('outbound.BOT_TOKEN', "42:TEST"):
+            queue.start()
+        bot = queue.bot
+        assert bot is not None
+        await queue.close()
+
+        assert queue.bot is None
+        assert bot.session._session is None or bot.session._session.closed
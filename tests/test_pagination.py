@@ -0,0 +1,80 @@
+"""Тести для курсорної пагінації (pagination.py)."""
+
+from datetime import datetime
+
+import pytest
+
+from pagination import Cursor, Page, build_page, parse_cursor
+
+
+def make_rows(count):
+    """Рядки "новіші першими" з парами однакових created_at."""
+    return [
+        {'id': 100 - i, 'created_at': datetime(2025, 1, 1, 12, 0, (60 - i) // 2, 123456)}
+        for i in range(count)
+    ]
+
+
+def row_key(row):
+    return row['created_at'], row['id']
+
+
+class TestCursor:
+    """Тести кодування курсора."""
+
+    def test_roundtrip(self):
+        """Тест що курсор точно відновлюється з рядка."""
+        cursor = Cursor(42, datetime(2025, 3, 4, 5, 6, 7, 890123), backward=True)
+
+        token = cursor.encode()
+
+        assert Cursor.decode(token) == cursor
+        assert ":" not in token
+        assert len(f"admin_status_page:delivered:{token}") <= 64
+
+    def test_id_only_cursor(self):
+        """Тест курсора лише за ID."""
+        assert Cursor(7).encode() == "n.7"
+        assert Cursor.decode("p.7") == Cursor(7, backward=True)
+
+    @pytest.mark.parametrize("token", ["", "x1.2", "n12", "nabc.1", "n1.x"])
+    def test_invalid_cursor(self, token):
+        """Тест що некоректний курсор відхиляється, а parse_cursor дає першу сторінку."""
+        with pytest.raises(ValueError):
+            Cursor.decode(token)
+        assert parse_cursor(token) is None
+
+
+class TestBuildPage:
+    """Тести збирання сторінки з вибірки limit + 1 рядків."""
+
+    def test_first_page(self):
+        """Тест першої сторінки: є наступна, немає попередньої."""
+        rows = make_rows(4)
+
+        page = build_page(rows, 3, None, row_key)
+
+        assert [r['id'] for r in page.items] == [100, 99, 98]
+        assert page.prev_cursor is None
+        assert Cursor.decode(page.next_cursor) == Cursor(98, rows[2]['created_at'])
+
+    def test_last_page(self):
+        """Тест останньої сторінки при переході вперед."""
+        page = build_page(make_rows(2), 3, Cursor(101, datetime(2025, 1, 1)), row_key)
+
+        assert page.next_cursor is None
+        assert Cursor.decode(page.prev_cursor).backward
+
+    def test_backward_page_is_reversed(self):
+        """Тест що при переході назад рядки розвертаються у звичайний порядок."""
+        rows = list(reversed(make_rows(4)))
+
+        page = build_page(rows, 3, Cursor(1, datetime(2025, 1, 1), backward=True), row_key)
+
+        assert [r['id'] for r in page.items] == [99, 98, 97]
+        assert page.next_cursor is not None
+        assert page.prev_cursor is not None
+
+    def test_empty_page(self):
+        """Тест порожньої вибірки."""
+        assert build_page([], 3, Cursor(1), row_key) == Page()
@@ -0,0 +1,321 @@
+"""Тести для вхідних подій LiqPay (payment_events) та їх фонової обробки."""
+
+import asyncio
+import base64
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from handlers.webhook import handle_liqpay_webhook
+from outbound import OutboundQueue
+from payment_events import PaymentEventProcessor, blocking_statuses
+from payments import LiqPayService
+
+
+def liqpay_callback(payload: dict) -> dict:
+    """Підписані дані callback, як їх надсилає LiqPay."""
+    data = base64.b64encode(json.dumps(payload).encode()).decode()
+    return {"data": data, "signature": LiqPayService()._generate_signature(data)}
+
+
+@pytest.fixture
+def outbox():
+    return MagicMock(spec=OutboundQueue)
+
+
+@pytest_asyncio.fixture
+async def paid_order(db_clean, user_factory, product_factory, order_factory):
+    """Замовлення з платежем LiqPay у статусі pending."""
+    user = await user_factory.create()
+    product = await product_factory.create()
+    order = await order_factory.create(user_id=user['id'], product_id=product['id'])
+    await db_clean.create_payment_record(order['id'], user['id'], float(order['total_price']), "liqpay")
+    return order
+
+
+class TestPaymentEventsInbox:
+    """Тести таблиці payment_events."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_claims_are_disjoint(self, db_clean):
+        """Тест що паралельні обробники не отримують ту саму подію."""
+        for order_id in range(1, 7):
+            await db_clean.add_payment_event({"order_id": order_id, "status": "success"})
+
+        first, second = await asyncio.gather(
+            db_clean.claim_payment_events(3, 60, 5),
+            db_clean.claim_payment_events(3, 60, 5),
+        )
+
+        ids = [event['id'] for event in first + second]
+        assert len(ids) == len(set(ids)) == 6
+        assert first[0]['payload'] == {"order_id": first[0]['payload']['order_id'], "status": "success"}
+        assert await db_clean.claim_payment_events(10, 60, 5) == []
+
+    @pytest.mark.asyncio
+    async def test_failed_event_reclaimed_after_lease(self, db_clean):
+        """Тест що невдала подія повертається після закінчення резервування, до межі спроб."""
+        event_id = await db_clean.add_payment_event({"order_id": 1, "status": "success"})
+
+        [event] = await db_clean.claim_payment_events(10, 0, 2)
+        await db_clean.fail_payment_event(event_id, "boom")
+        [event] = await db_clean.claim_payment_events(10, 0, 2)
+        assert event['attempts'] == 2
+
+        assert await db_clean.claim_payment_events(10, 0, 2) == []
+
+    @pytest.mark.asyncio
+    async def test_repeated_delivery_ignored(self, db_clean):
+        """Тест що повторна доставка того самого (payment_id, status) не створює подію."""
+        payload = {"order_id": 1, "status": "success", "payment_id": 555}
+
+        assert await db_clean.add_payment_event(payload) is not None
+        assert await db_clean.add_payment_event(dict(payload, amount=1)) is None
+        assert await db_clean.add_payment_event(dict(payload, status="failure")) is not None
+
+    @pytest.mark.asyncio
+    async def test_completed_event_not_reclaimed(self, db_clean):
+        """Тест що оброблена подія більше не видається."""
+        event_id = await db_clean.add_payment_event({"order_id": 1, "status": "success"})
+        await db_clean.claim_payment_events(10, 0, 5)
+
+        await db_clean.complete_payment_events([event_id])
+
+        assert await db_clean.claim_payment_events(10, 0, 5) == []
+
+
+class TestSettlePayment:
+    """Тести застосування статусу до платежу і замовлення одним запитом."""
+
+    @pytest.mark.asyncio
+    async def test_updates_payment_and_order(self, db_clean, paid_order):
+        """Тест що платіж і замовлення оновлюються разом, а результат містить покупця."""
+        settled = await db_clean.settle_payment(paid_order['id'], "success", "42", ["success"], "paid")
+
+        payment = await db_clean.get_payment_by_order(paid_order['id'])
+        order = await db_clean.get_order(paid_order['id'])
+        assert settled == {'payment_id': payment['id'], 'order_id': paid_order['id'], 'user_id': paid_order['user_id']}
+        assert (payment['status'], payment['liqpay_payment_id']) == ("success", "42")
+        assert (order['payment_status'], order['payment_method']) == ("paid", "liqpay")
+
+    @pytest.mark.asyncio
+    async def test_blocked_status_changes_nothing(self, db_clean, paid_order):
+        """Тест що заблокований перехід не змінює ні платіж, ні замовлення."""
+        before = await db_clean.get_order(paid_order['id'])
+
+        assert await db_clean.settle_payment(paid_order['id'], "failure", None, ["pending"], "failed") is None
+
+        assert (await db_clean.get_payment_by_order(paid_order['id']))['status'] == "pending"
+        assert (await db_clean.get_order(paid_order['id']))['payment_status'] == before['payment_status']
+
+    @pytest.mark.asyncio
+    async def test_intermediate_status_keeps_order(self, db_clean, paid_order):
+        """Тест що проміжний статус оновлює лише платіж."""
+        before = await db_clean.get_order(paid_order['id'])
+
+        assert await db_clean.settle_payment(paid_order['id'], "processing", None, ["success"]) is not None
+
+        assert (await db_clean.get_order(paid_order['id']))['payment_status'] == before['payment_status']
+
+    @pytest.mark.asyncio
+    async def test_missing_payment(self, db_clean):
+        """Тест що для замовлення без платежу повертається None."""
+        assert await db_clean.settle_payment(999999, "success", None, [], "paid") is None
+
+
+class TestPaymentEventProcessor:
+    """Тести застосування подій до платежів і замовлень."""
+
+    @pytest.mark.asyncio
+    async def test_success_marks_order_paid(self, db_clean, paid_order, outbox):
+        """Тест що подія success оновлює платіж і позначає замовлення оплаченим."""
+        await db_clean.add_payment_event(
+            {"order_id": paid_order['id'], "status": "success", "payment_id": 777}
+        )
+        processor = PaymentEventProcessor(db_clean, outbox=outbox)
+
+        assert await processor.process_batch() == 1
+
+        payment = await db_clean.get_payment_by_order(paid_order['id'])
+        order = await db_clean.get_order(paid_order['id'])
+        assert (payment['status'], payment['liqpay_payment_id']) == ("success", "777")
+        assert order['payment_status'] == "paid"
+        assert processor.processed == 1
+        assert await db_clean.claim_payment_events(10, 0, 5) == []
+
+    @pytest.mark.asyncio
+    async def test_late_status_does_not_overwrite_success(self, db_clean, paid_order, outbox):
+        """Тест що запізнілий processing не перезаписує success."""
+        processor = PaymentEventProcessor(db_clean, outbox=outbox)
+        await processor.apply({"order_id": paid_order['id'], "status": "success", "payment_id": 9})
+
+        await processor.apply({"order_id": paid_order['id'], "status": "processing", "payment_id": 9})
+        await processor.apply({"order_id": paid_order['id'], "status": "failure", "payment_id": 9})
+
+        assert (await db_clean.get_payment_by_order(paid_order['id']))['status'] == "success"
+        assert (await db_clean.get_order(paid_order['id']))['payment_status'] == "paid"
+        assert processor.stale == 2
+
+    def test_blocking_statuses(self):
+        """Тест що платіж не повертається з пізнішого статусу в ранній."""
+        assert "success" in blocking_statuses("processing")
+        assert "processing" in blocking_statuses("processing")
+        assert "processing" not in blocking_statuses("success")
+        assert "success" not in blocking_statuses("reversed")
+        assert "success" in blocking_statuses("failure")
+        assert "failure" not in blocking_statuses("success")
+        assert "reversed" in blocking_statuses("success")
+
+    @pytest.mark.asyncio
+    async def test_retry_after_failure_marks_order_paid(self, db_clean, paid_order, outbox):
+        """Тест що успішна повторна оплата після failure позначає замовлення оплаченим."""
+        processor = PaymentEventProcessor(db_clean, outbox=outbox)
+        await processor.apply({"order_id": paid_order['id'], "status": "failure", "payment_id": 9})
+
+        await processor.apply({"order_id": paid_order['id'], "status": "success", "payment_id": 10})
+
+        payment = await db_clean.get_payment_by_order(paid_order['id'])
+        assert (payment['status'], payment['liqpay_payment_id']) == ("success", "10")
+        assert (await db_clean.get_order(paid_order['id']))['payment_status'] == "paid"
+        assert processor.stale == 0
+        assert [c.args[1][:1] for c in outbox.send_message.call_args_list] == ["❌", "✅"]
+
+    @pytest.mark.asyncio
+    async def test_missing_payment_record_created(self, db_clean, user_factory, product_factory, order_factory, outbox):
+        """Тест що для замовлення без платежу запис створюється з покупцем замовлення."""
+        user = await user_factory.create()
+        product = await product_factory.create()
+        order = await order_factory.create(user_id=user['id'], product_id=product['id'])
+
+        await PaymentEventProcessor(db_clean, outbox=outbox).apply(
+            {"order_id": order['id'], "status": "success", "payment_id": 3, "amount": 10, "currency": "UAH"}
+        )
+
+        payment = await db_clean.get_payment_by_order(order['id'])
+        assert (payment['user_id'], payment['status'], payment['liqpay_payment_id']) == (user['id'], "success", "3")
+        assert (await db_clean.get_order(order['id']))['payment_status'] == "paid"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status, text, with_keyboard", [
+        ("success", "✅ Оплату замовлення", False),
+        ("failure", "❌ Оплата замовлення", True),
+    ])
+    async def test_buyer_notified_once(self, db_clean, paid_order, outbox, status, text, with_keyboard):
+        """Тест що покупець отримує одне сповіщення про результат оплати, у разі невдачі - з кнопками."""
+        processor = PaymentEventProcessor(db_clean, outbox=outbox)
+
+        await processor.apply({"order_id": paid_order['id'], "status": "processing", "payment_id": 5})
+        await processor.apply({"order_id": paid_order['id'], "status": status, "payment_id": 5})
+        await processor.apply({"order_id": paid_order['id'], "status": status, "payment_id": 5})
+
+        outbox.send_message.assert_called_once()
+        chat_id, message = outbox.send_message.call_args.args
+        assert chat_id == paid_order['user_id']
+        assert message.startswith(f"{text} #{paid_order['id']}")
+        markup = outbox.send_message.call_args.kwargs.get('reply_markup')
+        assert (markup is not None) == with_keyboard
+        if with_keyboard:
+            assert markup.inline_keyboard[0][0].callback_data == "payment_retry"
+
+    @pytest.mark.asyncio
+    async def test_error_keeps_event_for_retry(self, db_clean, paid_order, outbox):
+        """Тест що помилка обробки не втрачає подію."""
+        event_id = await db_clean.add_payment_event({"order_id": paid_order['id'], "status": "failure"})
+        processor = PaymentEventProcessor(db_clean, lease=0, outbox=outbox)
+
+        with patch.object(db_clean, 'settle_payment', side_effect=ConnectionError("db down")):
+            await processor.process_batch()
+
+        assert processor.failed == 1
+        [event] = await db_clean.claim_payment_events(10, 0, 5)
+        assert event['id'] == event_id
+        async with db_clean.pool.acquire() as conn:
+            assert await conn.fetchval("SELECT last_error FROM payment_events WHERE id = $1",
+                                       event_id) == "db down"
+
+    @pytest.mark.asyncio
+    async def test_worker_wakes_up_on_notify(self, db_clean, paid_order, outbox):
+        """Тест що фоновий обробник забирає нову подію одразу після notify."""
+        processor = PaymentEventProcessor(db_clean, poll_interval=30, outbox=outbox)
+        processor.start()
+        try:
+            await asyncio.sleep(0.05)
+            await db_clean.add_payment_event({"order_id": paid_order['id'], "status": "success"})
+            processor.notify()
+            for _ in range(100):
+                if processor.processed:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await processor.close()
+
+        assert (await db_clean.get_order(paid_order['id']))['payment_status'] == "paid"
+
+
+class TestLiqPayWebhook:
+    """Тести швидкого прийому callback LiqPay."""
+
+    async def make_client(self) -> TestClient:
+        app = web.Application()
+        app.router.add_post('/webhook/liqpay', handle_liqpay_webhook)
+        client = TestClient(TestServer(app))
+        await client.start_server()
+        return client
+
+    @pytest.mark.asyncio
+    async def test_callback_stored_without_processing(self, db_clean, paid_order, outbox):
+        """Тест що webhook лише записує подію і відповідає 200, не змінюючи замовлення."""
+        processor = PaymentEventProcessor(db_clean, outbox=outbox)
+        client = await self.make_client()
+        try:
+            with patch('handlers.webhook.payment_events', processor), \
+                    patch.object(processor, 'notify') as notify:
+                response = await client.post('/webhook/liqpay', data=liqpay_callback(
+                    {"order_id": paid_order['id'], "status": "success", "payment_id": 1}
+                ))
+        finally:
+            await client.close()
+
+        assert response.status == 200
+        notify.assert_called_once()
+        [event] = await db_clean.claim_payment_events(10, 60, 5)
+        assert event['payload']['order_id'] == paid_order['id']
+        assert (await db_clean.get_order(paid_order['id']))['payment_status'] != "paid"
+
+    @pytest.mark.asyncio
+    async def test_repeated_callback_answered_from_memory(self, db_clean, paid_order, outbox):
+        """Тест що повторний callback отримує 200 без звернення до БД."""
+        processor = PaymentEventProcessor(db_clean, outbox=outbox)
+        callback = liqpay_callback({"order_id": paid_order['id'], "status": "success", "payment_id": 2})
+        client = await self.make_client()
+        try:
+            with patch('handlers.webhook.payment_events', processor), \
+                    patch.object(db_clean, 'add_payment_event', wraps=db_clean.add_payment_event) as add:
+                responses = [await client.post('/webhook/liqpay', data=callback) for _ in range(3)]
+        finally:
+            await client.close()
+
+        assert [response.status for response in responses] == [200, 200, 200]
+        add.assert_awaited_once()
+        assert processor.duplicates == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("form, status", [
+        ({}, 400),
+        ({"data": "e30=", "signature": "forged"}, 401),
+    ])
+    async def test_invalid_callback_rejected(self, db_clean, form, status, outbox):
+        """Тест що запит без даних або з чужим підписом не потрапляє в таблицю."""
+        client = await self.make_client()
+        try:
+            with patch('handlers.webhook.payment_events', PaymentEventProcessor(db_clean, outbox=outbox)):
+                response = await client.post('/webhook/liqpay', data=form)
+        finally:
+            await client.close()
+
+        assert response.status == status
+        assert await db_clean.claim_payment_events(10, 60, 5) == []
@@ -0,0 +1,187 @@
+"""Тести для звірки завислих платежів LiqPay."""
+
+import asyncio
+import base64
+import json
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from http_client import HTTPClient
+from outbound import OutboundQueue
+from payment_reconciliation import PaymentReconciler
+from payments import LiqPayService
+
+
+class FakeLiqPay:
+    """Локальний сервер LiqPay API, що відповідає на action=status."""
+
+    def __init__(self, statuses: dict, delay: float = 0.02):
+        self.statuses = statuses
+        self.delay = delay
+        self.requests = 0
+        self.active = 0
+        self.peak = 0
+        self.server = None
+
+    async def handle(self, request):
+        form = await request.post()
+        order_id = json.loads(base64.b64decode(form['data']))['order_id']
+        self.requests += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        status = self.statuses.get(order_id)
+        if status is None:
+            return web.json_response({"result": "error", "status": "error", "err_code": "payment_not_found"})
+        return web.json_response({"result": "ok", "status": status, "payment_id": 1000 + int(order_id)})
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/api/request", self.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return str(self.server.make_url("/api/"))
+
+
+@pytest.fixture
+def outbox():
+    return MagicMock(spec=OutboundQueue)
+
+
+@pytest_asyncio.fixture
+async def liqpay():
+    http = HTTPClient()
+    service = LiqPayService(http=http)
+    service.public_key, service.private_key = "public", "private"
+    yield service
+    await http.close()
+
+
+async def create_payments(db, user_factory, product_factory, order_factory, count: int, age_minutes: int = 60):
+    """Замовлення з платежами LiqPay у статусі pending, створеними age_minutes тому."""
+    user = await user_factory.create()
+    product = await product_factory.create(stock=count)
+    orders = []
+    for _ in range(count):
+        order = await order_factory.create(user_id=user['id'], product_id=product['id'])
+        await db.create_payment_record(order['id'], user['id'], float(order['total_price']), "liqpay")
+        orders.append(order)
+    async with db.pool.acquire() as conn:
+        await conn.execute(
+            "UPDATE payments SET created_at = CURRENT_TIMESTAMP - make_interval(mins => $1)", age_minutes
+        )
+    return orders
+
+
+class TestPaymentReconciler:
+    """Тести звірки статусів з LiqPay API."""
+
+    @pytest.mark.asyncio
+    async def test_applies_statuses_in_batches(self, db_clean, user_factory, product_factory, order_factory, liqpay, outbox):
+        """Тест що статуси з LiqPay застосовуються до платежів і замовлень пакетами."""
+        orders = await create_payments(db_clean, user_factory, product_factory, order_factory, 7)
+        statuses = {str(orders[0]['id']): "success", str(orders[1]['id']): "failure",
+                    str(orders[2]['id']): "processing"}
+        fake = FakeLiqPay(statuses)
+        liqpay.api_url = await fake.start()
+        reconciler = PaymentReconciler(db_clean, liqpay=liqpay, batch_size=3, concurrency=2, outbox=outbox)
+        try:
+            stats = await reconciler.run_once()
+        finally:
+            await fake.server.close()
+
+        assert (stats["checked"], stats["updated"], stats["failed"]) == (7, 3, 4)
+        assert fake.requests == 7
+        assert fake.peak == 2
+        assert {row['order_id'] for row in stats["settled"]} == {order['id'] for order in orders[:3]}
+        assert stats["rate"] > 0
+        # Сповіщення лише про фінальний результат: success і failure
+        assert sorted(c.args[1][:1] for c in outbox.send_message.call_args_list) == ["✅", "❌"]
+
+        paid = await db_clean.get_payment_by_order(orders[0]['id'])
+        assert (paid['status'], paid['liqpay_payment_id']) == ("success", str(1000 + orders[0]['id']))
+        assert (await db_clean.get_order(orders[0]['id']))['payment_status'] == "paid"
+        assert (await db_clean.get_order(orders[1]['id']))['payment_status'] == "failed"
+        assert (await db_clean.get_payment_by_order(orders[3]['id']))['status'] == "pending"
+
+    @pytest.mark.asyncio
+    async def test_skips_recent_and_final_payments(self, db_clean, user_factory, product_factory, order_factory, liqpay, outbox):
+        """Тест що нові та вже завершені платежі не запитуються."""
+        [settled, recent] = await create_payments(db_clean, user_factory, product_factory, order_factory, 2)
+        await db_clean.settle_payment(settled['id'], "success", "1", ["success"], "paid")
+        async with db_clean.pool.acquire() as conn:
+            await conn.execute("UPDATE payments SET created_at = CURRENT_TIMESTAMP WHERE order_id = $1",
+                               recent['id'])
+        fake = FakeLiqPay({})
+        liqpay.api_url = await fake.start()
+        try:
+            stats = await PaymentReconciler(db_clean, liqpay=liqpay, stale_minutes=15, outbox=outbox).run_once()
+        finally:
+            await fake.server.close()
+
+        assert stats["checked"] == 0
+        assert fake.requests == 0
+
+    @pytest.mark.asyncio
+    async def test_abandoned_payments_expire(self, db_clean, user_factory, product_factory, order_factory,
+                                             liqpay, outbox):
+        """Тест що платіж, старший за max_age_minutes, стає expired і більше не запитується."""
+        [abandoned] = await create_payments(db_clean, user_factory, product_factory, order_factory, 1,
+                                            age_minutes=60 * 25)
+        fake = FakeLiqPay({})
+        liqpay.api_url = await fake.start()
+        reconciler = PaymentReconciler(db_clean, liqpay=liqpay, max_age_minutes=60 * 24, outbox=outbox)
+        try:
+            first = await reconciler.run_once()
+            second = await reconciler.run_once()
+        finally:
+            await fake.server.close()
+
+        assert (first["expired"], first["checked"]) == (1, 0)
+        assert (second["expired"], second["checked"]) == (0, 0)
+        assert fake.requests == 0
+        assert (await db_clean.get_payment_by_order(abandoned['id']))['status'] == "expired"
+        outbox.send_message.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_payments_not_polled(self, db_clean, user_factory, product_factory, order_factory,
+                                                 liqpay, outbox):
+        """Тест що скасований покупцем платіж не запитується в LiqPay."""
+        [order] = await create_payments(db_clean, user_factory, product_factory, order_factory, 1)
+        payment = await db_clean.get_payment_by_order(order['id'])
+        await db_clean.update_payment_status(payment['id'], "cancelled")
+        fake = FakeLiqPay({})
+        liqpay.api_url = await fake.start()
+        try:
+            stats = await PaymentReconciler(db_clean, liqpay=liqpay, outbox=outbox).run_once()
+        finally:
+            await fake.server.close()
+
+        assert (stats["checked"], stats["expired"]) == (0, 0)
+        assert fake.requests == 0
+        assert (await db_clean.get_payment_by_order(order['id']))['status'] == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_does_not_overwrite_webhook_result(self, db_clean, user_factory, product_factory, order_factory, liqpay, outbox):
+        """Тест що запізнілий статус з API не перезаписує фінальний статус з webhook."""
+        [order] = await create_payments(db_clean, user_factory, product_factory, order_factory, 1)
+        fake = FakeLiqPay({str(order['id']): "processing"})
+        liqpay.api_url = await fake.start()
+        reconciler = PaymentReconciler(db_clean, liqpay=liqpay, outbox=outbox)
+        try:
+            stale = await db_clean.get_stale_payments(15, ["success"])
+            # Callback success приходить між вибіркою і застосуванням результату
+            await db_clean.settle_payment(order['id'], "success", "1", ["success"], "paid")
+            settlement = await reconciler._check(stale[0], asyncio.Semaphore(1))
+        finally:
+            await fake.server.close()
+
+        assert await db_clean.settle_payments([settlement]) == []
+        assert (await db_clean.get_payment_by_order(order['id']))['status'] == "success"
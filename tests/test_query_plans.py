@@ -0,0 +1,168 @@
+"""Регресійні тести планів гарячих запитів Database (EXPLAIN (FORMAT JSON)).
+
+Тест наповнює БД ~100k рядків у кожній гарячій таблиці всередині транзакції,
+виконує методи Database на цьому ж підключенні, записує їх SQL і перевіряє,
+що жоден з гарячих запитів не читає таблицю послідовним скануванням.
+Транзакція відкочується, тому тестова БД лишається незмінною.
+"""
+
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+
+from pagination import Cursor
+
+SEED_ROWS = 100_000
+
+
+class RecordingConnection:
+    """Обгортка над підключенням, що записує запити методів Database."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.queries = []
+
+    def _recorded(self, name):
+        method = getattr(self._conn, name)
+
+        async def wrapper(query, *args):
+            self.queries.append((query, args))
+            return await method(query, *args)
+        return wrapper
+
+    def __getattr__(self, name):
+        if name in ("fetch", "fetchval", "fetchrow", "execute"):
+            return self._recorded(name)
+        return getattr(self._conn, name)
+
+
+class RecordingPool:
+    """Пул, що завжди віддає одне й те саме (наповнене) підключення."""
+
+    def __init__(self, conn):
+        self.conn = RecordingConnection(conn)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+async def seed(conn):
+    """Наповнює гарячі таблиці даними з реалістичним розподілом."""
+    await conn.execute("""
+        INSERT INTO users (id, username, first_name, created_at)
+        SELECT 500000000 + g, 'plan_user_' || g, 'Plan',
+               TIMESTAMP '2024-01-01' + g * INTERVAL '1 minute'
+        FROM generate_series(1, $1) g
+    """, SEED_ROWS)
+    # 500 категорій, кожен п'ятий товар без залишку
+    await conn.execute("""
+        INSERT INTO products (name, description, price, category, stock)
+        SELECT 'Plan product ' || g, 'Seeded', 100 + g % 900,
+               'Plan category ' || g % 500,
+               CASE WHEN g % 5 = 0 THEN 0 ELSE g % 50 + 1 END
+        FROM generate_series(1, $1) g
+    """, SEED_ROWS)
+    await conn.execute("""
+        INSERT INTO orders (user_id, user_name, product_id, quantity, total_price, status, created_at)
+        SELECT 500000000 + g % 10000 + 1, 'Plan', p.id, 1, p.price,
+               (ARRAY['pending', 'confirmed', 'shipped', 'delivered', 'cancelled'])[g % 5 + 1],
+               TIMESTAMP '2024-01-01' + g * INTERVAL '1 minute'
+        FROM generate_series(1, $1) g
+        JOIN products p ON p.name = 'Plan product ' || (g % $1 + 1)
+    """, SEED_ROWS)
+    await conn.execute("""
+        INSERT INTO order_edit_logs (order_id, admin_id, field_name, old_value, new_value)
+        SELECT id, 1, 'phone', 'old', 'new' FROM orders WHERE user_name = 'Plan'
+    """)
+    await conn.execute("""
+        INSERT INTO product_edit_logs (product_id, admin_id, field_name, old_value, new_value)
+        SELECT id, 1, 'price', 'old', 'new' FROM products WHERE description = 'Seeded'
+    """)
+    await conn.execute("""
+        INSERT INTO payments (order_id, user_id, amount, payment_method)
+        SELECT id, user_id, total_price, 'liqpay' FROM orders WHERE user_name = 'Plan'
+    """)
+    await conn.execute(
+        "ANALYZE users; ANALYZE products; ANALYZE orders; "
+        "ANALYZE order_edit_logs; ANALYZE product_edit_logs; ANALYZE payments"
+    )
+
+
+def plan_nodes(plan):
+    """Обходить дерево плану EXPLAIN (FORMAT JSON)."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+@pytest_asyncio.fixture
+async def seeded(db):
+    """Підключення з наповненою БД у відкритій транзакції (відкочується після тесту)."""
+    pool = db.pool
+    conn = await pool.acquire()
+    tx = conn.transaction()
+    await tx.start()
+    try:
+        await seed(conn)
+        ids = await conn.fetchrow("""
+            SELECT (SELECT MAX(id) FROM orders) AS order_id,
+                   (SELECT MAX(id) FROM products) AS product_id
+        """)
+
+        db.pool = RecordingPool(conn)
+        db.catalog.enabled = False
+        yield db, conn, dict(ids)
+    finally:
+        db.pool = pool
+        await tx.rollback()
+        await pool.release(conn)
+
+
+# Курсор посередині історії: 2024-02-01, id 50000
+DEEP_CURSOR = Cursor(50000, datetime(2024, 2, 1)).encode()
+
+# (назва, виклик методу Database) для кожного гарячого запиту
+HOT_QUERIES = [
+    ("get_user_orders", lambda db, ids: db.get_user_orders(500000042)),
+    ("get_orders_by_status", lambda db, ids: db.get_orders_by_status("pending")),
+    ("get_user_orders_page", lambda db, ids: db.get_user_orders_page(500000042, DEEP_CURSOR)),
+    ("get_orders_by_status (deep page)",
+     lambda db, ids: db.get_orders_by_status("pending", DEEP_CURSOR)),
+    ("get_users_page", lambda db, ids: db.get_users_page(DEEP_CURSOR)),
+    ("get_order", lambda db, ids: db.get_order(ids['order_id'])),
+    ("get_products_by_category", lambda db, ids: db.get_products_by_category("Plan category 42")),
+    ("get_product_by_id", lambda db, ids: db.get_product_by_id(ids['product_id'])),
+    ("get_order_edit_logs", lambda db, ids: db.get_order_edit_logs(ids['order_id'])),
+    ("get_product_edit_logs", lambda db, ids: db.get_product_edit_logs(ids['product_id'])),
+    ("get_payment_by_order", lambda db, ids: db.get_payment_by_order(ids['order_id'])),
+    ("get_user", lambda db, ids: db.get_user(500000042)),
+]
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes(seeded):
+    """Тест що гарячі запити не сканують таблиці повністю на 100k+ рядків."""
+    database, conn, ids = seeded
+    recorder = database.pool.conn
+    failures = []
+
+    for name, call in HOT_QUERIES:
+        recorder.queries.clear()
+        await call(database, ids)
+        assert recorder.queries, f"{name} did not query the database"
+
+        for query, args in recorder.queries:
+            raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+            plan = json.loads(raw)[0]["Plan"]
+            seq_scans = [
+                node.get("Relation Name") for node in plan_nodes(plan)
+                if node["Node Type"] == "Seq Scan"
+            ]
+            if seq_scans:
+                failures.append(f"{name}: Seq Scan on {seq_scans}")
+
+    assert not failures, "Hot queries fall back to sequential scans:\n" + "\n".join(failures)
@@ -0,0 +1,191 @@
+"""Тести для кешу озвучених описів товарів."""
+
+import asyncio
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram.types import BufferedInputFile
+
+from tts_cache import TTSCache, tts_cache_key
+from tts_service import get_product_description_for_tts
+
+
+def audio_file(data: bytes) -> BufferedInputFile:
+    return BufferedInputFile(data, filename="product_info.mp3")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TTSCache(directory=str(tmp_path), max_bytes=1000)
+
+
+class TestTTSCacheKey:
+    """Тести ключа кешу."""
+
+    def test_key_depends_on_text_and_language(self):
+        """Тест що ключ змінюється разом з текстом або мовою."""
+        key = tts_cache_key("Товар: Телефон", "uk")
+
+        assert key == tts_cache_key("Товар: Телефон", "uk")
+        assert key != tts_cache_key("Товар: Телефон", "en")
+        assert key != tts_cache_key("Товар: Телефон.", "uk")
+
+    def test_price_change_changes_key(self):
+        """Тест що зміна ціни товару дає новий ключ."""
+        product = {'name': "Телефон", 'description': "Опис", 'price': 100, 'stock': 5}
+        changed = {**product, 'price': 120}
+
+        assert tts_cache_key(get_product_description_for_tts(product), "uk") != \
+            tts_cache_key(get_product_description_for_tts(changed), "uk")
+
+
+class TestTTSCache:
+    """Тести дискового LRU-кешу."""
+
+    def test_write_and_read(self, cache):
+        """Тест збереження та читання аудіо з диска."""
+        cache.write("a" * 64, b"mp3-bytes", product_id=1)
+
+        assert cache.read("a" * 64) == b"mp3-bytes"
+        assert cache.read("b" * 64) is None
+        assert cache.total_bytes == len(b"mp3-bytes")
+
+    def test_lru_eviction_by_size(self, cache):
+        """Тест що при перевищенні розміру витісняється найдавніше використаний запис."""
+        cache.write("first", b"x" * 400)
+        cache.write("second", b"y" * 400)
+        cache.read("first")
+
+        cache.write("third", b"z" * 400)
+
+        assert "second" not in cache
+        assert not os.path.exists(cache._path("second"))
+        assert cache.read("first") == b"x" * 400
+        assert cache.total_bytes == 800
+
+    def test_index_restored_from_disk(self, cache, tmp_path):
+        """Тест що файли попереднього запуску доступні новому екземпляру."""
+        cache.write("persisted", b"audio")
+
+        restored = TTSCache(directory=str(tmp_path), max_bytes=1000)
+
+        assert restored.read("persisted") == b"audio"
+        assert restored.total_bytes == len(b"audio")
+
+    def test_invalidate_product_after_restart(self, cache, tmp_path):
+        """Тест що інвалідація товару видаляє записи, збережені попереднім запуском."""
+        cache.write("p1", b"a", product_id=1)
+        cache.write("p2", b"b", product_id=2)
+
+        restored = TTSCache(directory=str(tmp_path), max_bytes=1000)
+        restored.invalidate_product(1)
+
+        assert "p1" not in restored
+        assert not os.path.exists(cache._path("p1", 1))
+        assert restored.read("p2") == b"b"
+
+    def test_missing_file_is_a_miss(self, cache):
+        """Тест що видалений ззовні файл не ламає читання."""
+        cache.write("gone", b"audio")
+        os.remove(cache._path("gone"))
+
+        assert cache.read("gone") is None
+        assert "gone" not in cache
+        assert cache.total_bytes == 0
+
+    def test_file_id_lifecycle(self, cache):
+        """Тест збереження та скидання file_id."""
+        cache.write("key", b"audio")
+        assert cache.get_file_id("key") is None
+
+        cache.set_file_id("key", "file-id")
+        assert cache.get_file_id("key") == "file-id"
+
+        cache.forget_file_id("key")
+        assert cache.get_file_id("key") is None
+
+    def test_invalidate_product(self, cache):
+        """Тест що інвалідація видаляє всі записи товару і лише їх."""
+        cache.write("p1-old", b"a", product_id=1)
+        cache.write("p1-new", b"b", product_id=1)
+        cache.write("p2", b"c", product_id=2)
+        cache.set_file_id("p1-new", "file-id")
+
+        cache.invalidate_product(1)
+
+        assert "p1-old" not in cache and "p1-new" not in cache
+        assert cache.get_file_id("p1-new") is None
+        assert cache.read("p2") == b"c"
+
+    @pytest.mark.parametrize("fields, invalidated", [
+        ({'price'}, True),
+        ({'name', 'category'}, True),
+        ({'stock'}, True),
+        ({'category', 'image_url'}, False),
+        (None, True),
+    ])
+    def test_on_product_changed(self, cache, fields, invalidated):
+        """Тест що кеш скидається лише при зміні озвучуваних полів або видаленні."""
+        cache.write("key", b"audio", product_id=7)
+
+        cache.on_product_changed(7, fields)
+
+        assert ("key" not in cache) is invalidated
+
+
+class TestGetAudio:
+    """Тести отримання аудіо через кеш."""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, cache):
+        """Тест що синтез виконується лише при першому зверненні."""
+        with patch('tts_cache.text_to_speech', new_callable=AsyncMock,
+                   return_value=audio_file(b"mp3")) as mock_tts:
+            assert await cache.get_audio("Текст", product_id=1) == b"mp3"
+            assert await cache.get_audio("Текст", product_id=1) == b"mp3"
+
+        mock_tts.assert_called_once_with("Текст", language="uk")
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_synthesis(self, cache):
+        """Тест що одночасні запити одного тексту чекають на один синтез."""
+        async def slow_tts(text, language):
+            await asyncio.sleep(0.05)
+            return audio_file(b"mp3")
+
+        with patch('tts_cache.text_to_speech', side_effect=slow_tts) as mock_tts:
+            results = await asyncio.gather(*(cache.get_audio("Текст") for _ in range(5)))
+
+        assert results == [b"mp3"] * 5
+        assert mock_tts.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_synthesis_is_not_cached(self, cache):
+        """Тест що помилка синтезу не потрапляє в кеш."""
+        with patch('tts_cache.text_to_speech', new_callable=AsyncMock, return_value=None) as mock_tts:
+            assert await cache.get_audio("Текст") is None
+            assert await cache.get_audio("Текст") is None
+
+        assert mock_tts.call_count == 2
+        assert cache.total_bytes == 0
+
+
+class TestDatabaseInvalidation:
+    """Тести інвалідації кешу через зміни товарів у Database."""
+
+    @pytest.mark.asyncio
+    async def test_update_product_invalidates_audio(self, db_clean, cache):
+        """Тест що update_product з новою ціною скидає аудіо товару, а з новою категорією - ні."""
+        db_clean.add_product_listener(cache.on_product_changed)
+        product_id = await db_clean.add_product("Телефон", "Опис", 100.0, "Електроніка", stock=5)
+        product = await db_clean.get_product_by_id(product_id)
+        key = tts_cache_key(get_product_description_for_tts(product), "uk")
+        cache.write(key, b"audio", product_id=product_id)
+
+        await db_clean.update_product(product_id, category="Телефони")
+        assert key in cache
+
+        await db_clean.update_product(product_id, price=120.0)
+        assert key not in cache
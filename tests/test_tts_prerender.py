@@ -0,0 +1,161 @@
+"""Тести для фонового озвучування товарів."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.types import BufferedInputFile
+
+from tts_cache import TTSCache, tts_cache_key
+from tts_prerender import TTSPrerenderer
+from tts_service import get_product_description_for_tts
+
+
+def audio_file(data: bytes = b"mp3") -> BufferedInputFile:
+    return BufferedInputFile(data, filename="product_info.mp3")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TTSCache(directory=str(tmp_path), max_bytes=1024 * 1024)
+
+
+def idle_executor():
+    executor = MagicMock()
+    executor.pending = 0
+    executor.max_workers = 2
+    return executor
+
+
+class TestTTSPrerenderer:
+    """Тести черги пре-рендеру."""
+
+    @pytest.mark.asyncio
+    async def test_schedule_deduplicates(self, cache):
+        """Тест що товар, який уже чекає в черзі, не додається вдруге."""
+        prerenderer = TTSPrerenderer(MagicMock(), cache, idle_executor())
+
+        assert prerenderer.schedule(1) is True
+        assert prerenderer.schedule(1) is False
+        assert prerenderer.schedule(2) is True
+
+    @pytest.mark.parametrize("fields, scheduled", [
+        ({'name', 'price'}, True),
+        ({'stock'}, True),
+        ({'category'}, False),
+        (None, False),
+    ])
+    def test_on_product_changed(self, cache, fields, scheduled):
+        """Тест що в чергу потрапляють лише зміни озвучуваних полів."""
+        prerenderer = TTSPrerenderer(MagicMock(), cache, idle_executor())
+
+        prerenderer.on_product_changed(5, fields)
+
+        assert (5 in prerenderer._queued) is scheduled
+
+    @pytest.mark.asyncio
+    async def test_waits_for_free_tts_thread(self, db_clean, cache):
+        """Тест що фоновий синтез чекає, поки користувацький синтез звільнить пул."""
+        product_id = await db_clean.add_product("Телефон", "Опис", 100.0, "Електроніка", stock=5)
+        executor = idle_executor()
+        executor.pending = 2
+        prerenderer = TTSPrerenderer(db_clean, cache, executor, idle_poll=0.01)
+
+        with patch('tts_cache.text_to_speech', new_callable=AsyncMock, return_value=audio_file()) as mock_tts:
+            prerenderer.schedule(product_id)
+            prerenderer.start()
+            await asyncio.sleep(0.05)
+            mock_tts.assert_not_called()
+
+            executor.pending = 1
+            await asyncio.wait_for(prerenderer.join(), 1)
+            await prerenderer.close()
+
+        mock_tts.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_add_product_makes_first_tap_a_hit(self, db_clean, cache):
+        """Тест що після add_product аудіо нового товару вже лежить у кеші."""
+        prerenderer = TTSPrerenderer(db_clean, cache, idle_executor())
+        # Порядок як у bot.py: кеш отримує зміни першим
+        db_clean.add_product_listener(cache.on_product_changed)
+        db_clean.add_product_listener(prerenderer.on_product_changed)
+
+        with patch('tts_cache.text_to_speech', new_callable=AsyncMock, return_value=audio_file()) as mock_tts:
+            prerenderer.start()
+            product_id = await db_clean.add_product("Телефон", "Опис", 100.0, "Електроніка", stock=5)
+            await asyncio.wait_for(prerenderer.join(), 1)
+            await prerenderer.close()
+
+        mock_tts.assert_called_once()
+        text = get_product_description_for_tts(await db_clean.get_product_by_id(product_id))
+        assert tts_cache_key(text, "uk") in cache
+
+    @pytest.mark.asyncio
+    async def test_update_product_makes_first_tap_a_hit(self, db_clean, cache):
+        """Тест що після update_product аудіо нового опису вже лежить у кеші."""
+        prerenderer = TTSPrerenderer(db_clean, cache, idle_executor(), concurrency=2)
+        db_clean.add_product_listener(cache.on_product_changed)
+        db_clean.add_product_listener(prerenderer.on_product_changed)
+
+        with patch('tts_cache.text_to_speech', new_callable=AsyncMock, return_value=audio_file()) as mock_tts:
+            prerenderer.start()
+            product_id = await db_clean.add_product("Телефон", "Опис", 100.0, "Електроніка", stock=5)
+            await db_clean.update_product(product_id, price=120.0)
+            await asyncio.wait_for(prerenderer.join(), 1)
+            await prerenderer.close()
+
+            product = await db_clean.get_product_by_id(product_id)
+            text = get_product_description_for_tts(product)
+            assert tts_cache_key(text, "uk") in cache
+
+            calls = mock_tts.call_count
+            assert await cache.get_audio(text, product_id=product_id) == b"mp3"
+            assert mock_tts.call_count == calls
+
+    @pytest.mark.asyncio
+    async def test_order_does_not_schedule(self, db_clean, cache, user_factory, product_factory):
+        """Тест що списання залишку замовленням не ставить товар у чергу озвучування."""
+        user = await user_factory.create()
+        product = await product_factory.create()
+        prerenderer = TTSPrerenderer(db_clean, cache, idle_executor())
+        db_clean.add_product_listener(prerenderer.on_product_changed)
+
+        assert await db_clean.create_order(user['id'], user['first_name'], product['id']) is not None
+
+        assert prerenderer._queued == set()
+
+    @pytest.mark.asyncio
+    async def test_warmup_renders_catalog_once(self, db_clean, cache):
+        """Тест що прогрів озвучує кожен товар один раз і пропускає вже озвучені."""
+        for i in range(3):
+            await db_clean.add_product(f"Товар {i}", "Опис", 10.0 + i, "Категорія", stock=1)
+        catalog_size = len(await db_clean.get_all_products())
+        prerenderer = TTSPrerenderer(db_clean, cache, idle_executor(), concurrency=2)
+
+        with patch('tts_cache.text_to_speech', new_callable=AsyncMock, return_value=audio_file()) as mock_tts:
+            prerenderer.start()
+            assert await prerenderer.warmup() == catalog_size
+            await asyncio.wait_for(prerenderer.join(), 1)
+            await prerenderer.warmup()
+            await asyncio.wait_for(prerenderer.join(), 1)
+            await prerenderer.close()
+
+        assert mock_tts.call_count == catalog_size
+        assert (prerenderer.rendered, prerenderer.skipped) == (catalog_size, catalog_size)
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_stop_worker(self, cache):
+        """Тест що помилка одного товару не зупиняє обробку інших."""
+        database = MagicMock()
+        database.get_product_by_id = AsyncMock(side_effect=[RuntimeError("db"), {'id': 2, 'name': "Товар"}])
+        prerenderer = TTSPrerenderer(database, cache, idle_executor())
+        prerenderer.start()
+
+        with patch('tts_cache.text_to_speech', new_callable=AsyncMock, return_value=audio_file()):
+            prerenderer.schedule(1)
+            prerenderer.schedule(2)
+            await asyncio.wait_for(prerenderer.join(), 1)
+            await prerenderer.close()
+
+        assert (prerenderer.failed, prerenderer.rendered) == (1, 1)
@@ -1,11 +1,16 @@
 """Тести для TTS сервісу (Text-to-Speech)."""
 
+import asyncio
+import threading
+import time
 import pytest
 import io
 from unittest.mock import patch, MagicMock, AsyncMock
 from aiogram.types import BufferedInputFile
 
-from tts_service import text_to_speech, get_product_description_for_tts, SUPPORTED_LANGUAGES
+from tts_service import (
+    text_to_speech, get_product_description_for_tts, split_text, SUPPORTED_LANGUAGES, TTSBusyError, TTSExecutor,
+)
 
 
 class TestTextToSpeech:
@@ -72,24 +77,23 @@ class TestTextToSpeech:
             mock_gtts.assert_called_once_with(text="Some text", lang="uk", slow=False)
     
     @pytest.mark.asyncio
-    async def test_text_to_speech_long_text_truncation(self):
-        """Тест скорочення тексту, якщо він довше 500 символів."""
+    async def test_text_to_speech_long_text_is_chunked(self):
+        """Тест що довгий текст озвучується повністю частинами, а не обрізається."""
         with patch('tts_service.gTTS') as mock_gtts:
-            mock_instance = MagicMock()
-            mock_gtts.return_value = mock_instance
-            mock_instance.write_to_fp = MagicMock(side_effect=lambda fp: fp.write(b'audio_data'))
+            mock_gtts.side_effect = lambda text, lang, slow: MagicMock(
+                write_to_fp=lambda fp: fp.write(f"<{len(text)}>".encode())
+            )
             
-            # Текст довший ніж 500 символів
-            long_text = "a" * 600
+            long_text = "Речення про товар. " * 60
             result = await text_to_speech(long_text)
             
             assert result is not None
-            assert isinstance(result, BufferedInputFile)
-            
-            # Перевірити, що текст скорочено до 500 + "..."
-            call_args = mock_gtts.call_args
-            assert call_args[1]['text'] == "a" * 500 + "..."
-            assert len(call_args[1]['text']) == 503
+            spoken = [call.kwargs['text'] for call in mock_gtts.call_args_list]
+            assert len(spoken) > 1
+            assert all(len(chunk) <= 500 for chunk in spoken)
+            assert " ".join(spoken) == long_text.strip()
+            # Частини склеєні в порядку тексту
+            assert result.data == b"".join(f"<{len(chunk)}>".encode() for chunk in spoken)
     
     @pytest.mark.asyncio
     async def test_text_to_speech_exactly_500_chars(self):
@@ -238,3 +242,159 @@ class TestSupportedLanguages:
         for lang_code, lang_name in SUPPORTED_LANGUAGES.items():
             assert isinstance(lang_name, str)
             assert len(lang_name) > 0
+
+
+class TestTTSExecutor:
+    """Тести пулу потоків для синтезу."""
+
+    @pytest.mark.asyncio
+    async def test_updates_processed_during_slow_synthesis(self):
+        """Тест що повільний синтез не блокує обробку інших оновлень."""
+        from datetime import datetime
+        from aiogram import Bot, Dispatcher
+        from aiogram.types import Chat, Message as TgMessage, Update, User as TgUser
+
+        def slow_write(fp):
+            time.sleep(0.5)
+            fp.write(b'audio_data')
+
+        handled_at = []
+        dp = Dispatcher()
+
+        @dp.message()
+        async def other_user(message: TgMessage):
+            handled_at.append(time.perf_counter())
+
+        update = Update(update_id=1, message=TgMessage(
+            message_id=1, date=datetime.now(), text="каталог",
+            from_user=TgUser(id=2, is_bot=False, first_name="Other"),
+            chat=Chat(id=2, type="private")
+        ))
+        bot = Bot(token="42:TEST")
+
+        with patch('tts_service.gTTS') as mock_gtts:
+            mock_gtts.return_value.write_to_fp = slow_write
+            started = time.perf_counter()
+            synthesis = asyncio.create_task(text_to_speech("Повільний синтез"))
+            await asyncio.sleep(0.05)
+            await dp.feed_update(bot, update)
+            result = await synthesis
+
+        assert handled_at and handled_at[0] - started < 0.3
+        assert isinstance(result, BufferedInputFile)
+        await bot.session.close()
+
+    @pytest.mark.asyncio
+    async def test_queue_limit(self):
+        """Тест що понад max_workers + max_queue задач отримують відмову."""
+        executor = TTSExecutor(max_workers=1, max_queue=1, timeout=5)
+        release = threading.Event()
+        running = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(TTSBusyError):
+            await executor.run(release.wait)
+
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        await asyncio.sleep(0.01)
+        assert executor.pending == 0
+        executor.close()
+
+    @pytest.mark.asyncio
+    async def test_timeout_keeps_slot_until_thread_finishes(self):
+        """Тест що після таймауту слот зайнятий, поки потік не завершився."""
+        executor = TTSExecutor(max_workers=1, max_queue=0, timeout=0.05)
+        release = threading.Event()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(release.wait)
+        assert executor.pending == 1
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert executor.pending == 0
+        executor.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_queued_task_never_runs(self):
+        """Тест що скасована задача з черги не виконується."""
+        executor = TTSExecutor(max_workers=1, max_queue=1, timeout=5)
+        release = threading.Event()
+        calls = []
+        busy = asyncio.create_task(executor.run(release.wait))
+        queued = asyncio.create_task(executor.run(calls.append, "queued"))
+        await asyncio.sleep(0.05)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await busy
+        await asyncio.sleep(0.01)
+
+        assert calls == []
+        assert executor.pending == 0
+        executor.close()
+
+    @pytest.mark.asyncio
+    async def test_text_to_speech_returns_none_when_busy(self):
+        """Тест що переповнена черга дає None замість винятку."""
+        with patch('tts_service.tts_executor') as mock_executor:
+            mock_executor.run = AsyncMock(side_effect=TTSBusyError("full"))
+
+            assert await text_to_speech("Some text") is None
+
+
+class TestSplitText:
+    """Тести для функції split_text()."""
+    
+    def test_short_text_is_one_chunk(self):
+        """Тест що короткий текст не ділиться."""
+        assert split_text("Товар: Телефон. Ціна: 100 гривень.", 500) == ["Товар: Телефон. Ціна: 100 гривень."]
+    
+    def test_splits_at_sentence_boundaries(self):
+        """Тест що частини закінчуються на межі речень."""
+        text = "Перше речення. Друге речення! Третє речення? Четверте."
+        
+        assert split_text(text, 30) == ["Перше речення. Друге речення!", "Третє речення? Четверте."]
+    
+    def test_long_sentence_split_by_words(self):
+        """Тест що задовге речення ділиться по словах."""
+        text = "слово " * 20
+        
+        chunks = split_text(text, 20)
+        
+        assert all(len(chunk) <= 20 for chunk in chunks)
+        assert " ".join(chunks) == text.strip()
+    
+    def test_long_word_split_by_characters(self):
+        """Тест що слово довше межі ріжеться по символах."""
+        assert split_text("a" * 25, 10) == ["a" * 10, "a" * 10, "a" * 5]
+    
+    def test_empty_text(self):
+        """Тест що порожній текст не дає частин."""
+        assert split_text("   ", 10) == []
+    
+    @pytest.mark.asyncio
+    async def test_chunks_synthesized_in_parallel(self):
+        """Тест що час озвучування 2000 символів близький до часу однієї частини."""
+        def slow_write(fp):
+            time.sleep(0.2)
+            fp.write(b'mp3')
+        
+        with patch('tts_service.gTTS') as mock_gtts, \
+                patch('tts_service.tts_executor', TTSExecutor(max_workers=4, max_queue=0, timeout=5)) as executor:
+            mock_gtts.return_value.write_to_fp = slow_write
+            # 20 речень по 99 символів - 4 частини по 5 речень
+            sentence = ("слово " * 17)[:98] + "."
+            text = " ".join([sentence] * 20)
+            
+            started = time.perf_counter()
+            result = await text_to_speech(text)
+            elapsed = time.perf_counter() - started
+            executor.close()
+        
+        assert mock_gtts.call_count == 4
+        assert result.data == b'mp3' * 4
+        assert elapsed < 0.4
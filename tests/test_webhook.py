@@ -0,0 +1,128 @@
+"""Тести для прийому оновлень Telegram через webhook."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.types import Message
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from handlers.webhook import register_telegram_webhook, set_telegram_webhook
+
+SECRET = "test-secret_42"
+PATH = "/webhook/telegram"
+
+
+def make_update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1700000000,
+            "text": text,
+            "chat": {"id": 777, "type": "private"},
+            "from": {"id": 777, "is_bot": False, "first_name": "Test"},
+        },
+    }
+
+
+class TestTelegramWebhook:
+    """Тести маршруту Telegram webhook на aiohttp-сервері."""
+
+    @pytest.fixture
+    def received(self):
+        return []
+
+    @pytest.fixture
+    def dispatcher(self, received):
+        router = Router()
+
+        @router.message(F.text)
+        async def echo(message: Message):
+            received.append(message.text)
+
+        dp = Dispatcher()
+        dp.include_router(router)
+        return dp
+
+    async def make_client(self, dispatcher) -> TestClient:
+        app = web.Application()
+        register_telegram_webhook(app, dispatcher, Bot(token="42:TEST"), path=PATH, secret_token=SECRET)
+        client = TestClient(TestServer(app))
+        await client.start_server()
+        return client
+
+    @pytest.mark.asyncio
+    async def test_update_is_dispatched(self, dispatcher, received):
+        """Тест що оновлення з правильним секретом передається диспетчеру."""
+        client = await self.make_client(dispatcher)
+        try:
+            response = await client.post(
+                PATH, json=make_update(1, "hello"),
+                headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+            )
+            assert response.status == 200
+
+            for _ in range(50):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+            assert received == ["hello"]
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("headers", [{}, {"X-Telegram-Bot-Api-Secret-Token": "wrong"}])
+    async def test_invalid_secret_rejected(self, dispatcher, received, headers):
+        """Тест що запит без правильного секрету відхиляється і не обробляється."""
+        client = await self.make_client(dispatcher)
+        try:
+            response = await client.post(PATH, json=make_update(2, "spoofed"), headers=headers)
+            assert response.status == 401
+            await asyncio.sleep(0.05)
+            assert received == []
+        finally:
+            await client.close()
+
+
+class TestSetTelegramWebhook:
+    """Тести реєстрації webhook у Telegram."""
+
+    @pytest.fixture
+    def dispatcher(self):
+        router = Router()
+
+        @router.message()
+        async def any_message(message: Message):
+            pass
+
+        dp = Dispatcher()
+        dp.include_router(router)
+        return dp
+
+    @pytest.mark.asyncio
+    async def test_sets_url_secret_and_update_types(self, dispatcher):
+        """Тест що setWebhook отримує повну адресу, секрет і типи оновлень."""
+        bot = MagicMock()
+        bot.set_webhook = AsyncMock(return_value=True)
+
+        result = await set_telegram_webhook(bot, dispatcher, "https://bot.example.com/",
+                                            path=PATH, secret_token=SECRET)
+
+        assert result is True
+        bot.set_webhook.assert_awaited_once_with(
+            "https://bot.example.com/webhook/telegram",
+            secret_token=SECRET,
+            allowed_updates=["message"],
+        )
+
+    @pytest.mark.asyncio
+    async def test_error_returns_false(self, dispatcher):
+        """Тест що помилка Telegram API не зупиняє процес."""
+        bot = MagicMock()
+        bot.set_webhook = AsyncMock(side_effect=RuntimeError("network"))
+
+        assert await set_telegram_webhook(bot, dispatcher, "https://bot.example.com",
+                                          path=PATH, secret_token=SECRET) is False
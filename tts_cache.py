@@ -0,0 +1,229 @@
+"""Кеш озвучених описів товарів.
+
+Ключ запису - хеш тексту для озвучування та мови, тому зміна назви, опису,
+ціни чи залишку дає новий ключ, і застарілий аудіофайл ніколи не видається.
+Аудіо зберігається на диску (розмір обмежений, витіснення LRU), у пам'яті
+тримається лише індекс. ID товару входить в ім'я файлу, тож після
+перезапуску інвалідація товару знаходить і записи попереднього запуску.
+Після першої відправки Telegram повертає file_id, і наступні відправки
+посилаються на нього без завантаження файлу. file_id живуть у пам'яті
+процесу, після перезапуску файл завантажується ще раз.
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+
+from config import TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES
+from logger_config import get_logger
+from tts_service import text_to_speech
+
+logger = get_logger("tts.cache")
+
+# Поля товару, що входять у текст для озвучування
+TTS_PRODUCT_FIELDS = frozenset({'name', 'description', 'price', 'stock'})
+
+
+def tts_cache_key(text: str, language: str) -> str:
+    """Повертає ключ кешу для тексту та мови."""
+    return hashlib.sha256(f"{language}\0{text}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _AudioEntry:
+    """Запис індексу: розмір файлу, file_id Telegram та товар."""
+
+    size: int
+    file_id: Optional[str] = None
+    product_id: Optional[int] = None
+
+
+class TTSCache:
+    """Дисковий LRU-кеш аудіо з індексом у пам'яті."""
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        """
+        Args:
+            directory: Каталог для аудіофайлів
+            max_bytes: Максимальний сумарний розмір файлів
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, _AudioEntry]" = OrderedDict()
+        self._by_product: Dict[int, Set[str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._load_index()
+
+    def _path(self, key: str, product_id: Optional[int] = None) -> str:
+        name = f"{key}.{product_id}.mp3" if product_id is not None else f"{key}.mp3"
+        return os.path.join(self.directory, name)
+
+    def _load_index(self) -> None:
+        """Відновлює індекс з файлів, що залишилися з попереднього запуску."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            files = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".mp3"):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    key, _, product_id = name[:-4].partition(".")
+                    product_id = int(product_id) if product_id.isdigit() else None
+                    files.append((stat.st_mtime, key, product_id, stat.st_size))
+        except OSError as e:
+            logger.error(f"Error loading TTS cache index from {self.directory}: {e}")
+            return
+
+        for _, key, product_id, size in sorted(files, key=lambda file: file[0]):
+            self._add(key, _AudioEntry(size=size, product_id=product_id))
+        self._evict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get_file_id(self, key: str) -> Optional[str]:
+        """Повертає file_id Telegram для ключа, якщо аудіо вже відправлялось."""
+        entry = self._entries.get(key)
+        if entry is None or entry.file_id is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.file_id
+
+    def set_file_id(self, key: str, file_id: str) -> None:
+        """Запам'ятовує file_id, повернутий Telegram після відправки."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.file_id = file_id
+
+    def forget_file_id(self, key: str) -> None:
+        """Забуває file_id, який Telegram більше не приймає."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.file_id = None
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Читає аудіо з диска або повертає None, якщо його немає в кеші."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            with open(self._path(key, entry.product_id), "rb") as f:
+                data = f.read()
+            if not data:
+                raise ValueError("file is empty")
+        except (OSError, ValueError) as e:
+            # Файл видалено ззовні або він порожній
+            logger.warning(f"TTS cache file {key} is unreadable: {e}")
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    def write(self, key: str, data: bytes, product_id: Optional[int] = None) -> None:
+        """Зберігає аудіо на диск і витісняє найдавніше використані записи."""
+        path = self._path(key, product_id)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing TTS cache file {key}: {e}")
+            return
+
+        old = self._entries.get(key)
+        if old is not None:
+            # Той самий текст іншого товару лежить в іншому файлі
+            self._remove(key, delete_file=old.product_id != product_id)
+        self._add(key, _AudioEntry(size=len(data), product_id=product_id))
+        self._evict()
+
+    async def get_audio(self, text: str, language: str = "uk",
+                        product_id: Optional[int] = None) -> Optional[bytes]:
+        """Повертає аудіо з кешу або синтезує його.
+
+        Одночасні запити одного тексту чекають на один синтез.
+        """
+        key = tts_cache_key(text, language)
+        data = self.read(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            audio_file = await text_to_speech(text, language=language)
+            data = audio_file.data if audio_file else None
+            if data:
+                self.write(key, data, product_id)
+            future.set_result(data)
+            return data
+        except BaseException:
+            # Очікувачі отримують None (помилка синтезу), виняток - лише ініціатор
+            future.set_result(None)
+            raise
+        finally:
+            del self._inflight[key]
+
+    def invalidate_product(self, product_id: int) -> None:
+        """Видаляє всі записи товару (аудіо та file_id)."""
+        keys = self._by_product.pop(product_id, set())
+        for key in keys:
+            self._remove(key)
+        if keys:
+            logger.info(f"TTS cache invalidated for product {product_id}: {len(keys)} entries")
+
+    def on_product_changed(self, product_id: int, fields: Optional[Iterable[str]]) -> None:
+        """Слухач змін каталогу Database: скидає кеш, якщо змінився озвучуваний текст.
+
+        Args:
+            product_id: ID товару
+            fields: Змінені поля (None - товар видалено)
+        """
+        if fields is None or TTS_PRODUCT_FIELDS.intersection(fields):
+            self.invalidate_product(product_id)
+
+    def _add(self, key: str, entry: _AudioEntry) -> None:
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+        if entry.product_id is not None:
+            self._by_product.setdefault(entry.product_id, set()).add(key)
+
+    def _remove(self, key: str, delete_file: bool = True) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry.size
+        if entry.product_id is not None:
+            keys = self._by_product.get(entry.product_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_product[entry.product_id]
+        if delete_file:
+            try:
+                os.remove(self._path(key, entry.product_id))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Error removing TTS cache file {key}: {e}")
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+
+
+tts_cache = TTSCache()
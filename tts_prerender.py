@@ -0,0 +1,124 @@
+"""Фонове озвучування описів товарів після змін каталогу.
+
+Після add_product або update_product опис товару змінюється, і перший
+слухач чекав би на повний синтез. Пре-рендер ставить такі товари в чергу і
+заздалегідь кладе аудіо в TTSCache через ті самі text_to_speech /
+get_product_description_for_tts. Синтез користувачів має пріоритет: воркер
+бере задачу лише коли в пулі TTS є вільний потік.
+
+Продажі черги не поповнюють: інакше кількість запитів до gTTS росла б разом
+із кількістю замовлень. Текст із новим залишком озвучиться при першому
+зверненні (ключ кешу залежить від тексту).
+"""
+
+import asyncio
+from typing import Iterable, List, Optional, Set
+
+from config import TTS_PRERENDER_CONCURRENCY
+from database import db
+from logger_config import get_logger
+from tts_cache import TTS_PRODUCT_FIELDS, TTSCache, tts_cache, tts_cache_key
+from tts_service import TTSExecutor, get_product_description_for_tts, tts_executor
+
+logger = get_logger("tts.prerender")
+
+
+class TTSPrerenderer:
+    """Черга товарів для фонового озвучування з обмеженою кількістю воркерів."""
+
+    def __init__(self, database, cache: TTSCache = tts_cache, executor: TTSExecutor = tts_executor,
+                 concurrency: int = TTS_PRERENDER_CONCURRENCY, language: str = "uk",
+                 idle_poll: float = 0.5):
+        """
+        Args:
+            database: Екземпляр Database (джерело товарів)
+            cache: Кеш, у який кладеться аудіо
+            executor: Пул TTS, зайнятість якого перевіряється перед синтезом
+            concurrency: Кількість одночасних фонових синтезів
+            language: Мова озвучування
+            idle_poll: Інтервал перевірки вільного потоку, секунди
+        """
+        self.database = database
+        self.cache = cache
+        self.executor = executor
+        self.concurrency = concurrency
+        self.language = language
+        self.idle_poll = idle_poll
+        self.rendered = 0
+        self.skipped = 0
+        self.failed = 0
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        self._queued: Set[int] = set()
+        self._workers: List[asyncio.Task] = []
+
+    def schedule(self, product_id: int) -> bool:
+        """Ставить товар у чергу; повторний виклик до обробки нічого не додає."""
+        if product_id in self._queued:
+            return False
+        self._queued.add(product_id)
+        self._queue.put_nowait(product_id)
+        return True
+
+    def on_product_changed(self, product_id: int, fields: Optional[Iterable[str]]) -> None:
+        """Слухач змін каталогу Database (реєструється після TTSCache)."""
+        if fields is not None and TTS_PRODUCT_FIELDS.intersection(fields):
+            self.schedule(product_id)
+
+    async def warmup(self) -> int:
+        """Ставить у чергу всі товари каталогу; повертає кількість доданих."""
+        products = await self.database.get_all_products()
+        return sum(self.schedule(product['id']) for product in products)
+
+    def start(self) -> None:
+        """Запускає воркери."""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def close(self) -> None:
+        """Зупиняє воркери; незавершені товари озвучаться при першому зверненні."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self) -> None:
+        """Чекає, поки черга спорожніє."""
+        await self._queue.join()
+
+    async def _worker(self) -> None:
+        while True:
+            product_id = await self._queue.get()
+            try:
+                self._queued.discard(product_id)
+                await self._render(product_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error pre-rendering audio for product {product_id}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _render(self, product_id: int) -> None:
+        product = await self.database.get_product_by_id(product_id)
+        if not product:
+            self.skipped += 1
+            return
+
+        text = get_product_description_for_tts(product)
+        if tts_cache_key(text, self.language) in self.cache:
+            self.skipped += 1
+            return
+
+        # Синтез для користувачів має пріоритет: чекаємо на вільний потік пулу
+        while self.executor.pending >= self.executor.max_workers:
+            await asyncio.sleep(self.idle_poll)
+
+        if await self.cache.get_audio(text, language=self.language, product_id=product_id):
+            self.rendered += 1
+            logger.info(f"Audio pre-rendered for product {product_id}")
+        else:
+            self.failed += 1
+
+
+tts_prerenderer = TTSPrerenderer(db)
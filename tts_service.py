@@ -1,9 +1,19 @@
-"""Сервис синтеза речи (Text-to-Speech) с использованием GTTS."""
+"""Сервис синтеза речи (Text-to-Speech) с использованием GTTS.
 
+gTTS делает блокирующий HTTP-запрос, поэтому синтез выполняется в отдельном
+пуле потоков с ограничением параллельности, глубины очереди и времени ожидания.
+Длинный текст делится на части по границам предложений, части синтезируются
+параллельно, а MP3-кадры склеиваются в один файл.
+"""
+
+import asyncio
 import io
-from typing import Optional
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
 from gtts import gTTS
 from aiogram.types import BufferedInputFile
+from config import TTS_MAX_WORKERS, TTS_MAX_QUEUE, TTS_TIMEOUT, TTS_CHUNK_CHARS
 from logger_config import get_logger
 
 logger = get_logger("tts.service")
@@ -19,6 +29,135 @@ SUPPORTED_LANGUAGES = {
 }
 
 
+
+class TTSBusyError(Exception):
+    """Очередь синтеза заполнена."""
+
+
+class TTSExecutor:
+    """Пул потоков для блокирующего синтеза с ограниченной очередью.
+
+    Задача занимает место в очереди, пока поток действительно не завершит
+    работу: поток нельзя прервать, поэтому после таймаута или отмены
+    запущенный синтез продолжает занимать слот. Отмена задачи, которая еще
+    ждет свободного потока, убирает ее из очереди.
+    """
+
+    def __init__(self, max_workers: int = TTS_MAX_WORKERS, max_queue: int = TTS_MAX_QUEUE,
+                 timeout: float = TTS_TIMEOUT):
+        """
+        Args:
+            max_workers: Количество одновременных синтезов
+            max_queue: Сколько задач может ждать свободного потока
+            timeout: Максимальное время ожидания результата, секунды
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполняет func(*args) в пуле и ждет результат.
+
+        Raises:
+            TTSBusyError: Если очередь заполнена
+            asyncio.TimeoutError: Если результат не получен за timeout секунд
+        """
+        if self.pending >= self.max_workers + self.max_queue:
+            raise TTSBusyError(f"TTS queue is full ({self.pending} pending)")
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future: Future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._release_threadsafe(loop))
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # Снимает задачу, если она еще не начала выполняться
+            future.cancel()
+            raise
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # Event loop уже закрыт, счетчик больше никому не нужен
+            pass
+
+    def close(self) -> None:
+        """Останавливает пул, отменяя задачи в очереди."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+tts_executor = TTSExecutor()
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_text(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """
+    Делит текст на части не длиннее max_chars по границам предложений.
+    
+    Предложения собираются в части жадно; слишком длинное предложение
+    делится по словам, слово длиннее max_chars - по символам.
+    """
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        pieces = [sentence]
+        if len(sentence) > max_chars:
+            pieces = []
+            piece = ""
+            for word in sentence.split():
+                while len(word) > max_chars:
+                    if piece:
+                        pieces.append(piece)
+                        piece = ""
+                    pieces.append(word[:max_chars])
+                    word = word[max_chars:]
+                if piece and len(piece) + 1 + len(word) > max_chars:
+                    pieces.append(piece)
+                    piece = ""
+                piece = f"{piece} {word}" if piece else word
+            if piece:
+                pieces.append(piece)
+
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _synthesize_chunks(chunks: List[str], language: str) -> bytes:
+    """Синтезирует части параллельно (в пределах пула) и склеивает MP3-кадры по порядку."""
+    tasks = [asyncio.ensure_future(tts_executor.run(_synthesize, chunk, language)) for chunk in chunks]
+    try:
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return b"".join(parts)
+
+
+def _synthesize(text: str, language: str) -> bytes:
+    """Синтезирует речь (блокирующий вызов, выполняется в пуле потоков)."""
+    tts = gTTS(text=text, lang=language, slow=False)
+    audio_buffer = io.BytesIO()
+    tts.write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+
 async def text_to_speech(text: str, language: str = "uk") -> Optional[BufferedInputFile]:
     """
     Конвертирует текст в речь и возвращает аудиофайл.
@@ -35,26 +174,30 @@ async def text_to_speech(text: str, language: str = "uk") -> Optional[BufferedIn
             logger.warning(f"Unsupported language: {language}, using 'uk'")
             language = "uk"
         
-        # Ограничиваем длину текста (Google имеет ограничения)
-        if len(text) > 500:
-            text = text[:500] + "..."
-            logger.info(f"Text truncated to 500 characters")
-        
-        # Создаем объект gTTS
-        tts = gTTS(text=text, lang=language, slow=False)
-        
-        # Сохраняем в BytesIO
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
+        # Синтез в пуле потоков, event loop продолжает обрабатывать обновления
+        chunks = split_text(text)
+        if not chunks:
+            logger.warning("Empty text for TTS")
+            return None
+        if len(chunks) > 1:
+            logger.info(f"Text split into {len(chunks)} chunks for parallel synthesis")
+        audio = await _synthesize_chunks(chunks, language)
         
         # Обертываем в BufferedInputFile для Aiogram
-        input_file = BufferedInputFile(audio_buffer.getvalue(), filename="product_info.mp3")
+        input_file = BufferedInputFile(audio, filename="product_info.mp3")
         
         logger.info(f"Audio generated for text (lang={language}, length={len(text)})")
         
         return input_file
         
+    except TTSBusyError as e:
+        logger.warning(f"TTS rejected: {e}")
+        return None
+    
+    except asyncio.TimeoutError:
+        logger.warning(f"TTS timed out after {tts_executor.timeout}s (lang={language}, length={len(text)})")
+        return None
+    
     except Exception as e:
         logger.error(f"Error generating audio: {type(e).__name__}: {str(e)}")
         return None